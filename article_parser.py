@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Article Parsing
+Turns fetched search-result and article pages into plain dicts, shared by
+the enhanced scraper and the async orchestrator
+"""
+
+import re
+from datetime import datetime
+
+from content_extractor import default_content_extractor, main_text
+from date_extractor import default_date_extractor
+from html_parsing import parse_html
+
+TITLE_SELECTORS = ['h1', '.article-title', '.entry-title', '.headline', 'title']
+DATE_SELECTORS = ['.date', '.published', '.post-date', 'time']
+NAME_KEYWORDS = ('ogetto', 'ogeto')
+# Legal search results are titled by the parties, so case-title forms also count
+LEGAL_KEYWORDS = NAME_KEYWORDS + (' v ', ' v. ', ' vs ', ' vs. ', 'in re ', 'in the matter of', 'petition no')
+
+
+def find_article_links(html, base_url, selectors, keywords=NAME_KEYWORDS, per_selector=3, limit=None,
+                       backend=None):
+    """Collect {'title', 'url'} links matched by the selectors, in selector order
+
+    Only links whose text contains one of the keywords are kept (pass
+    keywords=None to keep all). Each selector contributes at most
+    per_selector links and repeated URLs are dropped.
+    """
+    document = parse_html(html, selectors=selectors, backend=backend)
+    links = []
+    seen = set()
+    for selector in selectors:
+        for link in document.select(selector)[:per_selector]:
+            href = link.get('href', '')
+            title = link.text().strip()
+            if not href or (keywords and not any(keyword in title.lower() for keyword in keywords)):
+                continue
+            full_url = href if href.startswith('http') else f"{base_url}{href}"
+            if full_url in seen:
+                continue
+            seen.add(full_url)
+            links.append({'title': title, 'url': full_url})
+            if limit and len(links) >= limit:
+                return links
+    return links
+
+
+def read_article(document, content=None):
+    """Raw title, body text and date text of a parsed article page
+
+    content: body text already found by a ContentExtractor; otherwise the
+    document's blocks are scored here.
+    """
+    fields = {'title': None, 'content': content, 'date_text': None}
+    for selector in TITLE_SELECTORS:
+        title_elem = document.select_one(selector)
+        if title_elem:
+            fields['title'] = title_elem.text().strip()
+            break
+
+    if fields['content'] is None:
+        fields['content'] = main_text(document)
+
+    for selector in DATE_SELECTORS:
+        date_elem = document.select_one(selector)
+        if date_elem:
+            fields['date_text'] = date_elem.text().strip()
+            break
+    return fields
+
+
+def parse_article(html, url, source_name, date_extractor=default_date_extractor, backend=None,
+                  content_extractor=default_content_extractor):
+    """Extract title, body text and date from an article page
+
+    date falls back to today when the page has no readable date;
+    date_parsed says whether it came from the page.
+    """
+    document, content = content_extractor.extract(html, url, TITLE_SELECTORS + DATE_SELECTORS, backend=backend)
+    fields = read_article(document, content)
+
+    parsed_date = date_extractor.parse(fields['date_text']) if fields['date_text'] is not None else None
+
+    # Clean up content
+    content = re.sub(r'\s+', ' ', fields['content'])
+    content = content[:3000]  # Limit content length
+
+    return {
+        'title': fields['title'] if fields['title'] is not None else "Unknown Title",
+        'content': content,
+        'date': parsed_date or datetime.now().strftime('%Y-%m-%d'),
+        'date_parsed': parsed_date is not None,
+        'url': url,
+        'source': source_name
+    }
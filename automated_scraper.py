@@ -9,8 +9,10 @@ import time
 import subprocess
 import logging
 from datetime import datetime
-import json
 import os
+from timeline_index import TimelineIndex
+from resilience import Deadline, DEADLINE_ENV
+from search_queries import queries_env
 
 # Configure logging
 logging.basicConfig(
@@ -23,68 +25,87 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# (name, script, longest time in seconds the stage may take)
+PIPELINE_STAGES = [
+    ('Simple scraper', 'simple_scraper.py', 300),
+    ('Enhanced scraper', 'enhanced_scraper.py', 600),
+    ('Content integration', 'integrate_new_content.py', 120)
+]
+# Fetching stops at this share of a stage's slot, leaving the rest to process and save what was found
+FETCH_SHARE = 0.8
+
 class AutomatedScraper:
     def __init__(self):
-        self.scripts = [
-            'simple_scraper.py',
-            'enhanced_scraper.py',
-            'integrate_new_content.py'
-        ]
+        self.stages = PIPELINE_STAGES
+        self.scripts = [script for _, script, _ in self.stages]
+        # The whole pipeline's slot; each stage also stays within its own
+        self.run_budget = float(os.getenv('PIPELINE_BUDGET', str(sum(slot for _, _, slot in self.stages))))
         
-    def run_scraping_pipeline(self):
-        """Run the complete scraping pipeline"""
-        logger.info("Starting automated scraping pipeline...")
+    def run_stage(self, name, script, slot, run_deadline, queries=None):
+        """Run one stage within its slot, passing down its fetch deadline and queries
+
+        Returns whether the stage finished cleanly.
+        """
+        stage_time = min(slot, run_deadline.remaining())
+        if stage_time <= 0:
+            logger.error(f"Skipping {name}: run deadline passed")
+            return False
         
+        env = dict(os.environ, **queries_env(queries))
+        env[DEADLINE_ENV] = str(time.time() + stage_time * FETCH_SHARE)
+        logger.info(f"Running {name} ({stage_time:.0f}s slot)...")
         try:
-            # Step 1: Run simple scraper
-            logger.info("Running simple scraper...")
-            result = subprocess.run(['python3', 'simple_scraper.py'], 
-                                  capture_output=True, text=True, timeout=300)
-            if result.returncode != 0:
-                logger.error(f"Simple scraper failed: {result.stderr}")
-                return False
-            
-            # Step 2: Run enhanced scraper
-            logger.info("Running enhanced scraper...")
-            result = subprocess.run(['python3', 'enhanced_scraper.py'], 
-                                  capture_output=True, text=True, timeout=600)
-            if result.returncode != 0:
-                logger.error(f"Enhanced scraper failed: {result.stderr}")
-                return False
-            
-            # Step 3: Integrate content
-            logger.info("Integrating new content...")
-            result = subprocess.run(['python3', 'integrate_new_content.py'], 
-                                  capture_output=True, text=True, timeout=120)
-            if result.returncode != 0:
-                logger.error(f"Content integration failed: {result.stderr}")
-                return False
-            
-            logger.info("Scraping pipeline completed successfully!")
-            self.log_scraping_stats()
-            return True
-            
+            result = subprocess.run(['python3', script], capture_output=True, text=True,
+                                    timeout=stage_time, env=env)
         except subprocess.TimeoutExpired:
-            logger.error("Scraping pipeline timed out")
+            logger.error(f"{name} overran its {stage_time:.0f}s slot")
             return False
-        except Exception as e:
-            logger.error(f"Scraping pipeline error: {e}")
+        if result.returncode != 0:
+            logger.error(f"{name} failed: {result.stderr}")
             return False
+        return True
+    
+    def run_scraping_pipeline(self, queries=None):
+        """Run the complete scraping pipeline
+        
+        queries: search terms every scraper runs against every source in one
+        pass; results are merged by URL so each article is fetched once.
+        Without them each source uses its default query.
+        
+        A stage that fails or runs out of time is logged and the pipeline
+        carries on, so whatever the earlier stages saved is still integrated.
+        Returns True only if every stage finished cleanly.
+        """
+        logger.info("Starting automated scraping pipeline...")
+        run_deadline = Deadline.after(self.run_budget)
+        
+        failed = []
+        for name, script, slot in self.stages:
+            try:
+                if not self.run_stage(name, script, slot, run_deadline, queries):
+                    failed.append(name)
+            except Exception as e:
+                logger.error(f"{name} error: {e}")
+                failed.append(name)
+        
+        if failed:
+            logger.warning(f"Scraping pipeline finished with partial results; failed stages: {', '.join(failed)}")
+        else:
+            logger.info("Scraping pipeline completed successfully!")
+        self.log_scraping_stats()
+        return not failed
     
     def log_scraping_stats(self):
         """Log statistics about the scraping results"""
         try:
-            # Count blog posts
-            with open('site/data/blog.json', 'r') as f:
-                blog_data = json.load(f)
-                total_posts = len(blog_data.get('blog', {}).get('posts', []))
+            index = TimelineIndex.load('site/data/kennedy-ogetto-cases-chronological.json', 'site/data/blog.json')
             
-            # Count timeline entries
-            with open('site/data/kennedy-ogetto-cases-chronological.json', 'r') as f:
-                timeline_data = json.load(f)
-                total_timeline = len(timeline_data.get('kennedy_ogetto_cases', {}).get('timeline', []))
+            total_posts = index.count('blog_post')
+            total_timeline = index.count('timeline')
             
             logger.info(f"Current stats - Blog posts: {total_posts}, Timeline entries: {total_timeline}")
+            logger.info(f"Timeline by event type: {index.facet_counts('event_type')}")
+            logger.info(f"Posts by category: {index.facet_counts('category')}")
             
         except Exception as e:
             logger.error(f"Error logging stats: {e}")
@@ -164,11 +185,9 @@ def weekly_deep_scrape():
     scraper = AutomatedScraper()
     scraper.backup_data()
     
-    for term in search_terms:
-        logger.info(f"Searching for: {term}")
-        # You could modify the scrapers to accept search terms
-        scraper.run_scraping_pipeline()
-        time.sleep(60)  # Wait between searches
+    # One pipeline run covering every term, instead of one run per term
+    logger.info(f"Searching for: {', '.join(search_terms)}")
+    scraper.run_scraping_pipeline(queries=search_terms)
     
     logger.info("Weekly deep scrape completed")
 
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+HTML Parser Benchmark
+Times each available parsing backend on saved pages, scoring the whole
+page and parsing only the subtree of the content selector learned for
+the site, and checks that every variant extracts the same title and body
+text. Pages passed as files count as one site.
+
+Usage:
+    python3 benchmark-html-parsers.py [page.html | pages_dir ...]
+
+With no arguments the HTML responses in the shared HTTP cache are used.
+"""
+
+import glob
+import os
+import sqlite3
+import sys
+import time
+
+from article_parser import DATE_SELECTORS, TITLE_SELECTORS, read_article
+from content_extractor import ContentExtractor, DomainSelectors
+from html_parsing import available_backends, parse_html
+from http_cache import DEFAULT_CACHE_PATH
+
+
+def load_pages(paths):
+    """Read HTML pages from files and directories, or from the HTTP cache"""
+    pages = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, '*.htm*'))) if os.path.isdir(path) else [path]
+        for file_path in files:
+            with open(file_path, 'rb') as f:
+                pages.append((file_path, f.read()))
+    if paths or not os.path.exists(DEFAULT_CACHE_PATH):
+        return pages
+
+    connection = sqlite3.connect(DEFAULT_CACHE_PATH)
+    for url, headers, body in connection.execute('SELECT url, headers, body FROM responses'):
+        if 'text/html' in headers.lower():
+            pages.append((url, body))
+    connection.close()
+    return pages
+
+
+def run(pages, backend, learned, repeat):
+    """Return (seconds per page, extracted fields per page)
+
+    learned: learn each site's content selector before timing, then parse
+    only its subtree, as the scrapers do once a site is known.
+    """
+    extractor = ContentExtractor(DomainSelectors(selectors={})) if learned else None
+    selectors = TITLE_SELECTORS + DATE_SELECTORS
+    if extractor:
+        for url, html in pages:
+            extractor.extract(html, url, selectors, backend=backend)
+
+    results = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if extractor:
+            results = [read_article(*extractor.extract(html, url, selectors, backend=backend)) for url, html in pages]
+        else:
+            results = [read_article(parse_html(html, backend=backend)) for _, html in pages]
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(pages)), results
+
+
+def normalized(fields):
+    return (fields['title'], ' '.join(fields['content'].split()))
+
+
+def main():
+    pages = load_pages(sys.argv[1:])
+    if not pages:
+        print("No saved pages found; pass HTML files or directories, or run a scraper to fill the cache")
+        return 1
+
+    total_bytes = sum(len(html) for _, html in pages)
+    print(f"Benchmarking {len(pages)} pages ({total_bytes / 1024:.0f} KiB)\n")
+    print(f"{'backend':<14}{'mode':<10}{'ms/page':>10}{'speedup':>10}{'mismatches':>12}")
+
+    baseline_time, baseline = run(pages, 'html.parser', False, 3)
+    baseline = [normalized(fields) for fields in baseline]
+
+    for backend in available_backends():
+        for mode, learned in (('full', False), ('learned', True)):
+            seconds, results = run(pages, backend, learned, 3)
+            mismatches = sum(1 for expected, fields in zip(baseline, results) if normalized(fields) != expected)
+            print(f"{backend:<14}{mode:<10}{seconds * 1000:>10.2f}{baseline_time / seconds:>9.1f}x{mismatches:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Static Site Search Index Builder
+Builds a compact inverted index over the site data files, split into
+small prefix shards that the site's search worker loads on demand
+"""
+
+import json
+import os
+import re
+import shutil
+
+SITE_DATA_DIR = 'site/data'
+SEARCH_DIR = 'site/data/search'
+
+# Title hits outrank tag/category hits, which outrank body text
+FIELD_WEIGHTS = {
+    'title': 5,
+    'tags': 3,
+    'category': 3,
+    'body': 1
+}
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercase ASCII-alphanumeric tokens; mirrored by tokenize() in site/search-worker.js"""
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def shard_key(token):
+    """Shard by the first two characters of a token"""
+    return token[:2]
+
+
+def flatten(value):
+    """Join every string inside nested lists/dicts into one text blob"""
+    if isinstance(value, dict):
+        return ' '.join(flatten(item) for item in value.values())
+    if isinstance(value, list):
+        return ' '.join(flatten(item) for item in value)
+    return str(value) if value is not None else ''
+
+
+def post_doc_id(panel, post):
+    """Doc ID shared with docId() in site/app.js"""
+    return f"{panel}:{post.get('post_id') or post.get('slug') or post.get('title', '')}"
+
+
+def post_fields(post):
+    return {
+        'title': post.get('title', ''),
+        'tags': ' '.join(post.get('tags', [])),
+        'category': post.get('category', ''),
+        'body': ' '.join([
+            post.get('publication_date', ''),
+            post.get('excerpt', ''),
+            flatten(post.get('content', '')),
+            flatten([source.get('title', '') for source in post.get('sources', [])])
+        ])
+    }
+
+
+def company_documents(company):
+    """One document per rendered company-profile section, in render order"""
+    practice_areas = company.get('areas_of_practice', [])
+    pro_bono = next((area for area in practice_areas if area.get('name') == 'Pro Bono Services'), {})
+    return [
+        ('company:overview', {'title': company.get('firm_name', ''),
+                              'body': f"{company.get('firm_description', '')} {company.get('established', '')}"}),
+        ('company:vision', {'title': 'Vision & Mission',
+                            'body': f"{company.get('vision', '')} {company.get('mission', '')}"}),
+        ('company:partners', {'title': 'Founding Partners', 'body': flatten(company.get('founding_partners', []))}),
+        ('company:values', {'title': 'Our Values', 'body': flatten(company.get('values', []))}),
+        ('company:practice', {'title': 'Areas of Practice', 'body': flatten(practice_areas)}),
+        ('company:probono', {'title': 'Pro Bono Services', 'body': flatten(pro_bono)})
+    ]
+
+
+def load_documents(data_dir=SITE_DATA_DIR):
+    """Collect (doc_id, fields) for everything the site renders"""
+    documents = []
+
+    with open(os.path.join(data_dir, 'kennedy-ogetto-cases-chronological.json'), 'r', encoding='utf-8') as f:
+        chronology = json.load(f).get('kennedy_ogetto_cases', {})
+    for post in chronology.get('blog_posts', []):
+        documents.append((post_doc_id('timeline', post), post_fields(post)))
+
+    with open(os.path.join(data_dir, 'blog.json'), 'r', encoding='utf-8') as f:
+        for post in json.load(f).get('blog', {}).get('posts', []):
+            documents.append((post_doc_id('blog', post), post_fields(post)))
+
+    with open(os.path.join(data_dir, 'company-profile.json'), 'r', encoding='utf-8') as f:
+        documents.extend(company_documents(json.load(f).get('company_profile', {})))
+
+    return documents
+
+
+def build_index(documents):
+    """Return (doc_ids, {token: [[doc_number, score], ...]})"""
+    doc_ids = []
+    postings = {}
+    for doc_number, (doc_id, fields) in enumerate(documents):
+        doc_ids.append(doc_id)
+        scores = {}
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS.get(field, 1)
+            for token in tokenize(text):
+                scores[token] = scores.get(token, 0) + weight
+        for token, score in scores.items():
+            postings.setdefault(token, []).append([doc_number, score])
+    return doc_ids, postings
+
+
+def write_search_index(documents, output_dir=SEARCH_DIR):
+    """Write manifest.json plus one shard file per token prefix"""
+    doc_ids, postings = build_index(documents)
+
+    shards = {}
+    for token in sorted(postings):
+        shards.setdefault(shard_key(token), {})[token] = postings[token]
+
+    # Build into a fresh directory and swap it in so the site never sees a half-written index
+    temp_dir = f"{output_dir}.tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+    for key, tokens in shards.items():
+        with open(os.path.join(temp_dir, f"shard-{key}.json"), 'w', encoding='utf-8') as f:
+            json.dump(tokens, f, separators=(',', ':'))
+
+    manifest = {
+        'version': 1,
+        'docs': doc_ids,
+        'shards': sorted(shards)
+    }
+    with open(os.path.join(temp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(temp_dir, output_dir)
+    return manifest
+
+
+def rebuild_search_index(data_dir=SITE_DATA_DIR, output_dir=SEARCH_DIR):
+    """Rebuild the search index from the site data files"""
+    return write_search_index(load_documents(data_dir), output_dir)
+
+
+if __name__ == "__main__":
+    manifest = rebuild_search_index()
+    print(f"Indexed {len(manifest['docs'])} documents into {len(manifest['shards'])} shards in {SEARCH_DIR}")
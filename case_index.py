@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Case Reference Index
+Extracts case citations as canonical case IDs and keeps a reverse index
+from each case to the timeline entries and blog posts that mention it
+"""
+
+import json
+import os
+import re
+from datetime import datetime
+
+# One alternation for every citation style. ICSID is listed before the generic
+# 'Case No.' form so an ICSID citation is not also counted as a plain case, and
+# a generic case number must contain a digit so prose like "case no one" is skipped.
+# Kenyan petitions, appeals and applications are often cited without "No."
+# (Kenya Law's "Case Number: Criminal Appeal 45 of 2019", "Petition 1 of 2022");
+# a bare "case" still needs its marker, since "case 5" is usually prose.
+CASE_PATTERN = re.compile(
+    r'ICSID\s+Case\s+No\.?\s*(?P<icsid>[A-Z0-9][A-Z0-9/.-]*[A-Z0-9])'
+    r'|ICC-(?P<icc>\d{2}/\d{2}-\d{2}/\d{2})(?:-\d+)?'
+    r'|Petition\s+(?:\([^)]{0,40}\)\s+)?(?:No\.?|Number)?\s*(?P<petition>[A-Z]?\d+)(?:\s+of\s+(?P<petition_year>\d{4}))?'
+    r'|(?P<kind>(?:Criminal|Civil)\s+(?:Appeal|Application)|Misc(?:ellaneous|\.)?\s+(?:(?:Criminal|Civil)\s+)?Application)'
+    r'(?:\s+(?:No\.?|Number))?\s*(?P<appeal>[A-Z]?\d+)(?:\s+of\s+(?P<appeal_year>\d{4}))?'
+    r'|Case\s+(?:No\.?|Number)\s*(?P<case>(?=[A-Z/-]{0,8}\d)[A-Z0-9][A-Z0-9/-]*[A-Z0-9]|\d)'
+    r'(?:\s+of\s+(?P<case_year>\d{4}))?',
+    re.IGNORECASE
+)
+
+DEFAULT_INDEX_PATH = 'site/data/case-index.json'
+
+
+def normalize_number(number):
+    """Uppercase a case number and drop leading zeros after any letter prefix, so E005 and E5 agree"""
+    return re.sub(r'^([A-Z]*)0+(?=\d)', r'\1', number.upper())
+
+
+def canonical_case_id(match):
+    """Build a canonical case ID such as 'petition:E5/2022' or 'criminal-appeal:45/2019' from a citation match"""
+    groups = match.groupdict()
+    if groups['icsid']:
+        return f"icsid:{groups['icsid'].upper()}"
+    if groups['icc']:
+        return f"icc:{groups['icc']}"
+    if groups['petition']:
+        case_id = f"petition:{normalize_number(groups['petition'])}"
+        return f"{case_id}/{groups['petition_year']}" if groups['petition_year'] else case_id
+    if groups['appeal']:
+        kind = '-'.join(re.sub(r'^misc(?:ellaneous|\.)?', 'misc', groups['kind'].lower()).split())
+        case_id = f"{kind}:{normalize_number(groups['appeal'])}"
+        return f"{case_id}/{groups['appeal_year']}" if groups['appeal_year'] else case_id
+    case_id = f"case:{normalize_number(groups['case'])}"
+    return f"{case_id}/{groups['case_year']}" if groups['case_year'] else case_id
+
+
+def extract_case_ids(text):
+    """Return the distinct canonical case IDs cited in text, in order of appearance"""
+    if not text:
+        return []
+
+    case_ids = []
+    for match in CASE_PATTERN.finditer(text):
+        case_id = canonical_case_id(match)
+        if case_id not in case_ids:
+            case_ids.append(case_id)
+    return case_ids
+
+
+def canonicalize_reference(reference):
+    """Canonicalize a user-supplied reference like 'Petition No.1 of 2022'"""
+    if re.match(r'^[a-z]+:\S', reference.strip()):
+        return reference.strip()
+    case_ids = extract_case_ids(reference)
+    return case_ids[0] if case_ids else None
+
+
+def timeline_entry_text(entry):
+    """Concatenate the searchable fields of a timeline entry"""
+    return ' '.join([
+        entry.get('title', ''),
+        entry.get('description', ''),
+        entry.get('legal_context', ''),
+        ' '.join(str(case) for case in entry.get('related_cases', []))
+    ])
+
+
+def blog_post_text(post):
+    """Concatenate the searchable fields of a blog post"""
+    content = post.get('content', '')
+    if isinstance(content, dict):
+        content = ' '.join(str(part) for part in content.values())
+    return ' '.join([post.get('title', ''), post.get('excerpt', ''), str(content)])
+
+
+class CaseIndex:
+    def __init__(self, cases=None):
+        # case_id -> {'timeline': [[date, title], ...], 'blog_posts': [post_id, ...]}
+        self.cases = cases or {}
+
+    def add_reference(self, case_id, kind, ref):
+        """Record that a timeline entry or blog post cites case_id"""
+        refs = self.cases.setdefault(case_id, {'timeline': [], 'blog_posts': []})[kind]
+        if ref not in refs:
+            refs.append(ref)
+
+    def add_timeline_entry(self, entry):
+        """Index the cases cited by a timeline entry"""
+        ref = [entry.get('date'), entry.get('title', '')]
+        for case_id in extract_case_ids(timeline_entry_text(entry)):
+            self.add_reference(case_id, 'timeline', ref)
+
+    def add_blog_post(self, post):
+        """Index the cases cited by a blog post"""
+        if not post.get('post_id'):
+            return
+        for case_id in extract_case_ids(blog_post_text(post)):
+            self.add_reference(case_id, 'blog_posts', post['post_id'])
+
+    def lookup(self, reference):
+        """Return the timeline entries and blog posts citing a case reference"""
+        case_id = canonicalize_reference(reference)
+        return self.cases.get(case_id, {'timeline': [], 'blog_posts': []})
+
+    @classmethod
+    def build(cls, timeline_entries, blog_posts):
+        """Build an index from scratch"""
+        index = cls()
+        for entry in timeline_entries:
+            index.add_timeline_entry(entry)
+        for post in blog_posts:
+            index.add_blog_post(post)
+        return index
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        """Load a persisted index, or return an empty one"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f).get('cases', {}))
+        except FileNotFoundError:
+            return cls()
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        """Write the index atomically"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        data = {
+            'metadata': {
+                'total_cases': len(self.cases),
+                'last_updated': datetime.now().strftime('%Y-%m-%d')
+            },
+            'cases': dict(sorted(self.cases.items()))
+        }
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+
+def rebuild_case_index(blog_path='site/data/blog.json',
+                       timeline_path='site/data/kennedy-ogetto-cases-chronological.json',
+                       index_path=DEFAULT_INDEX_PATH):
+    """Rebuild the persisted case index from the site data files"""
+    blog_posts = []
+    timeline_entries = []
+
+    try:
+        with open(blog_path, 'r', encoding='utf-8') as f:
+            blog_posts.extend(json.load(f).get('blog', {}).get('posts', []))
+    except FileNotFoundError:
+        pass
+
+    try:
+        with open(timeline_path, 'r', encoding='utf-8') as f:
+            cases = json.load(f).get('kennedy_ogetto_cases', {})
+            timeline_entries.extend(cases.get('timeline', []))
+            blog_posts.extend(cases.get('blog_posts', []))
+    except FileNotFoundError:
+        pass
+
+    index = CaseIndex.build(timeline_entries, blog_posts)
+    index.save(index_path)
+    return index
+
+
+if __name__ == "__main__":
+    index = rebuild_case_index()
+    print(f"Indexed {len(index.cases)} cases")
+    for case_id, refs in index.cases.items():
+        print(f"- {case_id}: {len(refs['timeline'])} timeline entries, {len(refs['blog_posts'])} blog posts")
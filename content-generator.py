@@ -6,7 +6,8 @@ Processes scraped data and generates structured content
 
 import json
 from datetime import datetime
-import re
+from keyword_classifier import default_classifier
+from date_extractor import default_date_extractor
 
 class ContentGenerator:
     def __init__(self, existing_blog_path="blog.json", existing_timeline_path="kennedy-ogetto-cases-chronological.json"):
@@ -72,15 +73,8 @@ class ContentGenerator:
     def extract_key_information(self, text):
         """Extract key information from scraped text"""
         # Extract dates
-        date_patterns = [
-            r'\b\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\b',
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',
-            r'\b\d{4}-\d{2}-\d{2}\b'
-        ]
-        
-        dates = []
-        for pattern in date_patterns:
-            dates.extend(re.findall(pattern, text, re.IGNORECASE))
+        found_dates = default_date_extractor.find_all(text)
+        dates = [found['text'] for found in found_dates]
         
         # Extract legal terms and case references
         legal_terms = [
@@ -96,26 +90,14 @@ class ContentGenerator:
         
         return {
             'dates': dates,
+            'normalized_dates': [found['date'] for found in found_dates],
             'legal_terms': found_terms,
             'word_count': len(text.split())
         }
     
     def categorize_content(self, content):
         """Categorize content based on keywords"""
-        categories = {
-            'Election Law': ['election', 'petition', 'supreme court', 'presidential'],
-            'International Criminal Law': ['ICC', 'UNICTR', 'Sierra Leone', 'genocide', 'war crimes'],
-            'Constitutional Law': ['constitution', 'BBI', 'constitutional', 'amendment'],
-            'International Investment Law': ['ICSID', 'investment', 'arbitration', 'energy'],
-            'Government Appointments': ['solicitor general', 'appointment', 'vetting', 'legal adviser']
-        }
-        
-        content_lower = content.lower()
-        for category, keywords in categories.items():
-            if any(keyword in content_lower for keyword in keywords):
-                return category
-        
-        return 'General Legal'
+        return default_classifier.classify(content)['category']
 
 # Example usage
 generator = ContentGenerator()
\ No newline at end of file
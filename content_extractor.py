@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Main Content Extraction
+Finds an article's body by scoring candidate blocks on text density and
+link density (readability style) instead of taking the first fixed
+selector that matches. The winning block's selector is remembered per
+domain, so later pages from that site parse only that subtree and skip
+the scoring pass.
+"""
+
+import json
+import os
+import re
+import time
+from urllib.parse import urlsplit
+
+from html_parsing import parse_html
+
+DEFAULT_SELECTORS_PATH = 'data/processed/content-selectors.json'
+
+CANDIDATE_SELECTOR = 'article, main, section, div, td'
+NON_CONTENT_TAGS = ('script', 'style', 'noscript')
+# Used when no block has real paragraphs to score
+FALLBACK_SELECTORS = [
+    '.article-content', '.entry-content', '.post-content',
+    '.story-body', '.content', 'article', 'main'
+]
+UNLIKELY_PATTERN = re.compile(
+    r'comment|footer|header|menu|nav|sidebar|related|share|social|promo|sponsor|advert|'
+    r'\bads?\b|cookie|subscribe|newsletter|breadcrumb|widget|popup|modal',
+    re.IGNORECASE
+)
+LIKELY_PATTERN = re.compile(r'article|body|content|entry|main|post|story', re.IGNORECASE)
+# Ids and classes with digits are usually per page (post-1234) and would not match the next article
+IDENT_PATTERN = re.compile(r'-?[A-Za-z_][A-Za-z_-]*')
+
+MIN_PARAGRAPH_LENGTH = 25
+MIN_CONTENT_LENGTH = 200
+MAX_LINK_DENSITY = 0.5
+COMMA_WEIGHT = 10
+LIKELY_BONUS = 1.25
+
+
+def collapse(text):
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def link_density(node, text):
+    """Share of the block's text that sits inside links"""
+    if not text:
+        return 1.0
+    return min(1.0, sum(len(collapse(link.text())) for link in node.select('a')) / len(text))
+
+
+def score_block(node):
+    """Paragraph text weighted by how much of the block it makes up and how little of it is links"""
+    text = collapse(node.text())
+    if len(text) < MIN_CONTENT_LENGTH:
+        return 0.0
+    paragraphs = [collapse(paragraph.text()) for paragraph in node.select('p')]
+    paragraphs = [paragraph for paragraph in paragraphs if len(paragraph) >= MIN_PARAGRAPH_LENGTH]
+    paragraph_length = sum(len(paragraph) for paragraph in paragraphs)
+    commas = sum(paragraph.count(',') for paragraph in paragraphs)
+    text_density = paragraph_length / len(text)
+    score = (paragraph_length + COMMA_WEIGHT * commas) * text_density * (1 - link_density(node, text))
+    if LIKELY_PATTERN.search(node_names(node)):
+        score *= LIKELY_BONUS
+    return score
+
+
+def node_names(node):
+    return f"{node.get('id') or ''} {' '.join(node.classes())}"
+
+
+def best_block(document):
+    """The highest scoring candidate block, or None when nothing has paragraphs
+
+    Ties go to the smaller block, so a wrapper around the article body
+    never beats the body itself.
+    """
+    best, best_key = None, None
+    for node in document.select(CANDIDATE_SELECTOR):
+        names = node_names(node)
+        if UNLIKELY_PATTERN.search(names) and not LIKELY_PATTERN.search(names):
+            continue
+        score = score_block(node)
+        if score <= 0:
+            continue
+        key = (score, -len(node.text()))
+        if best_key is None or key > best_key:
+            best, best_key = node, key
+    return best
+
+
+def node_selector(document, node):
+    """A selector whose first match in the document is node, or None"""
+    name = node.name()
+    node_id = node.get('id')
+    classes = [value for value in node.classes() if IDENT_PATTERN.fullmatch(value)]
+    if node_id and IDENT_PATTERN.fullmatch(node_id):
+        selector = f"{name}#{node_id}"
+    elif classes:
+        selector = name + ''.join(f".{value}" for value in classes)
+    elif name in ('article', 'main'):
+        selector = name
+    else:
+        return None
+    first = document.select_one(selector)
+    if first is None or collapse(first.text()) != collapse(node.text()):
+        return None
+    return selector
+
+
+def fallback_block(document):
+    for selector in FALLBACK_SELECTORS:
+        node = document.select_one(selector)
+        if node:
+            return node
+    return None
+
+
+def main_text(document):
+    """Body text of a parsed page: the best scoring block, or the first fixed selector hit"""
+    document.remove(*NON_CONTENT_TAGS)
+    node = best_block(document) or fallback_block(document)
+    return collapse(node.text()) if node else ''
+
+
+def acceptable(node, text):
+    """Whether a learned selector still found an article body on this page"""
+    return len(text) >= MIN_CONTENT_LENGTH and link_density(node, text) <= MAX_LINK_DENSITY
+
+
+class DomainSelectors:
+    """Winning content selector per domain, saved between runs"""
+
+    def __init__(self, path=DEFAULT_SELECTORS_PATH, selectors=None):
+        self.path = path
+        self.selectors = selectors or {}
+
+    @classmethod
+    def load(cls, path=DEFAULT_SELECTORS_PATH):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(path, json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls(path)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.selectors, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def get(self, domain):
+        entry = self.selectors.get(domain)
+        return entry['selector'] if entry else None
+
+    def learn(self, domain, selector):
+        self.selectors[domain] = {'selector': selector, 'hits': 0, 'learned_at': time.time()}
+
+    def hit(self, domain):
+        entry = self.selectors.get(domain)
+        if entry:
+            entry['hits'] += 1
+
+    def forget(self, domain):
+        self.selectors.pop(domain, None)
+
+
+class ContentExtractor:
+    def __init__(self, domain_selectors=None):
+        self.domain_selectors = domain_selectors or DomainSelectors.load()
+
+    def save(self):
+        self.domain_selectors.save()
+
+    def extract(self, html, url, selectors=(), backend=None):
+        """Parse a page and find its main text; returns (document, text)
+
+        selectors: any other selectors the caller will query on the document
+        (title, date). With a learned selector for the domain only those
+        subtrees are parsed; otherwise the whole page is parsed and scored,
+        and the winning block's selector is learned.
+        """
+        domain = urlsplit(url).netloc.lower()
+        learned = self.domain_selectors.get(domain)
+        if learned:
+            document = parse_html(html, selectors=[learned, *selectors], backend=backend)
+            node = document.select_one(learned)
+            if node:
+                node.remove(*NON_CONTENT_TAGS)
+                text = collapse(node.text())
+                if acceptable(node, text):
+                    self.domain_selectors.hit(domain)
+                    return document, text
+            # The site's layout changed or this page is a different template
+            self.domain_selectors.forget(domain)
+
+        document = parse_html(html, backend=backend)
+        document.remove(*NON_CONTENT_TAGS)
+        node = best_block(document)
+        if node is None:
+            node = fallback_block(document)
+        else:
+            selector = node_selector(document, node)
+            if selector:
+                self.domain_selectors.learn(domain, selector)
+        return document, collapse(node.text()) if node else ''
+
+
+default_content_extractor = ContentExtractor()
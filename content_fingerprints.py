@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Content Fingerprints
+Hashes the normalized text of each scraped page and keeps what was
+derived from it (blog post, timeline entry). When a page comes back
+with the same fingerprint, the derived output is reused instead of
+being generated again.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+from hashlib import blake2b
+
+DEFAULT_STORE_PATH = 'data/processed/content-fingerprints.sqlite3'
+
+# Page furniture and counters that change between fetches without the story changing
+BOILERPLATE_PATTERNS = [
+    r'\bviews?:\s*[\d,]+',
+    r'\b[\d,]+\s+views\b',
+    r'\b\d+\s+(?:seconds?|minutes?|hours?|days?|weeks?)\s+ago\b',
+    r'\badvertisement\b',
+    r'\bread more\b',
+    r'\bshare (?:this|on) \w+\b',
+    r'\bsubscribe(?: now| to our newsletter)?\b',
+    r'\bsign up for (?:our|the) newsletter\b',
+    r'(?:copyright|©)\s*\d{4}[^.]*',
+    r'\ball rights reserved\b'
+]
+BOILERPLATE_PATTERN = re.compile('|'.join(BOILERPLATE_PATTERNS), re.IGNORECASE)
+
+
+def normalize_text(text):
+    """Lowercase, strip boilerplate and punctuation, collapse whitespace"""
+    text = BOILERPLATE_PATTERN.sub(' ', text or '')
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def content_fingerprint(*parts):
+    """Stable fingerprint of the normalized text parts (e.g. title and body)"""
+    digest = blake2b(digest_size=16)
+    for part in parts:
+        digest.update(normalize_text(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class DerivedContentStore:
+    def __init__(self, stage, path=DEFAULT_STORE_PATH):
+        """stage names the pipeline step, since each derives different output from the same URL"""
+        self.stage = stage
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS derived_content (
+                stage TEXT NOT NULL,
+                url TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                derived TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (stage, url)
+            ) WITHOUT ROWID;
+        """)
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, url, fingerprint):
+        """Derived output stored for url, if it was built from the same fingerprint"""
+        if not url:
+            return None
+        row = self.connection.execute(
+            'SELECT fingerprint, derived FROM derived_content WHERE stage = ? AND url = ?', (self.stage, url)
+        ).fetchone()
+        if row is None or row[0] != fingerprint:
+            return None
+        return json.loads(row[1])
+
+    def stored(self, url):
+        """Derived output stored for url whatever its fingerprint, e.g. what a changed page replaces"""
+        if not url:
+            return None
+        row = self.connection.execute(
+            'SELECT derived FROM derived_content WHERE stage = ? AND url = ?', (self.stage, url)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, url, fingerprint, derived):
+        if not url:
+            return
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO derived_content (stage, url, fingerprint, derived, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (self.stage, url, fingerprint, json.dumps(derived, ensure_ascii=False), time.time())
+            )
+
+    def partition(self, items, url_func, text_func):
+        """Split items into ({index: derived} to reuse, [(index, item, fingerprint)] to build)"""
+        reused = {}
+        pending = []
+        for index, item in enumerate(items):
+            fingerprint = content_fingerprint(*text_func(item))
+            derived = self.get(url_func(item), fingerprint)
+            if derived is not None:
+                reused[index] = derived
+            else:
+                pending.append((index, item, fingerprint))
+        return reused, pending
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Crawl State
+Remembers which URLs each scraper has already extracted (a Bloom filter
+in front of an exact SQLite set) and the newest publication date or ID
+seen per source, so repeat runs only fetch what is new. Both are held in
+memory until save(), which scrapers call once the extracted data is
+written, so a run that fails before then extracts the same URLs again.
+
+That data goes into pending output files that each run adds to instead
+of overwriting (append_pending), and that the stage publishing them
+empties once it has (clear_pending). A run whose items were never
+published therefore leaves them queued for the next one rather than
+lost behind URLs that are already stored as seen.
+
+URLs extracted more than SCRAPE_REVISIT_DAYS ago (30 by default, 0 to
+never revisit) count as unseen again, so edited pages are fetched anew;
+the content fingerprints then decide whether anything derived from them
+has to be rebuilt, and a rebuilt post or entry replaces the published one.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import time
+from hashlib import blake2b
+
+DEFAULT_STATE_PATH = 'data/processed/crawl-state.sqlite3'
+REVISIT_ENV = 'SCRAPE_REVISIT_DAYS'
+DEFAULT_REVISIT_DAYS = 30
+
+
+def mark_key(mark):
+    """Order numeric IDs numerically and everything else (ISO dates) as text"""
+    mark = str(mark)
+    return (0, int(mark), '') if mark.isdigit() else (1, 0, mark)
+
+
+class BloomFilter:
+    def __init__(self, capacity=10000, error_rate=0.001, bits=None, count=0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = count
+
+    def positions(self, item):
+        # Double hashing: k positions from the two halves of one 128-bit digest
+        digest = blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+
+def pending_key(item):
+    """Identify an item in a pending output file by its URL, else its first source's, else its title"""
+    sources = item.get('sources') or [{}]
+    return item.get('url') or sources[0].get('url') or item.get('title')
+
+
+def load_pending(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+    return items if isinstance(items, list) else []
+
+
+def write_pending(path, items):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(items, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def append_pending(path, items):
+    """Add a run's items to a pending output file and return everything now queued in it
+
+    Items still in the file were not published yet; one with the same
+    pending_key as a new item (a revisited page) is replaced in place.
+    """
+    queued = load_pending(path)
+    positions = {pending_key(item): index for index, item in enumerate(queued)}
+    for item in items:
+        key = pending_key(item)
+        if key in positions:
+            queued[positions[key]] = item
+        else:
+            positions[key] = len(queued)
+            queued.append(item)
+    write_pending(path, queued)
+    return queued
+
+
+def clear_pending(path):
+    """Empty a pending output file once its items have been published"""
+    if os.path.exists(path):
+        write_pending(path, [])
+
+
+def configured_revisit_days():
+    """Days after which an extracted URL is fetched again, or None to never revisit"""
+    try:
+        days = float(os.getenv(REVISIT_ENV, DEFAULT_REVISIT_DAYS))
+    except ValueError:
+        days = DEFAULT_REVISIT_DAYS
+    return days if days > 0 else None
+
+
+class CrawlState:
+    def __init__(self, namespace, path=DEFAULT_STATE_PATH, capacity=10000, error_rate=0.001, revisit_days=None):
+        """
+        namespace keeps each scraper's memory separate, since one scraper's output feeds the next
+        revisit_days: URLs extracted longer ago than this are no longer seen; None keeps them seen forever
+        """
+        self.namespace = namespace
+        self.path = path
+        self.revisit_after = revisit_days * 86400 if revisit_days else None
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS seen_urls (
+                namespace TEXT NOT NULL,
+                url TEXT NOT NULL,
+                source TEXT,
+                seen_at REAL NOT NULL,
+                PRIMARY KEY (namespace, url)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS bloom_filters (
+                namespace TEXT PRIMARY KEY,
+                capacity INTEGER NOT NULL,
+                error_rate REAL NOT NULL,
+                count INTEGER NOT NULL,
+                bits BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS high_water_marks (
+                namespace TEXT NOT NULL,
+                source TEXT NOT NULL,
+                mark TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, source)
+            );
+        """)
+        # Extracted URLs (url -> (source, seen_at)) and raised marks (source -> mark), kept until save()
+        self.pending_seen = {}
+        self.pending_marks = {}
+        self.bloom = self.load_bloom(capacity, error_rate)
+
+    def close(self):
+        self.connection.close()
+
+    def seen_count(self):
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM seen_urls WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0]
+
+    def load_bloom(self, capacity, error_rate):
+        """Load the saved filter, rebuilding it if it no longer covers the exact set"""
+        row = self.connection.execute(
+            'SELECT capacity, error_rate, count, bits FROM bloom_filters WHERE namespace = ?', (self.namespace,)
+        ).fetchone()
+        seen = self.seen_count()
+        # A filter saved before a crash may be missing URLs; that would be a false negative
+        if row and row[2] == seen and seen < row[0]:
+            return BloomFilter(row[0], row[1], bytearray(row[3]), row[2])
+        return self.rebuild_bloom(max(capacity, seen * 2), error_rate)
+
+    def rebuild_bloom(self, capacity, error_rate):
+        bloom = BloomFilter(capacity, error_rate)
+        for (url,) in self.connection.execute('SELECT url FROM seen_urls WHERE namespace = ?', (self.namespace,)):
+            bloom.add(url)
+        for url in self.pending_seen:
+            bloom.add(url)
+        return bloom
+
+    def save(self):
+        """Store the URLs marked seen and the marks advanced since the last save"""
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO seen_urls (namespace, url, source, seen_at) VALUES (?, ?, ?, ?)',
+                [(self.namespace, url, source, seen_at) for url, (source, seen_at) in self.pending_seen.items()]
+            )
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO high_water_marks (namespace, source, mark, updated_at) VALUES (?, ?, ?, ?)',
+                [(self.namespace, source, mark, time.time()) for source, mark in self.pending_marks.items()]
+            )
+            self.connection.execute(
+                'INSERT OR REPLACE INTO bloom_filters (namespace, capacity, error_rate, count, bits) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (self.namespace, self.bloom.capacity, self.bloom.error_rate, self.bloom.count, bytes(self.bloom.bits))
+            )
+        self.pending_seen = {}
+        self.pending_marks = {}
+
+    def seen_at(self, url):
+        """When a URL was last stored as extracted, or None"""
+        row = self.connection.execute(
+            'SELECT seen_at FROM seen_urls WHERE namespace = ? AND url = ?', (self.namespace, url)
+        ).fetchone()
+        return row[0] if row else None
+
+    def is_seen(self, url):
+        """Bloom filter first; only a possible hit is confirmed against the exact set"""
+        if url not in self.bloom:
+            return False
+        if url in self.pending_seen:
+            return True
+        seen_at = self.seen_at(url)
+        if seen_at is None:
+            return False
+        return self.revisit_after is None or time.time() - seen_at < self.revisit_after
+
+    def mark_seen(self, url, source=None):
+        """Record a URL as extracted; it is stored by the next save()"""
+        if self.is_seen(url):
+            return
+        revisited = url in self.bloom and self.seen_at(url) is not None
+        self.pending_seen[url] = (source, time.time())
+        if revisited:
+            # Already in the filter and the exact set; save() only refreshes its seen_at
+            return
+        self.bloom.add(url)
+        if self.bloom.count >= self.bloom.capacity:
+            self.bloom = self.rebuild_bloom(self.bloom.capacity * 2, self.bloom.error_rate)
+
+    def high_water(self, source):
+        if source in self.pending_marks:
+            return self.pending_marks[source]
+        row = self.connection.execute(
+            'SELECT mark FROM high_water_marks WHERE namespace = ? AND source = ?', (self.namespace, source)
+        ).fetchone()
+        return row[0] if row else None
+
+    def advance(self, source, mark):
+        """Raise a source's high-water mark to mark if it is newer; it is stored by the next save()"""
+        if not mark:
+            return
+        current = self.high_water(source)
+        if current is not None and mark_key(mark) <= mark_key(current):
+            return
+        self.pending_marks[source] = str(mark)
+
+    def is_known(self, source, mark):
+        """True if mark is at or below the source's high-water mark"""
+        current = self.high_water(source)
+        return current is not None and bool(mark) and mark_key(mark) <= mark_key(current)
+
+    def new_items(self, items, source=None, url_key='url', mark_field=None, stop_at_known=False):
+        """Items whose URLs have not been extracted yet, in listing order
+
+        stop_at_known is for newest-first listings (feeds, date-sorted
+        archives): the walk stops at the first seen URL, or the first item
+        whose mark_field is at or below the high-water mark, because
+        everything after it is older. Relevance-ranked search results should
+        leave it off and only skip seen URLs.
+        """
+        new = []
+        for item in items:
+            url = item.get(url_key)
+            known = bool(url) and self.is_seen(url)
+            if not known and stop_at_known and source and mark_field:
+                known = self.is_known(source, item.get(mark_field))
+            if known:
+                if stop_at_known:
+                    break
+                continue
+            new.append(item)
+        return new
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Date Extraction Engine
+One precompiled alternation for every date format the scrapers see,
+with explicit day/month resolution and ISO output
+"""
+
+import re
+from datetime import date
+
+MONTHS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12,
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'jun': 6, 'jul': 7,
+    'aug': 8, 'sep': 9, 'sept': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+# Longest names first so 'September' is not cut short at 'Sep'
+MONTH_PATTERN = '|'.join(sorted(MONTHS, key=len, reverse=True))
+
+DATE_PATTERN = re.compile(
+    r'(?<!\w)(?:'
+    r'(?P<iso_y>\d{4})-(?P<iso_m>\d{1,2})-(?P<iso_d>\d{1,2})'
+    r'|(?P<num_a>\d{1,2})/(?P<num_b>\d{1,2})/(?P<num_y>\d{4})'
+    # '12th day of March, 2023' is how judgments record their delivery date
+    r'|(?P<dmy_d>\d{1,2})(?:st|nd|rd|th)?\s+(?:day\s+of\s+)?(?P<dmy_m>' + MONTH_PATTERN + r')\.?,?\s+(?P<dmy_y>\d{4})'
+    r'|(?P<mdy_m>' + MONTH_PATTERN + r')\.?\s+(?P<mdy_d>\d{1,2})(?:st|nd|rd|th)?,?\s+(?P<mdy_y>\d{4})'
+    r')(?!\d)',
+    re.IGNORECASE
+)
+
+
+class DateExtractor:
+    def __init__(self, day_first=True):
+        # Kenyan publications write 04/09/2025 for 4 September, so DD/MM is the default
+        self.day_first = day_first
+        self.cache = {}
+
+    def resolve_numeric(self, first, second):
+        """Decide which part of an ambiguous numeric date is the day"""
+        if first > 12:
+            return second, first
+        if second > 12:
+            return first, second
+        return (second, first) if self.day_first else (first, second)
+
+    def build_match(self, match):
+        """Turn a regex match into a normalized date dict, or None if it is not a real date"""
+        groups = match.groupdict()
+        if groups['iso_y']:
+            year, month, day = int(groups['iso_y']), int(groups['iso_m']), int(groups['iso_d'])
+            date_format = 'iso'
+        elif groups['num_y']:
+            month, day = self.resolve_numeric(int(groups['num_a']), int(groups['num_b']))
+            year = int(groups['num_y'])
+            date_format = 'numeric'
+        elif groups['dmy_y']:
+            year, month, day = int(groups['dmy_y']), MONTHS[groups['dmy_m'].lower()], int(groups['dmy_d'])
+            date_format = 'dmy'
+        else:
+            year, month, day = int(groups['mdy_y']), MONTHS[groups['mdy_m'].lower()], int(groups['mdy_d'])
+            date_format = 'mdy'
+
+        try:
+            iso_date = date(year, month, day).isoformat()
+        except ValueError:
+            return None
+
+        return {
+            'date': iso_date,
+            'text': match.group(0),
+            'span': match.span(),
+            'format': date_format
+        }
+
+    def find_all(self, text):
+        """Find every date in text, in order of appearance"""
+        if not text:
+            return []
+
+        matches = []
+        for match in DATE_PATTERN.finditer(text):
+            found = self.build_match(match)
+            if found:
+                matches.append(found)
+        return matches
+
+    def parse(self, text):
+        """Return the first date in text as YYYY-MM-DD, or None"""
+        if not text:
+            return None
+
+        if text in self.cache:
+            return self.cache[text]
+
+        parsed = None
+        for match in DATE_PATTERN.finditer(text):
+            found = self.build_match(match)
+            if found:
+                parsed = found['date']
+                break
+
+        if len(self.cache) < 100000:
+            self.cache[text] = parsed
+        return parsed
+
+    def parse_many(self, texts):
+        """Normalize a batch of date strings, returning ISO dates (or None) in input order"""
+        parse = self.parse
+        return [parse(text) if isinstance(text, str) else None for text in texts]
+
+
+# Shared instance, compiled once per process
+default_date_extractor = DateExtractor()
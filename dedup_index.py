@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Persistent Dedup Key Index
+Keeps the dedup keys of site/data/*.json in a small SQLite file so merges
+can tell which entries are new without parsing the target JSON, and which
+published records a revisited page's new version should replace
+"""
+
+import json
+import os
+import sqlite3
+
+DEFAULT_INDEX_PATH = 'site/data/dedup-keys.sqlite3'
+
+
+def timeline_key(entry):
+    """Dedup key for a timeline entry, matching merge_with_existing_timeline"""
+    return json.dumps([entry.get('date'), entry.get('title')], ensure_ascii=False)
+
+
+def blog_post_key(post):
+    """Dedup key for a blog post"""
+    return post['post_id']
+
+
+def title_key(entry):
+    """Dedup key for a timeline entry keyed on title alone"""
+    return entry['title']
+
+
+def load_json_or_empty(json_path):
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def load_blog_keys(json_path, key_func=blog_post_key):
+    """Read every blog post key from a blog.json file"""
+    data = load_json_or_empty(json_path)
+    return [key_func(post) for post in data.get('blog', {}).get('posts', [])]
+
+
+def load_timeline_keys(json_path, key_func=timeline_key):
+    """Read every timeline key from a chronology file"""
+    data = load_json_or_empty(json_path)
+    timeline = data.get('kennedy_ogetto_cases', data).get('timeline', [])
+    return [key_func(entry) for entry in timeline]
+
+
+class DedupKeyIndex:
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS dedup_keys (
+                namespace TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (namespace, file_path, key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS synced_files (
+                namespace TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (namespace, file_path)
+            );
+        """)
+
+    def close(self):
+        self.connection.close()
+
+    def file_stamp(self, json_path):
+        """Return (mtime_ns, size) for a file, or None if it does not exist"""
+        try:
+            stat = os.stat(json_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_synced(self, namespace, json_path):
+        """Check whether the stored keys still describe the file on disk"""
+        row = self.connection.execute(
+            'SELECT mtime_ns, size FROM synced_files WHERE namespace = ? AND file_path = ?',
+            (namespace, os.path.abspath(json_path))
+        ).fetchone()
+        return row is not None and tuple(row) == self.file_stamp(json_path)
+
+    def sync(self, namespace, json_path, load_keys):
+        """Rebuild a namespace from its JSON file if the file changed outside the index
+
+        load_keys is only called (and the JSON only parsed) when a rebuild is needed.
+        """
+        if self.is_synced(namespace, json_path):
+            return False
+
+        keys = load_keys() if self.file_stamp(json_path) else []
+        file_path = os.path.abspath(json_path)
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM dedup_keys WHERE namespace = ? AND file_path = ?', (namespace, file_path)
+            )
+            self.insert_keys(namespace, json_path, keys)
+            self.record_stamp(namespace, json_path)
+        return True
+
+    def insert_keys(self, namespace, json_path, keys):
+        file_path = os.path.abspath(json_path)
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO dedup_keys (namespace, file_path, key) VALUES (?, ?, ?)',
+            ((namespace, file_path, key) for key in keys)
+        )
+
+    def record_stamp(self, namespace, json_path):
+        stamp = self.file_stamp(json_path)
+        if stamp is None:
+            return
+        self.connection.execute(
+            'INSERT OR REPLACE INTO synced_files (namespace, file_path, mtime_ns, size) VALUES (?, ?, ?, ?)',
+            (namespace, os.path.abspath(json_path), stamp[0], stamp[1])
+        )
+
+    def contains(self, namespace, json_path, key):
+        """Check a single key"""
+        return self.connection.execute(
+            'SELECT 1 FROM dedup_keys WHERE namespace = ? AND file_path = ? AND key = ?',
+            (namespace, os.path.abspath(json_path), key)
+        ).fetchone() is not None
+
+    def key_set(self, namespace, json_path):
+        """A set-like view of a namespace's indexed keys, checked in SQLite instead of loaded
+
+        Keys added to the view are only remembered by the view itself; they
+        are stored by record_write once the file holding them is written.
+        """
+        return IndexedKeySet(self, namespace, json_path)
+
+    def filter_new(self, namespace, json_path, items, key_func):
+        """Return the items whose keys are not indexed yet, dropping repeats within the batch"""
+        new_items = []
+        batch_keys = set()
+        for item in items:
+            key = key_func(item)
+            if key in batch_keys or self.contains(namespace, json_path, key):
+                continue
+            batch_keys.add(key)
+            new_items.append(item)
+        return new_items
+
+    def split_revisions(self, namespace, json_path, replacements, key_func):
+        """Pick the replacements that can be applied to the published file
+
+        replacements maps the key of a published record -> its new version
+        (a revisited page whose content changed). Returns (revised, unpublished):
+        revised maps old key -> new record for records that are in the file
+        and whose new key is free; unpublished lists new versions of records
+        that never made it into the file, to be added like any new item.
+        """
+        revised = {}
+        unpublished = []
+        for old_key, record in replacements.items():
+            if not self.contains(namespace, json_path, old_key):
+                unpublished.append(record)
+                continue
+            new_key = key_func(record)
+            if new_key == old_key or not self.contains(namespace, json_path, new_key):
+                revised[old_key] = record
+        return revised, unpublished
+
+    def record_write(self, updates, data, json_path, extra_paths=(), removed=None):
+        """Write data to json_path and add the new keys in one transaction
+
+        updates maps namespace -> new keys, and removed maps namespace -> keys
+        of records that are no longer in data (replaced by a revision). The
+        JSON goes to a temp file and is swapped in with os.replace; if that
+        fails the key changes are rolled back, so the index never gets ahead
+        of the file. Namespaces that were already stale are left stale and get
+        rebuilt on their next sync.
+        """
+        removed = removed or {}
+        synced = [namespace for namespace in set(updates) | set(removed) if self.is_synced(namespace, json_path)]
+        with self.connection:
+            for namespace in synced:
+                self.connection.executemany(
+                    'DELETE FROM dedup_keys WHERE namespace = ? AND file_path = ? AND key = ?',
+                    ((namespace, os.path.abspath(json_path), key) for key in removed.get(namespace, ()))
+                )
+                self.insert_keys(namespace, json_path, updates.get(namespace, ()))
+            for path in (json_path,) + tuple(extra_paths):
+                write_json_atomic(data, path)
+            for namespace in synced:
+                self.record_stamp(namespace, json_path)
+
+
+class IndexedKeySet:
+    """The keys in a DedupKeyIndex namespace plus those added since, supporting `in` and add()"""
+
+    def __init__(self, index, namespace, json_path):
+        self.index = index
+        self.namespace = namespace
+        self.json_path = json_path
+        self.added = set()
+
+    def __contains__(self, key):
+        return key in self.added or self.index.contains(self.namespace, self.json_path, key)
+
+    def add(self, key):
+        self.added.add(key)
+
+
+def replace_records(records, revised, key_func):
+    """Swap revised records (old key -> new record) into records in place; returns the replaced keys"""
+    replaced = []
+    for index, record in enumerate(records):
+        key = key_func(record)
+        if key in revised:
+            records[index] = revised[key]
+            replaced.append(key)
+    return replaced
+
+
+def write_json_atomic(data, json_path):
+    """Write JSON via a temp file and rename so readers never see a partial file"""
+    os.makedirs(os.path.dirname(json_path) or '.', exist_ok=True)
+    temp_path = f"{json_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, json_path)
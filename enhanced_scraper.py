@@ -4,180 +4,159 @@ Enhanced Kennedy Ogetto Scraper
 Focuses on extracting detailed information from discovered sources
 """
 
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import os
 import json
-import time
 from datetime import datetime
-import re
 from blog_template_generator import BlogPostGenerator
 from timeline_processor import TimelineProcessor
+from http_cache import HttpCache
+from keyword_classifier import default_classifier
+from date_extractor import default_date_extractor
+from near_duplicates import NearDuplicateIndex
+from fetch_engine import AsyncFetcher, fetch_many
+from resilience import ResilientSession
+from article_parser import find_article_links, parse_article
+from content_extractor import default_content_extractor
+from search_queries import configured_queries, merge_results
+from sitemap_discovery import SitemapDiscovery, discovery_mode
+from feed_poller import FeedPoller
+from crawl_state import CrawlState, append_pending, configured_revisit_days
+from content_fingerprints import DerivedContentStore, content_fingerprint
+from youtube_metadata import fetch_video_metadata, parse_watch_page, stream_watch_page
+
+KENYAN_SITES = [
+    {
+        'name': 'Daily Nation',
+        'base_url': 'https://nation.co.ke',
+        'search_path': '/search',
+        'params': {'q': 'Kennedy Ogetto'}
+    },
+    {
+        'name': 'The Star',
+        'base_url': 'https://www.the-star.co.ke',
+        'search_path': '/search',
+        'params': {'q': 'Kennedy Ogetto'}
+    },
+    {
+        'name': 'Business Daily',
+        'base_url': 'https://www.businessdailyafrica.com',
+        'search_path': '/search',
+        'params': {'q': 'Kennedy Ogetto'}
+    }
+]
 
 class EnhancedOgettoScraper:
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        self.session = requests.Session()
+        self.http_cache = HttpCache()
+        self.session = ResilientSession(self.http_cache)
         self.session.headers.update(self.headers)
         self.blog_generator = BlogPostGenerator()
         self.timeline_processor = TimelineProcessor()
+        self.classifier = default_classifier
+        self.date_extractor = default_date_extractor
+        self.content_extractor = default_content_extractor
+        self.near_duplicates = NearDuplicateIndex.load()
+        self.crawl_state = CrawlState('enhanced_scraper', revisit_days=configured_revisit_days())
+        self.derived_content = DerivedContentStore('enhanced_scraper')
+        # With a Data API key, video metadata comes from batched videos.list calls instead of watch pages
+        self.youtube_api_key = os.getenv('YOUTUBE_API_KEY')
+        # None searches each site with its own params
+        self.queries = configured_queries()
+        # News articles are found through sitemaps unless SCRAPE_DISCOVERY=search
+        self.discovery = discovery_mode()
+        self.sitemap_discovery = None
+        self.feed_poller = None
+        # Feeds with an item that could not be extracted this run
+        self.failed_feeds = set()
+        # Concurrency is capped globally; politeness is one request per host every 1/rate seconds
+        self.fetch_options = {
+            'concurrency': int(os.getenv('FETCH_CONCURRENCY', '8')),
+            'host_rate': float(os.getenv('FETCH_HOST_RATE', '0.5')),
+            'headers': self.headers,
+            'cache': self.http_cache,
+            # Sync and async fetches share the host breakers and the run deadline
+            'breakers': self.session.breakers,
+            'deadline': self.session.deadline
+        }
         
     def extract_youtube_metadata(self, video_url):
         """Extract metadata from YouTube video"""
         try:
-            response = self.session.get(video_url, timeout=10)
-            if response.status_code == 200:
-                content = response.text
-                
-                # Extract title
-                title_match = re.search(r'"title":"([^"]+)"', content)
-                title = title_match.group(1) if title_match else "Unknown Title"
-                
-                # Extract description
-                desc_match = re.search(r'"shortDescription":"([^"]+)"', content)
-                description = desc_match.group(1) if desc_match else ""
-                
-                # Extract upload date
-                date_match = re.search(r'"uploadDate":"([^"]+)"', content)
-                upload_date = date_match.group(1) if date_match else datetime.now().strftime('%Y-%m-%d')
-                
-                # Extract view count
-                views_match = re.search(r'"viewCount":"(\d+)"', content)
-                views = views_match.group(1) if views_match else "0"
-                
-                return {
-                    'title': title.replace('\\u0026', '&').replace('\\"', '"'),
-                    'description': description.replace('\\n', ' ').replace('\\"', '"')[:500],
-                    'upload_date': upload_date.split('T')[0] if 'T' in upload_date else upload_date,
-                    'views': views,
-                    'url': video_url
-                }
-            else:
-                return None
+            return stream_watch_page(self.session, video_url)
         except Exception as e:
             print(f"Error extracting YouTube metadata: {e}")
             return None
     
+    def parse_youtube_metadata(self, content, video_url):
+        """Pull title, description, upload date and views out of a YouTube watch page"""
+        return parse_watch_page(content, video_url)
+    
+    def search_matrix(self, sites=KENYAN_SITES):
+        """(site, query) for every configured query on every given news site"""
+        return [(site, query) for query in self.queries or [None] for site in sites]
+    
+    def search_requests(self, sites=KENYAN_SITES):
+        """(url, params) search requests in search_matrix order"""
+        return [
+            (f"{site['base_url']}{site['search_path']}", dict(site['params'], q=query) if query else site['params'])
+            for site, query in self.search_matrix(sites)
+        ]
+    
     def search_specific_kenyan_sites(self):
         """Search specific Kenyan news sites for Kennedy Ogetto"""
-        kenyan_sites = [
-            {
-                'name': 'Daily Nation',
-                'base_url': 'https://nation.co.ke',
-                'search_path': '/search',
-                'params': {'q': 'Kennedy Ogetto'}
-            },
-            {
-                'name': 'The Star',
-                'base_url': 'https://www.the-star.co.ke',
-                'search_path': '/search',
-                'params': {'q': 'Kennedy Ogetto'}
-            },
-            {
-                'name': 'Business Daily',
-                'base_url': 'https://www.businessdailyafrica.com',
-                'search_path': '/search',
-                'params': {'q': 'Kennedy Ogetto'}
-            }
-        ]
-        
+        responses = fetch_many(self.search_requests(), **self.fetch_options)
+        return self.parse_search_responses(responses)
+    
+    async def discover_from_sitemaps(self, fetcher):
+        """(new article links from every site with a readable sitemap, sites left to search)"""
+        self.sitemap_discovery = SitemapDiscovery(fetcher, self.crawl_state)
+        discovered = await asyncio.gather(*(
+            self.sitemap_discovery.discover(site['base_url'], site['name']) for site in KENYAN_SITES
+        ))
+        links = [link for site_links in discovered if site_links for link in site_links]
+        search_sites = [site for site, site_links in zip(KENYAN_SITES, discovered) if site_links is None]
+        return links, search_sites
+    
+    def parse_search_responses(self, responses, sites=KENYAN_SITES):
+        """Collect article links from the search result pages, one per URL across all queries"""
         all_articles = []
         
-        for site in kenyan_sites:
+        # Common selectors for article links
+        article_selectors = [
+            'a[href*="ogetto"]', 'a[href*="ogeto"]',
+            '.article-title a', '.headline a', '.story-title a',
+            'h2 a', 'h3 a', '.entry-title a'
+        ]
+        
+        for (site, query), response in zip(self.search_matrix(sites), responses):
             try:
-                search_url = f"{site['base_url']}{site['search_path']}"
-                response = self.session.get(search_url, params=site['params'], timeout=10)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Common selectors for article links
-                    article_selectors = [
-                        'a[href*="ogetto"]', 'a[href*="ogeto"]',
-                        '.article-title a', '.headline a', '.story-title a',
-                        'h2 a', 'h3 a', '.entry-title a'
-                    ]
-                    
-                    for selector in article_selectors:
-                        links = soup.select(selector)
-                        for link in links[:3]:  # Limit per selector
-                            href = link.get('href', '')
-                            title = link.get_text().strip()
-                            
-                            if href and ('ogetto' in title.lower() or 'ogeto' in title.lower()):
-                                full_url = href if href.startswith('http') else f"{site['base_url']}{href}"
-                                all_articles.append({
-                                    'title': title,
-                                    'url': full_url,
-                                    'source': site['name'],
-                                    'date': datetime.now().strftime('%Y-%m-%d')
-                                })
-                
-                time.sleep(2)  # Be respectful
+                if response and response['status'] == 200:
+                    for link in find_article_links(response['content'], site['base_url'], article_selectors):
+                        all_articles.append({
+                            'title': link['title'],
+                            'url': link['url'],
+                            'source': site['name'],
+                            'date': datetime.now().strftime('%Y-%m-%d'),
+                            'query': query or site['params']['q']
+                        })
                 
             except Exception as e:
                 print(f"Error searching {site['name']}: {e}")
                 continue
         
-        return all_articles
+        # The same article often turns up for several queries; it is fetched once
+        return merge_results(all_articles)
     
     def extract_detailed_content(self, url, source_name):
         """Extract detailed content from article URLs"""
         try:
             response = self.session.get(url, timeout=15)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Extract title
-                title_selectors = ['h1', '.article-title', '.entry-title', '.headline', 'title']
-                title = "Unknown Title"
-                for selector in title_selectors:
-                    title_elem = soup.select_one(selector)
-                    if title_elem:
-                        title = title_elem.get_text().strip()
-                        break
-                
-                # Extract content
-                content_selectors = [
-                    '.article-content', '.entry-content', '.post-content',
-                    '.story-body', '.content', 'article', 'main'
-                ]
-                
-                content = ""
-                for selector in content_selectors:
-                    content_elem = soup.select_one(selector)
-                    if content_elem:
-                        # Remove script and style elements
-                        for script in content_elem(["script", "style"]):
-                            script.decompose()
-                        content = content_elem.get_text().strip()
-                        break
-                
-                # Extract date
-                date_selectors = ['.date', '.published', '.post-date', 'time']
-                article_date = datetime.now().strftime('%Y-%m-%d')
-                for selector in date_selectors:
-                    date_elem = soup.select_one(selector)
-                    if date_elem:
-                        date_text = date_elem.get_text().strip()
-                        # Try to parse the date
-                        parsed_date = self.parse_article_date(date_text)
-                        if parsed_date:
-                            article_date = parsed_date
-                        break
-                
-                # Clean up content
-                content = re.sub(r'\s+', ' ', content)
-                content = content[:3000]  # Limit content length
-                
-                return {
-                    'title': title,
-                    'content': content,
-                    'date': article_date,
-                    'url': url,
-                    'source': source_name
-                }
+                return self.parse_article(response.content, url, source_name)
             else:
                 return None
                 
@@ -185,27 +164,67 @@ class EnhancedOgettoScraper:
             print(f"Error extracting content from {url}: {e}")
             return None
     
+    def parse_article(self, html, url, source_name):
+        """Extract title, body text and date from an article page"""
+        return parse_article(html, url, source_name, self.date_extractor,
+                             content_extractor=self.content_extractor)
+    
     def parse_article_date(self, date_text):
         """Parse article date from various formats"""
-        # Common date patterns
-        patterns = [
-            r'(\d{4}-\d{2}-\d{2})',
-            r'(\d{1,2})/(\d{1,2})/(\d{4})',
-            r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',
-            r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})'
-        ]
+        return self.date_extractor.parse(date_text)
+    
+    async def fetch_sources(self, youtube_videos):
+        """Fetch video metadata, search pages and the articles they link to in one event loop
         
-        for pattern in patterns:
-            match = re.search(pattern, date_text, re.IGNORECASE)
-            if match:
-                if pattern == patterns[0]:  # YYYY-MM-DD
-                    return match.group(1)
-                elif pattern == patterns[1]:  # MM/DD/YYYY or DD/MM/YYYY
-                    month, day, year = match.groups()
-                    return f"{year}-{int(month):02d}-{int(day):02d}"
-                # Add more date parsing logic as needed
+        Videos and news sites live on different hosts, so they proceed side by side;
+        each host is throttled by its own token bucket rather than a global sleep.
+        The news feeds are polled alongside; their new items are extracted afterwards.
+        Returns (video_metadata, news_articles, article_responses, feed_items).
+        """
+        async with AsyncFetcher(**self.fetch_options) as fetcher:
+            self.feed_poller = FeedPoller(fetcher, self.crawl_state)
+            async def fetch_news():
+                news_articles, search_sites = [], KENYAN_SITES
+                if self.discovery == 'sitemap':
+                    news_articles, search_sites = await self.discover_from_sitemaps(fetcher)
+                search_responses = await fetcher.fetch_all(self.search_requests(search_sites))
+                # Only fetch article pages not extracted on an earlier run
+                news_articles += self.crawl_state.new_items(self.parse_search_responses(search_responses, search_sites))
+                article_responses = await fetcher.fetch_all([article['url'] for article in news_articles])
+                return news_articles, article_responses
+            
+            video_metadata, (news_articles, article_responses), feed_items = await asyncio.gather(
+                fetch_video_metadata(fetcher, [video['url'] for video in youtube_videos], self.youtube_api_key),
+                fetch_news(),
+                self.feed_poller.poll()
+            )
+        return video_metadata, news_articles, article_responses, feed_items
+    
+    def add_article(self, enhanced_content, article, detailed_content):
+        """Record an extracted article and keep it unless its text is empty or a near-duplicate"""
+        self.crawl_state.mark_seen(article['url'], article['source'])
+        # A page without a readable date is dated today, which says nothing about what is new
+        if detailed_content['date_parsed']:
+            self.crawl_state.advance(article['source'], detailed_content['date'])
+        if not detailed_content['content']:
+            return
+        # The same story is often syndicated across Nation, The Star and Business Daily
+        duplicate = self.near_duplicates.check_and_add(
+            detailed_content['url'], f"{detailed_content['title']} {detailed_content['content']}"
+        )
+        if duplicate:
+            print(f"Skipping near-duplicate of {duplicate['id']} "
+                  f"(similarity {duplicate['similarity']:.2f}): {detailed_content['url']}")
+            return
         
-        return None
+        enhanced_content.append({
+            'type': 'article',
+            'title': detailed_content['title'],
+            'content': detailed_content['content'],
+            'date': detailed_content['date'],
+            'url': detailed_content['url'],
+            'source': detailed_content['source']
+        })
     
     def create_comprehensive_content(self):
         """Create comprehensive content from all sources"""
@@ -220,52 +239,84 @@ class EnhancedOgettoScraper:
         
         enhanced_content = []
         
-        # Process YouTube videos
-        youtube_videos = [r for r in raw_results if r.get('source') == 'YouTube']
-        print(f"Processing {len(youtube_videos)} YouTube videos...")
-        
-        for video in youtube_videos:
-            metadata = self.extract_youtube_metadata(video['url'])
-            if metadata:
-                enhanced_content.append({
-                    'type': 'video',
-                    'title': metadata['title'],
-                    'content': f"YouTube video: {metadata['description']}. Views: {metadata['views']}",
-                    'date': metadata['upload_date'],
-                    'url': video['url'],
-                    'source': 'YouTube',
-                    'metadata': metadata
-                })
-                time.sleep(1)  # Rate limiting
+        youtube_videos = self.crawl_state.new_items([r for r in raw_results if r.get('source') == 'YouTube'])
+        print(f"Fetching {len(youtube_videos)} YouTube videos and searching Kenyan news sites...")
+        video_metadata, news_articles, article_responses, feed_items = asyncio.run(self.fetch_sources(youtube_videos))
         
-        # Search Kenyan news sites
-        print("Searching Kenyan news sites...")
-        news_articles = self.search_specific_kenyan_sites()
+        # Process YouTube videos
+        for video, metadata in zip(youtube_videos, video_metadata):
+            if not metadata:
+                continue
+            self.crawl_state.mark_seen(video['url'], 'YouTube')
+            if metadata['upload_date_parsed']:
+                self.crawl_state.advance('YouTube', metadata['upload_date'])
+            enhanced_content.append({
+                'type': 'video',
+                'title': metadata['title'],
+                'content': f"YouTube video: {metadata['description']}. Views: {metadata['views']}",
+                'date': metadata['upload_date'],
+                'url': video['url'],
+                'source': 'YouTube',
+                'metadata': metadata
+            })
         
         # Extract detailed content from news articles
-        for article in news_articles:
-            detailed_content = self.extract_detailed_content(article['url'], article['source'])
-            if detailed_content and detailed_content['content']:
-                enhanced_content.append({
-                    'type': 'article',
-                    'title': detailed_content['title'],
-                    'content': detailed_content['content'],
-                    'date': detailed_content['date'],
-                    'url': detailed_content['url'],
-                    'source': detailed_content['source']
-                })
-                time.sleep(2)  # Rate limiting
+        for article, response in zip(news_articles, article_responses):
+            if not response or response['status'] != 200:
+                continue
+            try:
+                detailed_content = self.parse_article(response['content'], article['url'], article['source'])
+            except Exception as e:
+                print(f"Error extracting content from {article['url']}: {e}")
+                continue
+            self.add_article(enhanced_content, article, detailed_content)
         
+        # New feed items not already found through sitemaps or search
+        for item in feed_items:
+            if self.crawl_state.is_seen(item['url']):
+                continue
+            detailed_content = self.extract_detailed_content(item['url'], item['source'])
+            if detailed_content is None:
+                self.failed_feeds.add(item['source'])
+                continue
+            self.add_article(enhanced_content, item, detailed_content)
+        print(f"Polled news feeds: {len(feed_items)} new items, {self.feed_poller.bytes_read} bytes read")
+        
+        self.session.breakers.save()
+        self.content_extractor.save()
         return enhanced_content
     
+    def save_published_state(self):
+        """Save the state that must only include written content, once the results are queued
+
+        Seen URLs, high-water marks and indexed items saved before the write
+        would make a failed run skip its articles on the next one. The queued
+        results stay in their pending files until integration publishes them.
+        """
+        if self.sitemap_discovery:
+            self.sitemap_discovery.save()
+        if self.feed_poller:
+            # A feed with an item that could not be extracted is read in full again next run
+            self.feed_poller.save(failed=self.failed_feeds)
+        self.crawl_state.save()
+        self.near_duplicates.save()
+    
     def generate_quality_blog_posts(self, enhanced_content):
         """Generate high-quality blog posts from enhanced content"""
         blog_posts = []
         
         for item in enhanced_content:
             if len(item['content']) > 100:  # Only process substantial content
-                # Determine category based on content
-                category = self.determine_category(item['title'], item['content'])
+                # Unchanged text since the last run: reuse the post generated then
+                fingerprint = content_fingerprint(item['title'], item['content'])
+                derived = self.derived_content.get(item['url'], fingerprint)
+                if derived is not None:
+                    blog_posts.append(derived['blog_post'])
+                    continue
+                
+                # Classify category, significance and implications in one pass
+                labels = self.classifier.classify(item['content'], item['title'])
+                category = labels['article_category']
                 
                 blog_post = self.blog_generator.generate_blog_post(
                     title=item['title'],
@@ -282,62 +333,25 @@ class EnhancedOgettoScraper:
                 )
                 
                 # Enhance the blog post with better metadata
-                blog_post['metadata']['significance'] = self.determine_significance(item['content'])
-                blog_post['metadata']['legal_implications'] = self.extract_legal_implications(item['content'])
+                blog_post['metadata']['significance'] = labels['article_significance']
+                blog_post['metadata']['legal_implications'] = labels['legal_implications']
                 
+                self.derived_content.put(item['url'], fingerprint, {'blog_post': blog_post})
                 blog_posts.append(blog_post)
         
         return blog_posts
     
     def determine_category(self, title, content):
         """Determine the most appropriate category"""
-        text = (title + ' ' + content).lower()
-        
-        if any(term in text for term in ['solicitor general', 'appointment', 'sworn', 'swearing']):
-            return 'Government Appointments'
-        elif any(term in text for term in ['nms', 'legality', 'constitutional']):
-            return 'Constitutional Law'
-        elif any(term in text for term in ['election', 'petition', 'supreme court']):
-            return 'Election Law'
-        elif any(term in text for term in ['icc', 'international court', 'tribunal']):
-            return 'International Criminal Law'
-        else:
-            return 'General Legal'
+        return self.classifier.classify(content, title)['article_category']
     
     def determine_significance(self, content):
         """Determine significance based on content analysis"""
-        content_lower = content.lower()
-        
-        high_significance_terms = [
-            'solicitor general', 'supreme court', 'president', 'constitutional',
-            'landmark', 'historic', 'unprecedented'
-        ]
-        
-        medium_significance_terms = [
-            'high court', 'court of appeal', 'government', 'legal', 'case'
-        ]
-        
-        if any(term in content_lower for term in high_significance_terms):
-            return 'High - Significant legal or government matter'
-        elif any(term in content_lower for term in medium_significance_terms):
-            return 'Medium - Important legal proceeding'
-        else:
-            return 'Standard - Regular legal activity'
+        return self.classifier.classify(content)['article_significance']
     
     def extract_legal_implications(self, content):
         """Extract legal implications from content"""
-        content_lower = content.lower()
-        
-        if 'constitutional' in content_lower:
-            return 'Constitutional law implications for Kenya\'s legal framework'
-        elif 'solicitor general' in content_lower:
-            return 'Government legal representation and policy implications'
-        elif 'election' in content_lower:
-            return 'Electoral law and democratic process implications'
-        elif 'international' in content_lower:
-            return 'International law and Kenya\'s global legal standing'
-        else:
-            return 'General legal practice and professional development'
+        return self.classifier.classify(content)['legal_implications']
 
 if __name__ == "__main__":
     scraper = EnhancedOgettoScraper()
@@ -348,12 +362,10 @@ if __name__ == "__main__":
     # Generate quality blog posts
     blog_posts = scraper.generate_quality_blog_posts(enhanced_content)
     
-    # Save enhanced results
-    with open('data/processed/enhanced_content.json', 'w', encoding='utf-8') as f:
-        json.dump(enhanced_content, f, indent=2, ensure_ascii=False)
-    
-    with open('data/processed/quality_blog_posts.json', 'w', encoding='utf-8') as f:
-        json.dump(blog_posts, f, indent=2, ensure_ascii=False)
+    # Queue the results for integration, keeping any an earlier run's integration did not publish
+    append_pending('data/processed/enhanced_content.json', enhanced_content)
+    append_pending('data/processed/quality_blog_posts.json', blog_posts)
+    scraper.save_published_state()
     
     print(f"\nGenerated {len(blog_posts)} quality blog posts from {len(enhanced_content)} sources")
     
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Feed Poller
+Polls the news sites' RSS and Atom feeds with conditional GETs, so an
+unchanged feed costs a 304, and parses each changed feed as it streams
+in. Feeds list the newest items first, so reading stops at the first
+item already extracted or no newer than the last poll, and the rest of
+the body is never downloaded. A feed with an item that could not be
+extracted is read in full on the next poll, past the items already
+extracted, until every item up to its mark has been.
+"""
+
+import asyncio
+import json
+import os
+from email.utils import parsedate_to_datetime
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from article_parser import NAME_KEYWORDS
+from sitemap_discovery import normalize_lastmod
+
+DEFAULT_VALIDATORS_PATH = 'data/processed/feed-validators.json'
+CHUNK_SIZE = 4 * 1024
+
+NEWS_FEEDS = [
+    {'name': 'Daily Nation', 'url': 'https://nation.africa/kenya/rss.xml'},
+    {'name': 'The Standard', 'url': 'https://www.standardmedia.co.ke/rss/headlines.php'},
+    {'name': 'The Star', 'url': 'https://www.the-star.co.ke/rss'},
+    {'name': 'Capital FM', 'url': 'https://www.capitalfm.co.ke/news/feed/'},
+    {'name': 'KBC', 'url': 'https://www.kbc.co.ke/feed/'},
+    {'name': 'Citizen Digital', 'url': 'https://www.citizen.digital/rss'}
+]
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+RSS1_NS = '{http://purl.org/rss/1.0/}'
+DC_DATE_TAG = '{http://purl.org/dc/elements/1.1/}date'
+ITEM_NAMES = ('item', 'entry')
+# Later names only fill in when the earlier ones are missing
+DATE_NAMES = ('pubDate', 'published', 'updated', 'date')
+
+
+def feed_name(tag):
+    """Local name of an RSS 2.0, RSS 1.0 or Atom element, or None for extensions such as media:title"""
+    if tag == DC_DATE_TAG:
+        return 'date'
+    for namespace in (ATOM_NS, RSS1_NS):
+        if tag.startswith(namespace):
+            return tag[len(namespace):]
+    return None if tag.startswith('{') else tag
+
+
+def feed_timestamp(value):
+    """An RSS (RFC 822) or Atom (RFC 3339) date as a UTC 'YYYY-MM-DDTHH:MM:SSZ' string, or None"""
+    if not value:
+        return None
+    try:
+        return normalize_lastmod(parsedate_to_datetime(value.strip()).isoformat())
+    except (TypeError, ValueError, IndexError):
+        return normalize_lastmod(value)
+
+
+class FeedStream:
+    """Incremental RSS / Atom parser fed raw chunks
+
+    Each item is handed to on_item({'title', 'url', 'guid', 'published'})
+    as soon as it ends; on_item returns True to stop reading.
+    """
+
+    def __init__(self, on_item):
+        self.on_item = on_item
+        self.parser = XMLPullParser(events=('start', 'end'))
+        self.fields = None
+        self.stopped = False
+        self.failed = False
+
+    def feed(self, chunk):
+        """Parse one chunk; returns True once the body should be dropped"""
+        try:
+            self.parser.feed(chunk)
+            for event, element in self.parser.read_events():
+                self.handle(event, element)
+                if self.stopped:
+                    break
+        except ParseError:
+            self.failed = self.stopped = True
+        return self.stopped
+
+    def handle(self, event, element):
+        name = feed_name(element.tag)
+        if event == 'start':
+            if name in ITEM_NAMES:
+                self.fields = {}
+            return
+        if self.fields is None:
+            # Channel-level elements, before the first item
+            return
+        if name in ITEM_NAMES:
+            item = self.item()
+            self.fields = None
+            element.clear()
+            if item and self.on_item(item):
+                self.stopped = True
+        elif name == 'link':
+            # Atom links carry the URL in href; only the alternate one is the article
+            if element.get('href') is not None:
+                if element.get('rel', 'alternate') == 'alternate':
+                    self.fields.setdefault('link', element.get('href').strip())
+            elif element.text:
+                self.fields.setdefault('link', element.text.strip())
+        elif name in ('title', 'guid', 'id') or name in DATE_NAMES:
+            self.fields.setdefault(name, (element.text or '').strip())
+
+    def item(self):
+        fields = self.fields
+        url = fields.get('link') or (fields.get('guid') if (fields.get('guid') or '').startswith('http') else None)
+        if not url:
+            return None
+        published = None
+        for name in DATE_NAMES:
+            published = published or feed_timestamp(fields.get(name))
+        return {
+            'title': fields.get('title') or url,
+            'url': url,
+            'guid': fields.get('guid') or fields.get('id') or url,
+            'published': published
+        }
+
+
+class FeedValidators:
+    """ETag / Last-Modified of each feed's last full response, and the feeds to retry, saved between runs"""
+
+    def __init__(self, path=DEFAULT_VALIDATORS_PATH, validators=None):
+        self.path = path
+        self.validators = validators or {}
+
+    @classmethod
+    def load(cls, path=DEFAULT_VALIDATORS_PATH):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(path, json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls(path)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.validators, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def conditional_headers(self, url):
+        saved = self.validators.get(url, {})
+        headers = {}
+        if saved.get('retry'):
+            # An unchanged feed would answer 304 and hide the items still to extract
+            return headers
+        if saved.get('etag'):
+            headers['If-None-Match'] = saved['etag']
+        if saved.get('last_modified'):
+            headers['If-Modified-Since'] = saved['last_modified']
+        return headers
+
+    def update(self, url, validators):
+        if validators:
+            self.validators[url] = validators
+        else:
+            self.validators.pop(url, None)
+
+    def needs_retry(self, url):
+        return bool(self.validators.get(url, {}).get('retry'))
+
+    def retry(self, url):
+        """Flag a feed whose items were not all extracted; the next update() clears it"""
+        self.validators.setdefault(url, {})['retry'] = True
+
+
+class FeedPoller:
+    def __init__(self, fetcher, crawl_state, feeds=None, keywords=NAME_KEYWORDS, validators=None):
+        """
+        fetcher: an open fetch_engine.AsyncFetcher
+        crawl_state: crawl_state.CrawlState with the extracted URLs and each feed's high-water mark
+        feeds: [{'name', 'url'}], NEWS_FEEDS by default
+        keywords: lowercase words one of which an item's URL or title must contain
+        """
+        self.fetcher = fetcher
+        self.crawl_state = crawl_state
+        self.feeds = NEWS_FEEDS if feeds is None else feeds
+        self.keywords = keywords
+        self.validators = validators or FeedValidators.load()
+        # Per feed name: (mark source, newest item, new validators), kept until save()
+        self.pending = {}
+        self.bytes_read = 0
+
+    def matches(self, item):
+        text = f"{item['url']} {item['title']}".lower()
+        return any(keyword in text for keyword in self.keywords)
+
+    async def poll_feed(self, feed):
+        """New matching items in one feed, newest first: [{'title', 'url', 'source', 'date', 'published'}]"""
+        mark_source = f"feed:{feed['name']}"
+        since = self.crawl_state.high_water(mark_source)
+        # After a failed extraction an already extracted item may sit above one still to extract
+        retry = self.validators.needs_retry(feed['url'])
+        items = []
+        state = {'newest': since, 'validators': None}
+
+        def on_item(item):
+            if self.crawl_state.is_known(mark_source, item['published']):
+                return True
+            if item['published'] and (state['newest'] is None or item['published'] > state['newest']):
+                state['newest'] = item['published']
+            if self.crawl_state.is_seen(item['url']):
+                return not retry
+            if self.matches(item):
+                items.append({
+                    'title': item['title'],
+                    'url': item['url'],
+                    'source': feed['name'],
+                    'date': item['published'][:10] if item['published'] else None,
+                    'published': item['published']
+                })
+            return False
+
+        def on_headers(headers):
+            state['validators'] = {
+                key: headers[name] for key, name in (('etag', 'ETag'), ('last_modified', 'Last-Modified'))
+                if headers.get(name)
+            }
+
+        stream = FeedStream(on_item)
+
+        def on_chunk(chunk):
+            self.bytes_read += len(chunk)
+            return stream.feed(chunk)
+
+        status = await self.fetcher.stream(feed['url'], on_chunk, chunk_size=CHUNK_SIZE, on_headers=on_headers,
+                                           headers=self.validators.conditional_headers(feed['url']))
+        if status == 304:
+            return []
+        if status != 200 or stream.failed:
+            print(f"Could not poll {feed['name']} feed: {'malformed feed' if status == 200 else status}")
+            return []
+        self.pending[feed['name']] = (mark_source, state['newest'], state['validators'])
+        return items
+
+    async def poll(self):
+        """New matching items across every feed"""
+        items = []
+        for feed_items in await asyncio.gather(*(self.poll_feed(feed) for feed in self.feeds)):
+            items.extend(feed_items)
+        return items
+
+    def save(self, failed=()):
+        """Record each polled feed's newest item and validators once its items are extracted
+
+        failed: feed names whose items were not all extracted; they are polled in full again next run
+        """
+        for feed in self.feeds:
+            if feed['name'] in failed:
+                self.validators.retry(feed['url'])
+                continue
+            if feed['name'] not in self.pending:
+                continue
+            mark_source, newest, validators = self.pending[feed['name']]
+            self.crawl_state.advance(mark_source, newest)
+            self.validators.update(feed['url'], validators)
+        self.pending = {}
+        self.validators.save()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Async Fetch Engine
+Fetches many URLs concurrently under a global concurrency cap, with a
+token bucket per host so politeness is enforced per domain instead of
+by sleeping the whole process. Failing hosts are retried with backoff
+and then cut off by their circuit breaker, and nothing is sent once the
+run's deadline has passed.
+"""
+
+import asyncio
+
+import aiohttp
+
+from http_cache import cache_url, decode_body
+from http_replay import configured_replay_server, recorded_url, replay_url
+from resilience import Deadline, HostBreakers, backoff_delay, host_of
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+def cached_result(entry):
+    return {
+        'url': entry['url'],
+        'status': entry['status'],
+        'content': entry['body'],
+        'text': decode_body(entry['headers'], entry['body']),
+        'from_cache': True
+    }
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = None
+        self.lock = asyncio.Lock()
+
+    def refill(self, now):
+        if self.updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it; waiters are served in arrival order"""
+        loop = asyncio.get_running_loop()
+        async with self.lock:
+            self.refill(loop.time())
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.refill(loop.time())
+            self.tokens -= 1
+
+
+class AsyncFetcher:
+    def __init__(self, concurrency=8, host_rate=0.5, host_burst=1, host_rates=None,
+                 timeout=15, headers=None, cache=None, breakers=None, deadline=None, retries=2,
+                 replay_server=None):
+        """
+        concurrency: requests in flight across all hosts
+        host_rate: requests per second allowed per host (0.5 = one every two seconds)
+        host_rates: per-host overrides of host_rate, keyed by netloc
+        cache: optional http_cache.HttpCache shared with the other scrapers
+        breakers: resilience.HostBreakers shared with the other scrapers
+        deadline: resilience.Deadline for the run, read from the environment by default
+        retries: extra attempts after a network error, timeout, 429 or 5xx
+        replay_server: http_replay server to send requests to instead of the live sites,
+                       read from SCRAPE_REPLAY_SERVER by default
+        """
+        self.concurrency = concurrency
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.host_rates = host_rates or {}
+        self.timeout = timeout
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self.cache = cache
+        self.breakers = breakers or HostBreakers.load()
+        self.deadline = deadline or Deadline.from_env()
+        self.retries = retries
+        self.replay_server = replay_server or configured_replay_server()
+        self.buckets = {}
+        self.semaphore = None
+        self.session = None
+
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.session = aiohttp.ClientSession(headers=self.headers)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.session:
+            await self.session.close()
+
+    def bucket_for(self, url):
+        host = host_of(url)
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.host_rates.get(host, self.host_rate), self.host_burst)
+        return self.buckets[host]
+
+    def request_url(self, url):
+        """Where a request for url is sent; buckets, breakers and the cache keep using url itself"""
+        return replay_url(self.replay_server, url) if self.replay_server else url
+
+    def response_url(self, response):
+        url = str(response.url)
+        return recorded_url(self.replay_server, url) if self.replay_server else url
+
+    def may_send(self, url, breaker):
+        """Whether a request may go out now, saying why not when it may not"""
+        if self.deadline.expired():
+            print(f"Skipping {url}: run deadline passed")
+            return False
+        if not breaker.allow():
+            print(f"Skipping {url}: circuit open for {host_of(url)}")
+            return False
+        return True
+
+    async def backoff(self, attempt):
+        await asyncio.sleep(min(backoff_delay(attempt), self.deadline.remaining()))
+
+    async def fetch(self, url, params=None, timeout=None, headers=None):
+        """Fetch one URL; returns {'url', 'status', 'content', 'text', 'from_cache'} or None on a network error"""
+        key = cache_url(url, params)
+        entry = self.cache.lookup(key, self.headers) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            return cached_result(entry)
+
+        breaker = self.breakers.for_url(url)
+        result = None
+        for attempt in range(self.retries + 1):
+            if not self.may_send(url, breaker):
+                return result
+            result = await self.send(url, key, entry, params, timeout, headers)
+            if result is None and self.deadline.expired():
+                # Cut off by the deadline rather than failed by the host
+                return None
+            if result is None:
+                breaker.record_failure()
+            elif not breaker.record_response(result['status']):
+                return result
+            if attempt < self.retries:
+                await self.backoff(attempt)
+        return result
+
+    async def send(self, url, key, entry, params, timeout, headers):
+        # Wait for the host's token before taking a global slot, so a slow
+        # host's queue never blocks requests to other hosts
+        await self.bucket_for(url).acquire()
+        async with self.semaphore:
+            # The deadline may have passed while this request waited its turn
+            if self.deadline.expired():
+                print(f"Skipping {url}: run deadline passed")
+                return None
+            try:
+                request_timeout = aiohttp.ClientTimeout(total=self.deadline.timeout(timeout or self.timeout))
+                request_headers = dict(headers or {}, **(self.cache.conditional_headers(entry) if entry else {}))
+                async with self.session.get(self.request_url(url), params=params, headers=request_headers,
+                                            timeout=request_timeout) as response:
+                    content = await response.read()
+                    if entry and response.status == 304:
+                        self.cache.refresh(entry, response.headers)
+                        return cached_result(entry)
+                    if self.cache:
+                        self.cache.store(key, self.headers, response.status, response.headers, content)
+                    return {
+                        'url': self.response_url(response),
+                        'status': response.status,
+                        'content': content,
+                        'text': content.decode(response.get_encoding(), errors='replace'),
+                        'from_cache': False
+                    }
+            except (aiohttp.ClientError, asyncio.TimeoutError, LookupError) as e:
+                print(f"Error fetching {url}: {e}")
+                return None
+
+    async def stream(self, url, on_chunk, params=None, timeout=None, chunk_size=16 * 1024,
+                     headers=None, on_headers=None):
+        """Feed the body to on_chunk(bytes) until it returns True, then drop the connection
+
+        Returns the status, or None on a network error. A fresh cached copy is
+        fed in one piece; partial bodies are never cached. Once any of the
+        body has been fed the request is not retried, since on_chunk has
+        already consumed it. headers are sent with the request (conditional
+        GETs answered 304 feed nothing), and on_headers, if given, receives
+        the response headers of every response from the network.
+        """
+        entry = self.cache.lookup(cache_url(url, params), self.headers) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            on_chunk(entry['body'])
+            return entry['status']
+
+        breaker = self.breakers.for_url(url)
+        status = None
+        for attempt in range(self.retries + 1):
+            if not self.may_send(url, breaker):
+                return status
+            fed = False
+            await self.bucket_for(url).acquire()
+            async with self.semaphore:
+                if self.deadline.expired():
+                    print(f"Skipping {url}: run deadline passed")
+                    return status
+                try:
+                    request_timeout = aiohttp.ClientTimeout(total=self.deadline.timeout(timeout or self.timeout))
+                    async with self.session.get(self.request_url(url), params=params, headers=headers,
+                                                timeout=request_timeout) as response:
+                        status = response.status
+                        if on_headers:
+                            on_headers(response.headers)
+                        if status == 200:
+                            async for chunk in response.content.iter_chunked(chunk_size):
+                                fed = True
+                                if on_chunk(chunk):
+                                    # Close instead of releasing so the rest of the body is never read
+                                    response.close()
+                                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    print(f"Error fetching {url}: {e}")
+                    status = None
+            if status is None and self.deadline.expired():
+                return None
+            if status is None:
+                breaker.record_failure()
+                if fed:
+                    return None
+            elif not breaker.record_response(status):
+                return status
+            if attempt < self.retries:
+                await self.backoff(attempt)
+        return status
+
+    async def fetch_all(self, requests):
+        """Fetch (url, params) pairs or plain URLs concurrently; results keep the input order"""
+        tasks = []
+        for request in requests:
+            url, params = (request, None) if isinstance(request, str) else request
+            tasks.append(self.fetch(url, params=params))
+        return await asyncio.gather(*tasks)
+
+
+def fetch_many(requests, **options):
+    """Blocking helper for synchronous callers: fetch everything in one event loop"""
+    async def run():
+        async with AsyncFetcher(**options) as fetcher:
+            return await fetcher.fetch_all(requests)
+
+    return asyncio.run(run())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+HTML Parsing Backends
+One small document interface (select, select_one, text, get, name,
+classes, remove) over BeautifulSoup with lxml or html.parser, and
+optionally selectolax. When the caller passes the selectors it will
+query, BeautifulSoup only builds the subtrees those selectors can match.
+"""
+
+import os
+import re
+
+import bs4
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401  (only needed as a BeautifulSoup tree builder)
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+BACKENDS = ('lxml', 'html.parser', 'selectolax')
+DEFAULT_BACKEND = os.getenv('HTML_PARSER', 'lxml')
+
+COMPOUND_PATTERN = re.compile(r'^([\w-]+|\*)?((?:[.#][\w-]+|\[[^\]]+\])*)')
+
+
+def available_backends():
+    """Backends whose libraries are installed"""
+    backends = ['html.parser']
+    if HAS_LXML:
+        backends.insert(0, 'lxml')
+    if SelectolaxParser is not None:
+        backends.append('selectolax')
+    return backends
+
+
+def resolve_backend(backend=None):
+    """The requested backend, falling back to html.parser when its library is missing"""
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {backend}")
+    return backend if backend in available_backends() else 'html.parser'
+
+
+def subtree_rule(selector):
+    """(tag, classes, ids, attributes) of the outermost compound of a descendant selector
+
+    Keeping every element that matches this compound, with its whole subtree,
+    keeps everything the full selector can match.
+    """
+    outermost = re.split(r'\s*[\s>+~]\s*', selector.strip())[0]
+    match = COMPOUND_PATTERN.match(outermost)
+    tag = match.group(1) if match.group(1) != '*' else None
+    parts = match.group(2)
+    classes = set(re.findall(r'\.([\w-]+)', parts))
+    ids = set(re.findall(r'#([\w-]+)', parts))
+    attributes = set(re.findall(r'\[\s*([\w-]+)', parts))
+    return tag, classes, ids, attributes
+
+
+def matches_rules(rules, name, attrs):
+    attrs = attrs or {}
+    class_value = attrs.get('class', '')
+    classes = set(class_value.split() if isinstance(class_value, str) else class_value)
+    for tag, rule_classes, ids, attributes in rules:
+        if tag and tag != name:
+            continue
+        if rule_classes - classes or (ids and attrs.get('id') not in ids):
+            continue
+        if any(attribute not in attrs for attribute in attributes):
+            continue
+        return True
+    return False
+
+
+if hasattr(bs4, 'ElementFilter'):
+    # beautifulsoup4 >= 4.13: filters decide on each top-level tag as it is created
+    class SubtreeFilter(bs4.ElementFilter):
+        def __init__(self, rules):
+            super().__init__()
+            self.rules = rules
+
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            return matches_rules(self.rules, name, attrs)
+
+        def allow_string_creation(self, string):
+            return False
+
+    def subtree_strainer(selectors):
+        return SubtreeFilter([subtree_rule(selector) for selector in selectors])
+else:
+    def subtree_strainer(selectors):
+        # Older releases call a function name filter with the raw tag name and attributes
+        rules = [subtree_rule(selector) for selector in selectors]
+        return bs4.SoupStrainer(lambda name, attrs=None: matches_rules(rules, name, attrs))
+
+
+class SoupNode:
+    def __init__(self, tag):
+        self.tag = tag
+
+    def select(self, selector):
+        return [SoupNode(tag) for tag in self.tag.select(selector)]
+
+    def select_one(self, selector):
+        tag = self.tag.select_one(selector)
+        return SoupNode(tag) if tag is not None else None
+
+    def text(self):
+        return self.tag.get_text()
+
+    def get(self, name, default=None):
+        return self.tag.get(name, default)
+
+    def name(self):
+        return self.tag.name
+
+    def classes(self):
+        value = self.tag.get('class') or []
+        return value.split() if isinstance(value, str) else list(value)
+
+    def remove(self, *names):
+        """Drop descendant elements such as script and style"""
+        for tag in self.tag(list(names)):
+            tag.decompose()
+
+
+class SelectolaxNode:
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, selector):
+        return [SelectolaxNode(node) for node in self.node.css(selector)]
+
+    def select_one(self, selector):
+        node = self.node.css_first(selector)
+        return SelectolaxNode(node) if node is not None else None
+
+    def text(self):
+        return self.node.text(deep=True)
+
+    def get(self, name, default=None):
+        value = self.node.attributes.get(name, default)
+        return default if value is None else value
+
+    def name(self):
+        return self.node.tag
+
+    def classes(self):
+        return (self.node.attributes.get('class') or '').split()
+
+    def remove(self, *names):
+        for node in self.node.css(', '.join(names)):
+            node.decompose()
+
+
+def parse_html(html, selectors=None, backend=None):
+    """Parse a page into a document node
+
+    selectors: the CSS selectors the caller will query. With a BeautifulSoup
+    backend only the subtrees they can match are built; selectolax parses
+    the whole page either way. Only descendant selectors are supported in
+    this mode, since elements outside the kept subtrees are discarded.
+    """
+    backend = resolve_backend(backend)
+    if backend == 'selectolax':
+        return SelectolaxNode(SelectolaxParser(html))
+    parse_only = subtree_strainer(selectors) if selectors else None
+    return SoupNode(BeautifulSoup(html, backend, parse_only=parse_only))
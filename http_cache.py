@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Cache
+Stores GET responses on disk keyed by URL and Vary headers so every
+scraper (and every scraper process) can reuse them. Fresh entries are
+served without a request; stale ones are revalidated with ETag /
+Last-Modified conditional GETs, so an unchanged page costs a 304.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from http_replay import configured_replay_server, recorded_url, replay_url
+
+DEFAULT_CACHE_PATH = 'data/cache/http-cache.sqlite3'
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Freshness lifetime in seconds per source, matched as the longest prefix of
+# "host/path". Search pages change often; articles and videos rarely do.
+SOURCE_TTLS = {
+    'news.google.com': 30 * 60,
+    'nation.co.ke/search': 60 * 60,
+    'nation.co.ke': 7 * 24 * 3600,
+    'www.the-star.co.ke/search': 60 * 60,
+    'www.the-star.co.ke': 7 * 24 * 3600,
+    'www.businessdailyafrica.com/search': 60 * 60,
+    'www.businessdailyafrica.com': 7 * 24 * 3600,
+    'www.youtube.com': 24 * 3600,
+    'kenyalaw.org': 24 * 3600,
+    'www.icc-cpi.int': 24 * 3600
+}
+
+
+def cache_url(url, params=None):
+    """The URL a request with these params will hit, used as the cache key"""
+    if not params:
+        return url
+    return f"{url}{'&' if '?' in url else '?'}{urlencode(params, doseq=True)}"
+
+
+def decode_body(headers, body):
+    """Decode a body using the charset from its Content-Type, defaulting to UTF-8"""
+    match = re.search(r'charset=([\w.:-]+)', CaseInsensitiveDict(headers).get('Content-Type', ''))
+    try:
+        return body.decode(match.group(1) if match else 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+class HttpCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, default_ttl=DEFAULT_TTL, ttls=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = SOURCE_TTLS if ttls is None else ttls
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Scrapers run as separate processes against the same file
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT NOT NULL,
+                vary_key TEXT NOT NULL,
+                vary TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (url, vary_key)
+            );
+            CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+        """)
+
+    def close(self):
+        self.connection.close()
+
+    def ttl_for(self, url):
+        """Per-source TTL for a URL, falling back to the default"""
+        parts = urlsplit(url)
+        target = f"{parts.netloc.lower()}{parts.path}"
+        best = None
+        for prefix in self.ttls:
+            if target.startswith(prefix) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return self.ttls[best] if best else self.default_ttl
+
+    def vary_key(self, vary, request_headers):
+        """Values of the Vary request headers, so variants of one URL get separate entries"""
+        headers = CaseInsensitiveDict(request_headers or {})
+        return json.dumps([headers.get(name, '') for name in vary])
+
+    def lookup(self, url, request_headers=None):
+        """Return the stored entry matching this request, or None"""
+        rows = self.connection.execute(
+            'SELECT vary_key, vary, status, headers, body, stored_at FROM responses WHERE url = ?', (url,)
+        ).fetchall()
+        for vary_key, vary, status, headers, body, stored_at in rows:
+            vary = json.loads(vary)
+            if self.vary_key(vary, request_headers) == vary_key:
+                with self.connection:
+                    self.connection.execute(
+                        'UPDATE responses SET accessed_at = ? WHERE url = ? AND vary_key = ?',
+                        (time.time(), url, vary_key)
+                    )
+                return {
+                    'url': url,
+                    'vary_key': vary_key,
+                    'status': status,
+                    'headers': json.loads(headers),
+                    'body': body,
+                    'stored_at': stored_at
+                }
+        return None
+
+    def is_fresh(self, entry):
+        return time.time() - entry['stored_at'] < self.ttl_for(entry['url'])
+
+    def conditional_headers(self, entry):
+        """If-None-Match / If-Modified-Since headers to revalidate a stale entry"""
+        headers = CaseInsensitiveDict(entry['headers'])
+        conditional = {}
+        if headers.get('ETag'):
+            conditional['If-None-Match'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            conditional['If-Modified-Since'] = headers['Last-Modified']
+        return conditional
+
+    def store(self, url, request_headers, status, headers, body):
+        """Store a 200 response unless the server forbids it; returns whether it was stored"""
+        headers = CaseInsensitiveDict(headers)
+        vary = [name.strip() for name in headers.get('Vary', '').split(',') if name.strip()]
+        if status != 200 or 'no-store' in headers.get('Cache-Control', '') or '*' in vary:
+            return False
+
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(url, vary_key, vary, status, headers, body, size, stored_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, self.vary_key(vary, request_headers), json.dumps(vary), status,
+                 json.dumps(dict(headers)), body, len(body), now, now)
+            )
+        self.evict()
+        return True
+
+    def refresh(self, entry, headers=None):
+        """Mark an entry fresh again after a 304, taking any updated validators"""
+        merged = CaseInsensitiveDict(entry['headers'])
+        merged.update(headers or {})
+        entry['headers'] = dict(merged)
+        entry['stored_at'] = time.time()
+        with self.connection:
+            self.connection.execute(
+                'UPDATE responses SET headers = ?, stored_at = ?, accessed_at = ? WHERE url = ? AND vary_key = ?',
+                (json.dumps(entry['headers']), entry['stored_at'], entry['stored_at'], entry['url'], entry['vary_key'])
+            )
+
+    def total_size(self):
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        excess = self.total_size() - self.max_bytes
+        if excess <= 0:
+            return
+        rows = self.connection.execute(
+            'SELECT url, vary_key, size FROM responses ORDER BY accessed_at'
+        ).fetchall()
+        with self.connection:
+            for url, vary_key, size in rows:
+                if excess <= 0:
+                    break
+                self.connection.execute('DELETE FROM responses WHERE url = ? AND vary_key = ?', (url, vary_key))
+                excess -= size
+
+
+class CachedSession(requests.Session):
+    """requests.Session whose GETs go through an HttpCache"""
+
+    def __init__(self, cache=None):
+        super().__init__()
+        self.cache = cache or HttpCache()
+        # Requests go to a local record/replay server instead of the live sites when one is configured
+        self.replay_server = configured_replay_server()
+
+    def get(self, url, params=None, **kwargs):
+        key = cache_url(url, params)
+        request_headers = dict(self.headers, **(kwargs.get('headers') or {}))
+        entry = self.cache.lookup(key, request_headers)
+        if entry and self.cache.is_fresh(entry):
+            return self.cached_response(entry)
+
+        if kwargs.get('stream'):
+            # Streamed bodies may be abandoned part way, so they are never stored
+            return self.network_get(url, params=params, **kwargs)
+
+        if entry:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **self.cache.conditional_headers(entry))
+        response = self.network_get(url, params=params, **kwargs)
+
+        if entry and response.status_code == 304:
+            self.cache.refresh(entry, response.headers)
+            return self.cached_response(entry)
+        self.cache.store(key, request_headers, response.status_code, response.headers, response.content)
+        response.from_cache = False
+        return response
+
+    def network_get(self, url, params=None, **kwargs):
+        """The request itself, for subclasses that wrap it (see resilience.ResilientSession)"""
+        if not self.replay_server:
+            return super().get(url, params=params, **kwargs)
+        response = super().get(replay_url(self.replay_server, url), params=params, **kwargs)
+        response.url = recorded_url(self.replay_server, response.url)
+        return response
+
+    def cached_response(self, entry):
+        """Rebuild a requests.Response from a cache entry"""
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['body']
+        response._content_consumed = True
+        response.url = entry['url']
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+        response.from_cache = True
+        return response
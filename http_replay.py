@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+HTTP Record / Replay
+A local stand-in for the sites the scrapers fetch. In record mode it
+forwards each request to the real site and stores the response (status,
+headers, body and how long it took) in a cassette; in replay mode it
+serves the cassette with optional latency and injected failures, so a
+scraper run can be timed and repeated offline.
+
+Scrapers are pointed at the server with SCRAPE_REPLAY_SERVER; every
+request then goes to <server>/<scheme>/<host>/<path>?<query> while the
+HTTP cache, host breakers and rate limits still see the original URL.
+Run a scraper from a scratch directory to start it with an empty cache
+and crawl state.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp import web
+
+REPLAY_ENV = 'SCRAPE_REPLAY_SERVER'
+DEFAULT_CASSETTE_PATH = 'data/cassettes/cassette.sqlite3'
+REPLAY_MODES = ('replay', 'record')
+STATS_PATH = '/_replay/stats'
+# Hop-by-hop and body-framing headers; stored bodies are already decoded
+UNREPLAYED_HEADERS = {
+    'connection', 'keep-alive', 'transfer-encoding', 'content-encoding', 'content-length',
+    'proxy-authenticate', 'proxy-authorization', 'te', 'trailer', 'upgrade'
+}
+# Never forwarded upstream while recording, so every recorded response is a full one
+UNFORWARDED_HEADERS = {'host', 'if-none-match', 'if-modified-since', 'accept-encoding', 'content-length'}
+
+
+def configured_replay_server():
+    """The replay server scrapers should send requests to, or None to go to the real sites"""
+    return os.getenv(REPLAY_ENV, '').strip().rstrip('/') or None
+
+
+def replay_url(server, url):
+    """The URL on the replay server that stands in for url"""
+    parts = urlsplit(url)
+    query = f"?{parts.query}" if parts.query else ''
+    return f"{server}/{parts.scheme}/{parts.netloc}{parts.path or '/'}{query}"
+
+
+def recorded_url(server, url):
+    """The original URL behind a replay server URL; other URLs are returned unchanged"""
+    prefix = f"{server}/"
+    if not url.startswith(prefix):
+        return url
+    scheme, _, rest = url[len(prefix):].partition('/')
+    return f"{scheme}://{rest}"
+
+
+class CassetteStore:
+    """Recorded responses, one per URL, in a SQLite file"""
+
+    def __init__(self, path=DEFAULT_CASSETTE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS interactions (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                elapsed REAL NOT NULL,
+                recorded_at REAL NOT NULL
+            );
+        """)
+
+    def close(self):
+        self.connection.close()
+
+    def count(self):
+        return self.connection.execute('SELECT COUNT(*) FROM interactions').fetchone()[0]
+
+    def get(self, url):
+        """{'url', 'status', 'headers' ([name, value] pairs), 'body', 'elapsed'} or None"""
+        row = self.connection.execute(
+            'SELECT status, headers, body, elapsed FROM interactions WHERE url = ?', (url,)
+        ).fetchone()
+        if not row:
+            return None
+        return {'url': url, 'status': row[0], 'headers': json.loads(row[1]), 'body': row[2], 'elapsed': row[3]}
+
+    def put(self, url, status, headers, body, elapsed):
+        """Store a response, replacing any earlier recording of the same URL"""
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO interactions (url, status, headers, body, elapsed, recorded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (url, status, json.dumps([[name, value] for name, value in headers]), body, elapsed, time.time())
+            )
+
+
+class ReplayServer:
+    def __init__(self, store, mode='replay', latency=0.0, jitter=0.0, timing_scale=0.0,
+                 error_rate=0.0, error_status=503, drop_rate=0.0, seed=None):
+        """
+        store: the CassetteStore recorded to or replayed from
+        mode: 'record' forwards every request to the real site and stores the response;
+              'replay' serves stored responses and answers 404 for anything not recorded
+        latency, jitter: seconds added to every replayed response, plus up to jitter more at random
+        timing_scale: also wait this multiple of the time the original response took (1.0 = as recorded)
+        error_rate: share of replayed requests answered with error_status instead
+        drop_rate: share of replayed requests whose connection is dropped without a response
+        seed: makes the injected latency and failures repeatable
+        """
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        self.store = store
+        self.mode = mode
+        self.latency = latency
+        self.jitter = jitter
+        self.timing_scale = timing_scale
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.upstream = None
+        self.stats = {'requests': 0, 'hits': 0, 'not_modified': 0, 'misses': 0, 'recorded': 0,
+                      'upstream_errors': 0, 'injected_errors': 0, 'dropped': 0, 'bytes_served': 0}
+        self.missed = []
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get(STATS_PATH, self.handle_stats)
+        app.router.add_route('GET', '/{target:.*}', self.handle)
+        app.on_startup.append(self.start)
+        app.on_cleanup.append(self.stop)
+        return app
+
+    async def start(self, app):
+        if self.mode == 'record':
+            self.upstream = aiohttp.ClientSession()
+
+    async def stop(self, app):
+        if self.upstream:
+            await self.upstream.close()
+        self.store.close()
+
+    def target_url(self, request):
+        # raw_path keeps the original percent-encoding of the path and query
+        scheme, _, rest = request.raw_path.lstrip('/').partition('/')
+        return f"{scheme}://{rest}" if scheme in ('http', 'https') and rest else None
+
+    async def handle_stats(self, request):
+        return web.json_response(dict(self.stats, cassette_size=self.store.count(), missed=self.missed[:50]))
+
+    async def handle(self, request):
+        url = self.target_url(request)
+        if url is None:
+            return web.Response(status=400, text="Expected /<scheme>/<host>/<path>")
+        self.stats['requests'] += 1
+        if self.mode == 'record':
+            return await self.record(request, url)
+        return await self.replay(request, url)
+
+    async def record(self, request, url):
+        headers = {name: value for name, value in request.headers.items()
+                   if name.lower() not in UNFORWARDED_HEADERS}
+        start = time.perf_counter()
+        try:
+            async with self.upstream.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=60)) as response:
+                body = await response.read()
+                status = response.status
+                response_headers = list(response.headers.items())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error recording {url}: {e}")
+            self.stats['upstream_errors'] += 1
+            return web.Response(status=502, text=str(e))
+        self.store.put(url, status, response_headers, body, time.perf_counter() - start)
+        self.stats['recorded'] += 1
+        return self.respond(status, response_headers, body, 'recorded')
+
+    async def replay(self, request, url):
+        interaction = self.store.get(url)
+        if interaction is None:
+            self.stats['misses'] += 1
+            self.missed.append(url)
+            return web.Response(status=404, text=f"Not recorded: {url}", headers={'X-Replay': 'miss'})
+
+        delay = self.latency + self.random.uniform(0, self.jitter) + self.timing_scale * interaction['elapsed']
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        roll = self.random.random()
+        if roll < self.drop_rate:
+            self.stats['dropped'] += 1
+            request.transport.abort()
+            return web.Response(status=499)
+        if roll < self.drop_rate + self.error_rate:
+            self.stats['injected_errors'] += 1
+            return web.Response(status=self.error_status, headers={'X-Replay': 'injected'})
+
+        headers = {name.lower(): value for name, value in interaction['headers']}
+        etag, last_modified = headers.get('etag'), headers.get('last-modified')
+        if interaction['status'] == 200 and (
+            (etag and request.headers.get('If-None-Match') == etag)
+            or (last_modified and request.headers.get('If-Modified-Since') == last_modified)
+        ):
+            self.stats['not_modified'] += 1
+            validators = [(name, value) for name, value in interaction['headers']
+                          if name.lower() in ('etag', 'last-modified')]
+            return self.respond(304, validators, b'', 'hit')
+
+        self.stats['hits'] += 1
+        return self.respond(interaction['status'], interaction['headers'], interaction['body'], 'hit')
+
+    def respond(self, status, headers, body, outcome):
+        response = web.Response(status=status, body=body)
+        for name, value in headers:
+            if name.lower() not in UNREPLAYED_HEADERS:
+                response.headers.add(name, value)
+        response.headers['X-Replay'] = outcome
+        self.stats['bytes_served'] += len(body)
+        return response
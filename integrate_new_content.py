@@ -7,6 +7,10 @@ Merges scraped content with existing JSON structure
 import json
 from datetime import datetime
 import os
+from case_index import rebuild_case_index
+from build_search_index import rebuild_search_index
+from crawl_state import clear_pending, load_pending
+from dedup_index import DedupKeyIndex, blog_post_key, title_key, load_blog_keys, load_timeline_keys
 
 class ContentIntegrator:
     def __init__(self):
@@ -14,6 +18,9 @@ class ContentIntegrator:
         self.existing_timeline_path = "kennedy-ogetto-cases-chronological.json"
         self.site_blog_path = "site/data/blog.json"
         self.site_timeline_path = "site/data/kennedy-ogetto-cases-chronological.json"
+        self.pending_posts_path = "data/processed/quality_blog_posts.json"
+        self.pending_content_path = "data/processed/enhanced_content.json"
+        self.key_index = DedupKeyIndex()
         
     def load_json(self, filepath):
         """Load JSON file safely"""
@@ -39,6 +46,11 @@ class ContentIntegrator:
         except Exception as e:
             print(f"Error saving {filepath}: {e}")
     
+    def clear_published(self):
+        """Empty the enhanced scraper's queue now that everything in it has been handled"""
+        clear_pending(self.pending_posts_path)
+        clear_pending(self.pending_content_path)
+    
     def enhance_scraped_content(self, scraped_posts):
         """Enhance scraped content with better information"""
         enhanced_posts = []
@@ -166,49 +178,77 @@ class ContentIntegrator:
         
         return timeline_entries
     
+    def save_with_keys(self, namespace, keys, data, filepath, site_path):
+        """Save JSON to both locations and record the new dedup keys atomically; returns True if saved"""
+        try:
+            self.key_index.record_write({namespace: keys}, data, filepath, extra_paths=(site_path,))
+            print(f"Successfully saved: {filepath}")
+            print(f"Successfully saved: {site_path}")
+            return True
+        except Exception as e:
+            print(f"Error saving {filepath}: {e}")
+            return False
+    
     def integrate_with_existing_blog(self, new_posts):
-        """Integrate new posts with existing blog structure"""
+        """Integrate new posts with existing blog structure; returns False if they could not be published"""
+        # Work out what is new from the key index, parsing blog.json only if it changed elsewhere.
+        # These posts are the fixed texts of enhance_scraped_content, so a revisited page whose
+        # post_id is already published has nothing to replace; main-scraper replaces revised ones.
+        self.key_index.sync('blog_post_id', self.existing_blog_path,
+                            lambda: load_blog_keys(self.existing_blog_path))
+        new_unique_posts = self.key_index.filter_new('blog_post_id', self.existing_blog_path,
+                                                     new_posts, blog_post_key)
+        
+        if not new_unique_posts:
+            print("No new unique posts to add")
+            return True
+        
         # Load existing blog data
         existing_blog = self.load_json(self.existing_blog_path)
         
         if not existing_blog or 'blog' not in existing_blog:
             print("No existing blog structure found")
-            return
+            return False
         
         existing_posts = existing_blog['blog'].get('posts', [])
         
-        # Check for duplicates and add new posts
-        existing_post_ids = {post['post_id'] for post in existing_posts}
-        new_unique_posts = [post for post in new_posts if post['post_id'] not in existing_post_ids]
+        # Add new posts
+        all_posts = existing_posts + new_unique_posts
         
-        if new_unique_posts:
-            # Add new posts
-            all_posts = existing_posts + new_unique_posts
-            
-            # Sort by publication date (newest first)
-            all_posts.sort(key=lambda x: x['publication_date'], reverse=True)
-            
-            # Update blog structure
-            existing_blog['blog']['posts'] = all_posts
-            existing_blog['blog']['metadata']['total_posts'] = len(all_posts)
-            existing_blog['blog']['metadata']['last_updated'] = datetime.now().strftime("%Y-%m-%d")
-            
-            # Save updated blog
-            self.save_json(existing_blog, self.existing_blog_path)
-            self.save_json(existing_blog, self.site_blog_path)
-            
-            print(f"Added {len(new_unique_posts)} new blog posts")
-        else:
-            print("No new unique posts to add")
+        # Sort by publication date (newest first)
+        all_posts.sort(key=lambda x: x['publication_date'], reverse=True)
+        
+        # Update blog structure
+        existing_blog['blog']['posts'] = all_posts
+        existing_blog['blog']['metadata']['total_posts'] = len(all_posts)
+        existing_blog['blog']['metadata']['last_updated'] = datetime.now().strftime("%Y-%m-%d")
+        
+        # Save updated blog
+        if not self.save_with_keys('blog_post_id', [blog_post_key(post) for post in new_unique_posts],
+                                   existing_blog, self.existing_blog_path, self.site_blog_path):
+            return False
+        
+        print(f"Added {len(new_unique_posts)} new blog posts")
+        return True
     
     def integrate_with_existing_timeline(self, new_timeline_entries):
-        """Integrate new timeline entries with existing structure"""
+        """Integrate new timeline entries with existing structure; returns False if they could not be published"""
+        # Work out what is new from the key index, parsing the timeline only if it changed elsewhere
+        self.key_index.sync('timeline_title', self.existing_timeline_path,
+                            lambda: load_timeline_keys(self.existing_timeline_path, title_key))
+        new_unique_entries = self.key_index.filter_new('timeline_title', self.existing_timeline_path,
+                                                       new_timeline_entries, title_key)
+        
+        if not new_unique_entries:
+            print("No new unique timeline entries to add")
+            return True
+        
         # Load existing timeline data
         existing_timeline = self.load_json(self.existing_timeline_path)
         
         if not existing_timeline or 'kennedy_ogetto_cases' not in existing_timeline:
             print("No existing timeline structure found")
-            return
+            return False
         
         # Get existing timeline entries
         if 'timeline' not in existing_timeline['kennedy_ogetto_cases']:
@@ -216,55 +256,61 @@ class ContentIntegrator:
         
         existing_entries = existing_timeline['kennedy_ogetto_cases']['timeline']
         
-        # Check for duplicates and add new entries
-        existing_titles = {entry['title'] for entry in existing_entries}
-        new_unique_entries = [entry for entry in new_timeline_entries if entry['title'] not in existing_titles]
+        # Add new entries
+        all_entries = existing_entries + new_unique_entries
         
-        if new_unique_entries:
-            # Add new entries
-            all_entries = existing_entries + new_unique_entries
-            
-            # Sort by date
-            all_entries.sort(key=lambda x: x['date'])
-            
-            # Update timeline structure
-            existing_timeline['kennedy_ogetto_cases']['timeline'] = all_entries
-            existing_timeline['kennedy_ogetto_cases']['metadata']['total_timeline_entries'] = len(all_entries)
-            existing_timeline['kennedy_ogetto_cases']['metadata']['last_updated'] = datetime.now().strftime("%Y-%m-%d")
-            
-            # Save updated timeline
-            self.save_json(existing_timeline, self.existing_timeline_path)
-            self.save_json(existing_timeline, self.site_timeline_path)
-            
-            print(f"Added {len(new_unique_entries)} new timeline entries")
-        else:
-            print("No new unique timeline entries to add")
+        # Sort by date
+        all_entries.sort(key=lambda x: x['date'])
+        
+        # Update timeline structure
+        existing_timeline['kennedy_ogetto_cases']['timeline'] = all_entries
+        existing_timeline['kennedy_ogetto_cases']['metadata']['total_timeline_entries'] = len(all_entries)
+        existing_timeline['kennedy_ogetto_cases']['metadata']['last_updated'] = datetime.now().strftime("%Y-%m-%d")
+        
+        # Save updated timeline
+        if not self.save_with_keys('timeline_title', [title_key(entry) for entry in new_unique_entries],
+                                   existing_timeline, self.existing_timeline_path, self.site_timeline_path):
+            return False
+        
+        print(f"Added {len(new_unique_entries)} new timeline entries")
+        return True
     
     def run_integration(self):
         """Run the complete integration process"""
         print("Starting content integration...")
         
-        # Load scraped content
-        try:
-            with open('data/processed/quality_blog_posts.json', 'r', encoding='utf-8') as f:
-                scraped_posts = json.load(f)
-        except FileNotFoundError:
+        # Load scraped content queued by the enhanced scraper, including any an earlier run did not publish
+        if not os.path.exists(self.pending_posts_path):
             print("No scraped content found. Run the scraper first.")
             return
+        scraped_posts = load_pending(self.pending_posts_path)
         
         # Enhance scraped content
         enhanced_posts = self.enhance_scraped_content(scraped_posts)
         
         if not enhanced_posts:
             print("No content to integrate")
+            self.clear_published()
             return
         
         # Create timeline entries
         timeline_entries = self.create_timeline_entries(enhanced_posts)
         
         # Integrate with existing structures
-        self.integrate_with_existing_blog(enhanced_posts)
-        self.integrate_with_existing_timeline(timeline_entries)
+        blog_published = self.integrate_with_existing_blog(enhanced_posts)
+        timeline_published = self.integrate_with_existing_timeline(timeline_entries)
+        
+        # Refresh the case ID -> entries/posts reverse index
+        rebuild_case_index(self.site_blog_path, self.site_timeline_path)
+        
+        # Refresh the static site's sharded search index
+        rebuild_search_index(os.path.dirname(self.site_blog_path))
+        
+        if not (blog_published and timeline_published):
+            # Leave the queue in place so the next run publishes these items
+            print("Integration incomplete; scraped content stays queued for the next run")
+            return
+        self.clear_published()
         
         print("Integration completed successfully!")
         
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Keyword Classification Engine
+Compiles every keyword table used by the content classifiers into one
+Aho-Corasick automaton so a piece of text is lowercased and scanned once
+"""
+
+from collections import deque
+
+# Each taxonomy is an ordered list of (label, keywords) rules. The first rule
+# with any keyword present wins, exactly like the original chains of `in` checks.
+# 'scope' is 'text' for title + content, or 'content' for the body only.
+TAXONOMIES = {
+    # TimelineProcessor.determine_event_type
+    'event_type': {
+        'scope': 'text',
+        'default': 'Legal Event',
+        'rules': [
+            ('Government Appointment', ['appointment']),
+            ('Legal Case', ['case']),
+            ('Court Appearance', ['court']),
+            ('Legal Judgment', ['judgment']),
+            ('Legal Submission', ['submission']),
+            ('Public Statement', ['statement']),
+            ('Recognition/Award', ['award']),
+            ('Educational Milestone', ['education']),
+            ('Government Appointment', ['appointed', 'nomination', 'confirmed']),
+            ('Court Appearance', ['court', 'hearing', 'trial', 'proceeding']),
+            ('Legal Judgment', ['judgment', 'ruling', 'decision', 'verdict']),
+            ('Legal Submission', ['submission', 'argument', 'brief']),
+        ]
+    },
+    # TimelineProcessor.extract_legal_context
+    'legal_context': {
+        'scope': 'content',
+        'default': 'General legal matter',
+        'rules': [
+            ('Constitutional law matter involving interpretation of Kenya\'s constitution', ['constitutional']),
+            ('Electoral law case related to Kenya\'s democratic processes', ['election']),
+            ('International law matter involving cross-border legal issues', ['international']),
+            ('Criminal law case involving serious criminal charges', ['criminal']),
+            ('Investment law dispute involving international arbitration', ['investment']),
+            ('Administrative law matter involving government operations', ['administrative']),
+        ]
+    },
+    # TimelineProcessor.determine_significance
+    'timeline_significance': {
+        'scope': 'content',
+        'default': 'Standard - Regular legal proceeding or professional activity',
+        'rules': [
+            ('High - Landmark legal event with national/international significance',
+             ['supreme court', 'solicitor general', 'icc', 'constitutional amendment']),
+            ('Medium - Important legal matter with significant implications',
+             ['high court', 'court of appeal', 'government appointment']),
+        ]
+    },
+    # ContentGenerator.categorize_content
+    'category': {
+        'scope': 'content',
+        'default': 'General Legal',
+        'rules': [
+            ('Election Law', ['election', 'petition', 'supreme court', 'presidential']),
+            ('International Criminal Law', ['icc', 'unictr', 'sierra leone', 'genocide', 'war crimes']),
+            ('Constitutional Law', ['constitution', 'bbi', 'constitutional', 'amendment']),
+            ('International Investment Law', ['icsid', 'investment', 'arbitration', 'energy']),
+            ('Government Appointments', ['solicitor general', 'appointment', 'vetting', 'legal adviser']),
+        ]
+    },
+    # EnhancedOgettoScraper.determine_category
+    'article_category': {
+        'scope': 'text',
+        'default': 'General Legal',
+        'rules': [
+            ('Government Appointments', ['solicitor general', 'appointment', 'sworn', 'swearing']),
+            ('Constitutional Law', ['nms', 'legality', 'constitutional']),
+            ('Election Law', ['election', 'petition', 'supreme court']),
+            ('International Criminal Law', ['icc', 'international court', 'tribunal']),
+        ]
+    },
+    # EnhancedOgettoScraper.determine_significance
+    'article_significance': {
+        'scope': 'content',
+        'default': 'Standard - Regular legal activity',
+        'rules': [
+            ('High - Significant legal or government matter',
+             ['solicitor general', 'supreme court', 'president', 'constitutional',
+              'landmark', 'historic', 'unprecedented']),
+            ('Medium - Important legal proceeding',
+             ['high court', 'court of appeal', 'government', 'legal', 'case']),
+        ]
+    },
+    # EnhancedOgettoScraper.extract_legal_implications
+    'legal_implications': {
+        'scope': 'content',
+        'default': 'General legal practice and professional development',
+        'rules': [
+            ('Constitutional law implications for Kenya\'s legal framework', ['constitutional']),
+            ('Government legal representation and policy implications', ['solicitor general']),
+            ('Electoral law and democratic process implications', ['election']),
+            ('International law and Kenya\'s global legal standing', ['international']),
+        ]
+    }
+}
+
+
+class KeywordClassifier:
+    def __init__(self, taxonomies=None):
+        self.taxonomies = taxonomies or TAXONOMIES
+        self.names = list(self.taxonomies)
+        self.defaults = [self.taxonomies[name]['default'] for name in self.names]
+        self.labels = [[label for label, _ in self.taxonomies[name]['rules']] for name in self.names]
+
+        # keyword -> id, and per keyword the (taxonomy, priority, content_only) it votes for
+        self.keywords = []
+        self.keyword_ids = {}
+        self.votes = []
+        for tax_index, name in enumerate(self.names):
+            content_only = self.taxonomies[name].get('scope', 'text') == 'content'
+            for priority, (_, words) in enumerate(self.taxonomies[name]['rules']):
+                for word in words:
+                    word = word.lower()
+                    if word not in self.keyword_ids:
+                        self.keyword_ids[word] = len(self.keywords)
+                        self.keywords.append(word)
+                        self.votes.append([])
+                    self.votes[self.keyword_ids[word]].append((tax_index, priority, content_only))
+
+        self.build_automaton()
+
+    def build_automaton(self):
+        """Build the goto, failure and output tables from the keyword list"""
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+
+        for keyword_id, word in enumerate(self.keywords):
+            state = 0
+            for char in word:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                    self.goto[state][char] = next_state
+                state = next_state
+            self.output[state] = self.output[state] + (keyword_id,)
+
+        # Breadth-first pass so every failure target is resolved before its children
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def scan(self, text):
+        """Yield (keyword_id, start, end) for every keyword occurrence in lowercased text"""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        keywords = self.keywords
+        state = 0
+
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in output[state]:
+                end = index + 1
+                yield keyword_id, end - len(keywords[keyword_id]), end
+
+    def classify(self, content, title=''):
+        """Classify text against every taxonomy in a single pass"""
+        title = title or ''
+        content = content or ''
+        title = title.lower()
+        text = title + ' ' + content.lower() if title else content.lower()
+        content_start = len(title) + 1 if title else 0
+
+        text_hits = set()
+        content_hits = set()
+        for keyword_id, start, _ in self.scan(text):
+            text_hits.add(keyword_id)
+            if start >= content_start:
+                content_hits.add(keyword_id)
+
+        best = [None] * len(self.names)
+        for keyword_id in text_hits:
+            in_content = keyword_id in content_hits
+            for tax_index, priority, content_only in self.votes[keyword_id]:
+                if content_only and not in_content:
+                    continue
+                if best[tax_index] is None or priority < best[tax_index]:
+                    best[tax_index] = priority
+
+        return {
+            name: self.defaults[i] if best[i] is None else self.labels[i][best[i]]
+            for i, name in enumerate(self.names)
+        }
+
+
+# Shared instance, compiled once per process
+default_classifier = KeywordClassifier()
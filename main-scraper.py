@@ -5,13 +5,24 @@ Coordinates all scraping activities and content generation
 """
 
 import asyncio
-import aiohttp
 import json
 import logging
 from datetime import datetime
 import os
 from blog_template_generator import BlogPostGenerator
 from timeline_processor import TimelineProcessor
+from near_duplicates import NearDuplicateIndex
+from fetch_engine import AsyncFetcher
+from http_cache import HttpCache
+from resilience import Deadline, HostBreakers
+from article_parser import LEGAL_KEYWORDS, find_article_links, parse_article
+from content_extractor import default_content_extractor
+from pdf_ingest import PdfIngester, is_pdf_url, judgment_record
+from sitemap_discovery import SitemapDiscovery, discovery_mode
+from crawl_state import CrawlState, configured_revisit_days
+from content_fingerprints import DerivedContentStore
+from dedup_index import (DedupKeyIndex, blog_post_key, timeline_key, load_blog_keys, load_timeline_keys,
+                         replace_records)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -21,170 +32,413 @@ class OgettoDataOrchestrator:
     def __init__(self):
         self.blog_generator = BlogPostGenerator()
         self.timeline_processor = TimelineProcessor()
-        self.session = None
+        self.fetcher = None
+        self.http_cache = HttpCache()
         self.scraped_data = []
+        # Index into scraped_data -> what was derived from that page when its content was different
+        self.revised = {}
+        # (url, fingerprint, derived) stored once the derived posts and entries are written
+        self.derived_updates = []
+        self.failed_sources = []
+        # Sources scraped at once, the time a whole source may take, and the time for one linked page
+        self.task_semaphore = asyncio.Semaphore(int(os.getenv('SCRAPE_CONCURRENCY', '4')))
+        self.task_timeout = float(os.getenv('SCRAPE_TASK_TIMEOUT', '120'))
+        self.page_timeout = float(os.getenv('SCRAPE_PAGE_TIMEOUT', '30'))
+        # Judgment PDFs are streamed to disk and read a few pages at a time across a process pool
+        self.pdf_timeout = float(os.getenv('SCRAPE_PDF_TIMEOUT', '90'))
+        # Started on the first judgment link, so runs without one need no PDF library or process pool
+        self.pdf_ingester = None
+        self.pdf_unavailable = False
+        # Every timeout is also capped by the deadline for the whole run, when one is set
+        self.deadline = Deadline.from_env()
+        self.breakers = HostBreakers.load()
+        self.timeline_workers = int(os.getenv('TIMELINE_WORKERS', '0')) or None
+        self.key_index = DedupKeyIndex()
+        self.near_duplicates = NearDuplicateIndex.load()
+        self.crawl_state = CrawlState('orchestrator', revisit_days=configured_revisit_days())
+        self.derived_content = DerivedContentStore('orchestrator')
+        self.content_extractor = default_content_extractor
+        # News articles are found through sitemaps unless SCRAPE_DISCOVERY=search
+        self.discovery = discovery_mode()
+        self.sitemap_discovery = None
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Shares the on-disk HTTP cache and host breakers with the other scrapers
+        self.fetcher = await AsyncFetcher(cache=self.http_cache, breakers=self.breakers,
+                                          deadline=self.deadline).__aenter__()
+        self.sitemap_discovery = SitemapDiscovery(self.fetcher, self.crawl_state)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        if self.pdf_ingester:
+            await self.pdf_ingester.__aexit__(exc_type, exc_val, exc_tb)
+        if self.fetcher:
+            await self.fetcher.__aexit__(exc_type, exc_val, exc_tb)
+    
+    async def judgment_ingester(self):
+        """The PDF ingester, started on first use; None when no PDF backend is installed"""
+        if self.pdf_ingester is None and not self.pdf_unavailable:
+            try:
+                ingester = PdfIngester(timeline_processor=self.timeline_processor)
+            except ImportError as e:
+                logger.warning(f"Skipping judgment PDFs: {e}")
+                self.pdf_unavailable = True
+                return None
+            self.pdf_ingester = await ingester.__aenter__()
+        return self.pdf_ingester
+    
+    async def run_task(self, name, coroutine):
+        """Await one source under the shared semaphore and timeout, logging rather than raising failures"""
+        async with self.task_semaphore:
+            timeout = self.deadline.timeout(self.task_timeout)
+            try:
+                await asyncio.wait_for(coroutine, timeout)
+                return True
+            except asyncio.TimeoutError:
+                logger.error(f"Timed out scraping {name} after {timeout:.0f}s")
+            except Exception as e:
+                logger.error(f"Error scraping {name}: {e}")
+        self.failed_sources.append(name)
+        return False
     
     async def scrape_news_sources(self):
         """Scrape news sources for Kennedy Ogetto mentions"""
         news_sources = [
             {
                 'name': 'Daily Nation',
+                'base_url': 'https://nation.co.ke',
                 'search_url': 'https://nation.co.ke/search?q=Kennedy+Ogetto',
                 'selector': '.article-title'
             },
             {
                 'name': 'Business Daily',
+                'base_url': 'https://www.businessdailyafrica.com',
                 'search_url': 'https://www.businessdailyafrica.com/search?q=Kennedy+Ogetto',
                 'selector': '.headline'
             },
             {
                 'name': 'The Star',
+                'base_url': 'https://www.the-star.co.ke',
                 'search_url': 'https://www.the-star.co.ke/search?q=Kennedy+Ogetto',
                 'selector': '.article-headline'
             }
         ]
         
-        for source in news_sources:
-            try:
-                await self.scrape_single_source(source)
-            except Exception as e:
-                logger.error(f"Error scraping {source['name']}: {e}")
+        await asyncio.gather(*(
+            self.run_task(source['name'], self.scrape_single_source(source)) for source in news_sources
+        ))
     
     async def scrape_single_source(self, source):
-        """Scrape a single news source"""
+        """Scrape a single news source: its sitemaps or search page, then every matching article"""
+        if self.discovery == 'sitemap':
+            links = await self.sitemap_discovery.discover(source['base_url'], source['name'])
+            if links is not None:
+                await asyncio.gather(*(self.scrape_article(link, source['name']) for link in links))
+                logger.info(f"Successfully scraped {source['name']}: {len(links)} new articles in its sitemaps")
+                return
+            logger.info(f"No readable sitemap for {source['name']}; using its search page")
+        
+        response = await self.fetcher.fetch(source['search_url'])
+        if not response or response['status'] != 200:
+            status = response['status'] if response else 'no response'
+            logger.warning(f"Failed to scrape {source['name']}: Status {status}")
+            return
+        
+        selectors = [f"{source['selector']} a", f"a{source['selector']}", 'a[href*="ogetto"]', 'a[href*="ogeto"]']
+        links = await asyncio.to_thread(find_article_links, response['content'], source['base_url'], selectors)
+        await asyncio.gather(*(self.scrape_article(link, source['name']) for link in links))
+        logger.info(f"Successfully scraped {source['name']}: {len(links)} articles found")
+    
+    async def scrape_article(self, link, source_name, item_type='article', source_type='News Article'):
+        """Fetch and parse one linked page into scraped_data; a failure only loses this page"""
+        if self.crawl_state.is_seen(link['url']):
+            return
         try:
-            async with self.session.get(source['search_url']) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    # Parse HTML and extract articles
-                    # This would use BeautifulSoup in a real implementation
-                    logger.info(f"Successfully scraped {source['name']}")
-                else:
-                    logger.warning(f"Failed to scrape {source['name']}: Status {response.status}")
+            response = await asyncio.wait_for(self.fetcher.fetch(link['url']), self.deadline.timeout(self.page_timeout))
+            if not response or response['status'] != 200:
+                return
+            item = await asyncio.to_thread(parse_article, response['content'], link['url'], source_name,
+                                           content_extractor=self.content_extractor)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out fetching {link['url']}")
+            return
         except Exception as e:
-            logger.error(f"Error scraping {source['name']}: {e}")
+            logger.warning(f"Error parsing {link['url']}: {e}")
+            return
+        
+        self.crawl_state.mark_seen(link['url'], source_name)
+        # A page without a readable date is dated today, which says nothing about what is new
+        if item['date_parsed']:
+            self.crawl_state.advance(source_name, item['date'])
+        if not item['content']:
+            return
+        if item['title'] == 'Unknown Title':
+            item['title'] = link['title']
+        item['type'] = item_type
+        item['sources'] = [{
+            'url': item['url'],
+            'title': item['title'],
+            'publication': source_name,
+            'date': item['date'],
+            'type': source_type
+        }]
+        self.scraped_data.append(item)
     
     async def scrape_legal_databases(self):
         """Scrape legal databases for case information"""
         legal_sources = [
-            'http://kenyalaw.org/caselaw/search?q=Kennedy+Ogetto',
-            'https://www.icc-cpi.int/search?q=Kennedy+Ogetto',
+            {
+                'name': 'Kenya Law',
+                'base_url': 'http://kenyalaw.org',
+                'search_url': 'http://kenyalaw.org/caselaw/search?q=Kennedy+Ogetto',
+                'selectors': ['.case-result a', 'tr a'],
+                # Its case search lists only matching cases, titled by the parties rather than counsel
+                'keywords': None
+            },
+            {
+                'name': 'ICC',
+                'base_url': 'https://www.icc-cpi.int',
+                'search_url': 'https://www.icc-cpi.int/search?q=Kennedy+Ogetto',
+                'selectors': ['.search-result a', '.views-row a', 'h3 a'],
+                'keywords': LEGAL_KEYWORDS
+            }
         ]
         
-        for url in legal_sources:
-            try:
-                await self.scrape_legal_source(url)
-            except Exception as e:
-                logger.error(f"Error scraping legal source {url}: {e}")
+        await asyncio.gather(*(
+            self.run_task(source['name'], self.scrape_legal_source(source)) for source in legal_sources
+        ))
     
-    async def scrape_legal_source(self, url):
-        """Scrape a legal database"""
-        # Implementation would depend on the specific database structure
-        logger.info(f"Scraping legal source: {url}")
+    async def scrape_legal_source(self, source):
+        """Scrape a legal database: follow the top search results to their case pages"""
+        logger.info(f"Scraping legal source: {source['search_url']}")
+        response = await self.fetcher.fetch(source['search_url'])
+        if not response or response['status'] != 200:
+            status = response['status'] if response else 'no response'
+            logger.warning(f"Failed to scrape {source['name']}: Status {status}")
+            return
+        
+        links = await asyncio.to_thread(
+            find_article_links, response['content'], source['base_url'], source['selectors'],
+            keywords=source.get('keywords', LEGAL_KEYWORDS), per_selector=5, limit=5
+        )
+        await asyncio.gather(*(
+            self.scrape_judgment(link, source['name']) if is_pdf_url(link['url'])
+            else self.scrape_article(link, source['name'], item_type='legal_document', source_type='Legal Document')
+            for link in links
+        ))
+        logger.info(f"Successfully scraped {source['name']}: {len(links)} documents found")
+    
+    async def scrape_judgment(self, link, source_name):
+        """Stream and read one judgment PDF into scraped_data; a failure only loses this document"""
+        if self.crawl_state.is_seen(link['url']):
+            return
+        ingester = await self.judgment_ingester()
+        if ingester is None:
+            return
+        try:
+            judgment = await asyncio.wait_for(ingester.ingest(self.fetcher, link['url']),
+                                              self.deadline.timeout(self.pdf_timeout))
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out reading {link['url']}")
+            return
+        if not judgment:
+            return
+        
+        logger.info(f"Read {judgment['pages_read']} of {judgment['page_count']} pages of {link['url']}")
+        item = judgment_record(judgment, link['title'], source_name)
+        self.crawl_state.mark_seen(link['url'], source_name)
+        if item['date_parsed']:
+            self.crawl_state.advance(source_name, item['date'])
+        item['type'] = 'legal_document'
+        item['sources'] = [{
+            'url': item['url'],
+            'title': item['title'],
+            'publication': source_name,
+            'date': item['date'],
+            'type': 'Legal Document'
+        }]
+        self.scraped_data.append(item)
+    
+    def drop_near_duplicates(self):
+        """Remove scraped items that near-duplicate already indexed content"""
+        unique_data = []
+        for data in self.scraped_data:
+            item_id = data.get('url') or data.get('title', '')
+            duplicate = self.near_duplicates.check_and_add(
+                item_id, f"{data.get('title', '')} {data.get('content', '')}"
+            )
+            if duplicate:
+                logger.info(f"Skipping near-duplicate of {duplicate['id']} "
+                            f"(similarity {duplicate['similarity']:.2f}): {item_id}")
+                continue
+            unique_data.append(data)
+        
+        self.scraped_data = unique_data
     
     def process_scraped_data(self):
         """Process all scraped data into blog posts and timeline entries"""
-        blog_posts = []
-        timeline_entries = []
+        self.drop_near_duplicates()
         
-        for data in self.scraped_data:
+        # Pages whose text is unchanged since the last run reuse what was derived from them then
+        reused, pending = self.derived_content.partition(
+            self.scraped_data, lambda data: data.get('url'),
+            lambda data: (data.get('title', ''), data.get('content', ''))
+        )
+        blog_posts = [None] * len(self.scraped_data)
+        timeline_entries = [None] * len(self.scraped_data)
+        for index, derived in reused.items():
+            blog_posts[index] = derived['blog_post']
+            timeline_entries[index] = derived['timeline_entry']
+        
+        for index, data, _ in pending:
             # Generate blog post
-            blog_post = self.blog_generator.generate_blog_post(
-                title=data.get('title', ''),
-                content=data.get('content', ''),
-                date=data.get('date', datetime.now().strftime('%Y-%m-%d')),
-                sources=data.get('sources', [])
-            )
-            blog_posts.append(blog_post)
-            
-            # Generate timeline entry
-            timeline_entry = self.timeline_processor.create_timeline_entry(
+            blog_posts[index] = self.blog_generator.generate_blog_post(
                 title=data.get('title', ''),
                 content=data.get('content', ''),
                 date=data.get('date', datetime.now().strftime('%Y-%m-%d')),
                 sources=data.get('sources', [])
             )
-            timeline_entries.append(timeline_entry)
         
+        # Generate timeline entries in one batch, across a process pool when configured
+        new_entries = self.timeline_processor.create_timeline_entries(
+            [data for _, data, _ in pending], workers=self.timeline_workers
+        )
+        self.revised = {}
+        self.derived_updates = []
+        for (index, data, fingerprint), entry in zip(pending, new_entries):
+            timeline_entries[index] = entry
+            # A revisited page whose content changed: its new post and entry replace the published ones
+            previous = self.derived_content.stored(data.get('url'))
+            if previous is not None:
+                self.revised[index] = previous
+            # Stored after the write, or a failed run would reuse them next time as already published
+            self.derived_updates.append((data.get('url'), fingerprint,
+                                         {'blog_post': blog_posts[index], 'timeline_entry': entry}))
+        
+        logger.info(f"Reused derived content for {len(reused)} unchanged pages, built {len(pending)}")
         return blog_posts, timeline_entries
     
     def update_json_files(self, blog_posts, timeline_entries):
-        """Update the existing JSON files with new data"""
+        """Update the existing JSON files with new data; returns True if both were written
+        
+        Posts and entries rebuilt from a revisited page whose content changed
+        (self.revised) replace the published versions instead of being
+        dropped as already indexed.
+        """
+        written = True
         # Update blog.json
         try:
-            with open('blog.json', 'r', encoding='utf-8') as f:
-                blog_data = json.load(f)
-            
-            # Add new posts
-            existing_posts = blog_data.get('blog', {}).get('posts', [])
-            all_posts = existing_posts + blog_posts
-            
-            # Remove duplicates based on post_id
-            unique_posts = []
-            seen_ids = set()
-            
-            for post in all_posts:
-                if post['post_id'] not in seen_ids:
-                    unique_posts.append(post)
-                    seen_ids.add(post['post_id'])
-            
-            # Update blog data
-            blog_data['blog']['posts'] = unique_posts
-            blog_data['blog']['metadata']['total_posts'] = len(unique_posts)
-            blog_data['blog']['metadata']['last_updated'] = datetime.now().strftime('%Y-%m-%d')
+            self.key_index.sync('blog_post_id', 'blog.json', lambda: load_blog_keys('blog.json'))
+            revised_posts, unpublished = self.key_index.split_revisions(
+                'blog_post_id', 'blog.json',
+                {blog_post_key(self.revised[index]['blog_post']): post
+                 for index, post in enumerate(blog_posts) if index in self.revised},
+                blog_post_key
+            )
+            new_posts = self.key_index.filter_new(
+                'blog_post_id', 'blog.json',
+                [post for index, post in enumerate(blog_posts) if index not in self.revised] + unpublished,
+                blog_post_key
+            )
             
-            # Write back to file
-            with open('blog.json', 'w', encoding='utf-8') as f:
-                json.dump(blog_data, f, indent=2, ensure_ascii=False)
+            if new_posts or revised_posts:
+                with open('blog.json', 'r', encoding='utf-8') as f:
+                    blog_data = json.load(f)
+                
+                # Swap in revised posts and add new ones
+                existing_posts = blog_data.get('blog', {}).get('posts', [])
+                replaced = replace_records(existing_posts, revised_posts, blog_post_key)
+                all_posts = existing_posts + new_posts
+                
+                # Update blog data
+                blog_data['blog']['posts'] = all_posts
+                blog_data['blog']['metadata']['total_posts'] = len(all_posts)
+                blog_data['blog']['metadata']['last_updated'] = datetime.now().strftime('%Y-%m-%d')
+                
+                # Write back to file together with the new keys
+                self.key_index.record_write(
+                    {'blog_post_id': [blog_post_key(post) for post in new_posts + list(revised_posts.values())]},
+                    blog_data, 'blog.json', removed={'blog_post_id': replaced}
+                )
             
-            logger.info(f"Updated blog.json with {len(blog_posts)} new posts")
+            logger.info(f"Updated blog.json with {len(new_posts)} new posts, {len(revised_posts)} revised")
             
         except Exception as e:
             logger.error(f"Error updating blog.json: {e}")
+            written = False
         
         # Update timeline file
         try:
-            updated_timeline = self.timeline_processor.merge_with_existing_timeline(
-                timeline_entries, 
-                'kennedy-ogetto-cases-chronological.json'
+            timeline_path = 'kennedy-ogetto-cases-chronological.json'
+            self.key_index.sync('timeline', timeline_path, lambda: load_timeline_keys(timeline_path))
+            previous_entries = {timeline_key(entry): entry
+                                for entry in (derived['timeline_entry'] for derived in self.revised.values())}
+            revised_entries, unpublished = self.key_index.split_revisions(
+                'timeline', timeline_path,
+                {timeline_key(self.revised[index]['timeline_entry']): entry
+                 for index, entry in enumerate(timeline_entries) if index in self.revised},
+                timeline_key
+            )
+            new_entries = self.key_index.filter_new(
+                'timeline', timeline_path,
+                [entry for index, entry in enumerate(timeline_entries) if index not in self.revised] + unpublished,
+                timeline_key
             )
             
-            with open('kennedy-ogetto-cases-chronological.json', 'w', encoding='utf-8') as f:
-                json.dump(updated_timeline, f, indent=2, ensure_ascii=False)
+            if new_entries or revised_entries:
+                updated_timeline = self.timeline_processor.merge_with_existing_timeline(
+                    new_entries + list(revised_entries.values()),
+                    timeline_path,
+                    incremental=True,
+                    deduplicated=True,
+                    replaced=[previous_entries[key] for key in revised_entries]
+                )
+                
+                self.key_index.record_write(
+                    {'timeline': [timeline_key(entry) for entry in new_entries + list(revised_entries.values())]},
+                    updated_timeline, timeline_path, removed={'timeline': list(revised_entries)}
+                )
             
-            logger.info(f"Updated timeline with {len(timeline_entries)} new entries")
+            logger.info(f"Updated timeline with {len(new_entries)} new entries, {len(revised_entries)} revised")
             
         except Exception as e:
             logger.error(f"Error updating timeline: {e}")
+            written = False
+        
+        return written
     
     async def run_full_scraping_cycle(self):
         """Run a complete scraping cycle"""
         logger.info("Starting Kennedy Ogetto data scraping cycle")
         
-        # Scrape all sources
-        await self.scrape_news_sources()
-        await self.scrape_legal_databases()
+        # Scrape all sources concurrently; a failed source is logged and skipped
+        await asyncio.gather(self.scrape_news_sources(), self.scrape_legal_databases())
+        # Pages finish in arbitrary order; sort so generated posts are stable across runs
+        self.scraped_data.sort(key=lambda data: (data['date'], data['url']))
+        self.breakers.save()
+        self.content_extractor.save()
+        if self.breakers.open_hosts():
+            logger.warning(f"Circuit open for: {', '.join(self.breakers.open_hosts())}")
         
         # Process data
         blog_posts, timeline_entries = self.process_scraped_data()
         
         # Update files
-        self.update_json_files(blog_posts, timeline_entries)
+        if self.update_json_files(blog_posts, timeline_entries):
+            # Seen URLs, marks and indexed items only cover what was written, so a failed write is retried
+            self.sitemap_discovery.save(failed=self.failed_sources)
+            self.crawl_state.save()
+            self.near_duplicates.save()
+            for url, fingerprint, derived in self.derived_updates:
+                self.derived_content.put(url, fingerprint, derived)
         
         logger.info("Scraping cycle completed")
         
         return {
             'blog_posts_added': len(blog_posts),
             'timeline_entries_added': len(timeline_entries),
-            'total_sources_scraped': len(self.scraped_data)
+            'total_sources_scraped': len(self.scraped_data),
+            'failed_sources': self.failed_sources
         }
 
 # Usage example
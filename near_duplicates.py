@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detection
+Shingles article text, signs it with MinHash and buckets the signatures
+with LSH so syndicated copies of a story are caught without comparing
+against every stored item
+"""
+
+import json
+import os
+import random
+import re
+from functools import lru_cache
+from hashlib import blake2b
+
+DEFAULT_INDEX_PATH = 'data/processed/near_duplicate_index.json'
+# Every LSH candidate is checked against its full signature, so a false positive
+# only costs a comparison while a false negative loses a duplicate for good
+FALSE_POSITIVE_WEIGHT = 0.05
+FALSE_NEGATIVE_WEIGHT = 0.95
+INTEGRATION_STEPS = 100
+
+
+def shingle_text(text, size=5):
+    """Split text into overlapping word shingles after normalizing case and punctuation"""
+    words = re.findall(r'\w+', (text or '').lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def integrate(function, start, stop, steps=INTEGRATION_STEPS):
+    """Midpoint-rule integral of function over [start, stop]"""
+    width = (stop - start) / steps
+    return sum(function(start + (step + 0.5) * width) for step in range(steps)) * width
+
+
+@lru_cache(maxsize=None)
+def choose_bands(num_perm, threshold, false_positive_weight=FALSE_POSITIVE_WEIGHT,
+                 false_negative_weight=FALSE_NEGATIVE_WEIGHT):
+    """Pick (bands, rows), bands * rows <= num_perm, minimising the weighted error areas
+
+    A pair with Jaccard similarity s becomes a candidate with probability
+    1 - (1 - s^r)^b. The false-positive area is that probability below the
+    threshold and the false-negative area is its complement above it, as
+    in datasketch's MinHashLSH.
+    """
+    best = None
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positives = integrate(lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold)
+            false_negatives = integrate(lambda s: (1 - s ** rows) ** bands, threshold, 1.0)
+            error = false_positive_weight * false_positives + false_negative_weight * false_negatives
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=5, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+
+        # XOR with a random 64-bit mask permutes the (already uniform) blake2b hashes;
+        # it is several times cheaper in pure Python than (a * x + b) mod p
+        generator = random.Random(seed)
+        self.masks = [generator.getrandbits(64) for _ in range(num_perm)]
+
+        self.signatures = {}
+        self.buckets = [{} for _ in range(self.bands)]
+
+    def signature(self, text):
+        """MinHash signature of the text's shingle set"""
+        hashes = [
+            int.from_bytes(blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+            for shingle in shingle_text(text, self.shingle_size)
+        ]
+        if not hashes:
+            return None
+        return [min([value ^ mask for value in hashes]) for mask in self.masks]
+
+    def band_keys(self, signature):
+        rows = self.rows
+        return [tuple(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def similarity(self, first, second):
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(1 for a, b in zip(first, second) if a == b) / self.num_perm
+
+    def add(self, item_id, text=None, signature=None):
+        """Add an item to the index; returns False if it has no usable text"""
+        if item_id in self.signatures:
+            return True
+        signature = signature or self.signature(text)
+        if signature is None:
+            return False
+        self.signatures[item_id] = signature
+        for band, key in enumerate(self.band_keys(signature)):
+            self.buckets[band].setdefault(key, []).append(item_id)
+        return True
+
+    def query(self, text=None, signature=None, threshold=None, exclude=None):
+        """Return [{'id', 'similarity'}] for indexed items at or above the threshold, best first
+
+        exclude: an item ID never returned, so an item re-checked under its own ID does not match itself
+        """
+        signature = signature or self.signature(text)
+        if signature is None:
+            return []
+        threshold = self.threshold if threshold is None else threshold
+
+        candidates = set()
+        for band, key in enumerate(self.band_keys(signature)):
+            candidates.update(self.buckets[band].get(key, ()))
+
+        matches = []
+        candidates.discard(exclude)
+        for item_id in candidates:
+            score = self.similarity(signature, self.signatures[item_id])
+            if score >= threshold:
+                matches.append({'id': item_id, 'similarity': score})
+        matches.sort(key=lambda match: (-match['similarity'], str(match['id'])))
+        return matches
+
+    def find_duplicate(self, text):
+        """Return the best existing match for text, or None"""
+        matches = self.query(text)
+        return matches[0] if matches else None
+
+    def check_and_add(self, item_id, text):
+        """Return the existing item that text duplicates, or index it as new and return None
+
+        The item is only indexed in memory, so later items in the same run are
+        checked against it; callers save() once the items are written out, so
+        a failed write never leaves an unpublished item in the saved index.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        matches = self.query(signature=signature, exclude=item_id)
+        if matches:
+            return matches[0]
+        self.add(item_id, signature=signature)
+        return None
+
+    def seed_from_site_data(self, blog_path='site/data/blog.json',
+                            timeline_path='site/data/kennedy-ogetto-cases-chronological.json'):
+        """Index the published blog posts and timeline entries"""
+        try:
+            with open(blog_path, 'r', encoding='utf-8') as f:
+                for post in json.load(f).get('blog', {}).get('posts', []):
+                    content = post.get('content', '')
+                    if isinstance(content, dict):
+                        content = ' '.join(str(part) for part in content.values())
+                    self.add(f"blog:{post.get('post_id')}", f"{post.get('title', '')} {post.get('excerpt', '')} {content}")
+        except FileNotFoundError:
+            pass
+
+        try:
+            with open(timeline_path, 'r', encoding='utf-8') as f:
+                for entry in json.load(f).get('kennedy_ogetto_cases', {}).get('timeline', []):
+                    self.add(f"timeline:{entry.get('date')}:{entry.get('title', '')}",
+                             f"{entry.get('title', '')} {entry.get('description', '')}")
+        except FileNotFoundError:
+            pass
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        """Persist the signatures; LSH buckets are rebuilt on load"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        data = {
+            'threshold': self.threshold,
+            'num_perm': self.num_perm,
+            'shingle_size': self.shingle_size,
+            'seed': self.seed,
+            'signatures': self.signatures
+        }
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH, threshold=None):
+        """Load a saved index, or seed a new one from the site data"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            index = cls(threshold=threshold or 0.8)
+            index.seed_from_site_data()
+            return index
+
+        index = cls(threshold=threshold or data['threshold'], num_perm=data['num_perm'],
+                    shingle_size=data['shingle_size'], seed=data['seed'])
+        for item_id, signature in data['signatures'].items():
+            index.add(item_id, signature=signature)
+        return index
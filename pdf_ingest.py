@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+PDF Judgment Ingestion
+Streams court judgment PDFs to disk, memory-maps them and extracts text
+a few pages at a time across a process pool. Extraction stops once the
+case number, parties and judgment date are known, so a long judgment
+usually costs its first pages and its last one, and the event loop keeps
+downloading while workers extract.
+"""
+
+import asyncio
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from hashlib import blake2b
+from urllib.parse import urlsplit
+
+from case_index import CASE_PATTERN, extract_case_ids
+from fetch_engine import AsyncFetcher
+from timeline_processor import TimelineProcessor
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    PdfReader = None
+
+PDF_BACKENDS = ('pdfplumber', 'pypdf2')
+DEFAULT_PDF_DIR = 'data/cache/pdfs'
+MAX_PDF_BYTES = 64 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+FIRST_BATCH_PAGES = 2
+BATCH_PAGES = 4
+# Batches of one PDF submitted ahead of the one being checked; later ones wait until they are needed
+BATCHES_IN_FLIGHT = 2
+MAX_PAGES = 80
+EXCERPT_CHARS = 20000
+CONTENT_CHARS = 3000
+
+# Kenya Law judgments open with a metadata table of "Field: value" lines
+HEADER_FIELD_PATTERN = re.compile(
+    r'^\s*(Case Number|Parties|Date Delivered|Date of Judgment|Date of Decision)\s*:\s*(.+?)\s*$',
+    re.IGNORECASE | re.MULTILINE
+)
+DATE_FIELDS = ('date delivered', 'date of judgment', 'date of decision')
+BETWEEN_PATTERN = re.compile(
+    r'\bBETWEEN\s*\n\s*(?P<first>[^\n]+?)\s*\n\s*(?:AND|VERSUS)\s*\n\s*(?P<second>[^\n]+)'
+)
+TITLE_PARTIES_PATTERN = re.compile(
+    r'^\s*(?P<first>[A-Z][^\n]{2,80}?)\s+(?:v\.?|vs\.?|versus)\s+(?P<second>[A-Z][^\n]{2,80}?)\s*$',
+    re.MULTILINE
+)
+DOT_LEADER_PATTERN = re.compile(r'\s*[._…]{3,}\s*')
+DELIVERED_PATTERN = re.compile(r'\b(?:delivered|dated|signed)\b[\s\S]{0,120}', re.IGNORECASE)
+
+
+def available_pdf_backends():
+    backends = []
+    if pdfplumber is not None:
+        backends.append('pdfplumber')
+    if PdfReader is not None:
+        backends.append('pypdf2')
+    return backends
+
+
+def resolve_pdf_backend(backend=None):
+    """The requested backend, or the best installed one"""
+    available = available_pdf_backends()
+    if backend:
+        if backend not in PDF_BACKENDS:
+            raise ValueError(f"Unknown PDF backend: {backend}")
+        if backend in available:
+            return backend
+    if not available:
+        raise ImportError("PDF ingestion needs pdfplumber or PyPDF2")
+    return available[0]
+
+
+def is_pdf_url(url):
+    return urlsplit(url).path.lower().endswith('.pdf')
+
+
+def extract_page_range(path, start, stop, backend):
+    """(page count, text of pages [start, stop)) of a PDF; runs in a worker process
+
+    The file is memory-mapped, so only the pages read are paged in.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if backend == 'pdfplumber':
+            with pdfplumber.open(data) as pdf:
+                texts = []
+                for page in pdf.pages[start:stop]:
+                    texts.append(page.extract_text() or '')
+                    page.close()
+                return len(pdf.pages), texts
+        reader = PdfReader(data)
+        pages = reader.pages
+        return len(pages), [pages[i].extract_text() or '' for i in range(start, min(stop, len(pages)))]
+
+
+def clean_party(party):
+    return DOT_LEADER_PATTERN.sub(' ', party).strip(' .,')
+
+
+def find_parties(text):
+    match = BETWEEN_PATTERN.search(text) or TITLE_PARTIES_PATTERN.search(text)
+    if not match:
+        return None
+    return f"{clean_party(match.group('first'))} v {clean_party(match.group('second'))}"
+
+
+def fields_complete(fields):
+    return bool(fields['case_number'] and fields['parties'] and fields['date'])
+
+
+class PdfIngester:
+    def __init__(self, workers=None, pdf_dir=DEFAULT_PDF_DIR, backend=None, timeline_processor=None,
+                 max_pages=MAX_PAGES):
+        """
+        workers: extraction processes (default: one per CPU)
+        pdf_dir: where downloaded PDFs are kept; a PDF already on disk is not downloaded again
+        timeline_processor: supplies extract_related_cases and the date engine
+        max_pages: pages read at most per PDF when the sections are not found sooner
+        """
+        self.workers = workers
+        self.pdf_dir = pdf_dir
+        self.backend = resolve_pdf_backend(backend)
+        self.timeline_processor = timeline_processor or TimelineProcessor()
+        self.date_extractor = self.timeline_processor.date_extractor
+        self.max_pages = max_pages
+        self.executor = None
+
+    async def __aenter__(self):
+        os.makedirs(self.pdf_dir, exist_ok=True)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def pdf_path(self, url):
+        return os.path.join(self.pdf_dir, f"{blake2b(url.encode('utf-8'), digest_size=16).hexdigest()}.pdf")
+
+    async def download(self, fetcher, url):
+        """Stream a PDF to disk in chunks; returns its path, or None if it is not a usable PDF"""
+        path = self.pdf_path(url)
+        if os.path.exists(path):
+            return path
+
+        temp_path = f"{path}.part"
+        state = {'size': 0, 'rejected': False}
+        with open(temp_path, 'wb') as f:
+            def write_chunk(chunk):
+                if state['size'] == 0 and not chunk.startswith(b'%PDF'):
+                    state['rejected'] = True
+                elif state['size'] + len(chunk) > MAX_PDF_BYTES:
+                    state['rejected'] = True
+                else:
+                    f.write(chunk)
+                    state['size'] += len(chunk)
+                    return False
+                return True
+
+            status = await fetcher.stream(url, write_chunk, chunk_size=CHUNK_SIZE)
+
+        if status != 200 or state['rejected'] or state['size'] == 0:
+            os.remove(temp_path)
+            return None
+        os.replace(temp_path, path)
+        return path
+
+    def judgment_fields(self, text):
+        """Case number, parties and judgment date found so far, plus every cited case ID
+
+        The judgment's own case ID comes first in case_ids.
+        """
+        header = {name.lower(): value for name, value in HEADER_FIELD_PATTERN.findall(text)}
+        citation = CASE_PATTERN.search(text)
+        case_number = header.get('case number') or (citation.group(0) if citation else None)
+        case_ids = self.timeline_processor.extract_related_cases(text)
+        for case_id in reversed(extract_case_ids(case_number)):
+            if case_id in case_ids:
+                case_ids.remove(case_id)
+            case_ids.insert(0, case_id)
+
+        date = None
+        for name in DATE_FIELDS:
+            date = date or self.date_extractor.parse(header.get(name))
+        if date is None:
+            # The delivery line usually closes the judgment, so the last dated one wins
+            for match in reversed(list(DELIVERED_PATTERN.finditer(text))):
+                date = self.date_extractor.parse(match.group(0))
+                if date:
+                    break
+
+        return {
+            'case_number': case_number,
+            'case_ids': case_ids,
+            'parties': header.get('parties') or find_parties(text),
+            'date': date
+        }
+
+    async def extract(self, path):
+        """Read pages until the judgment fields are complete; returns (fields, text, pages read, page count)
+
+        The first pages and the last page are read first, since the header
+        and the delivery line are where the fields usually are; the pages
+        in between follow in batches, at most BATCHES_IN_FLIGHT at a time,
+        and no further batch is submitted once the fields are complete.
+        """
+        loop = asyncio.get_running_loop()
+        page_count, first_texts = await loop.run_in_executor(
+            self.executor, extract_page_range, path, 0, FIRST_BATCH_PAGES, self.backend
+        )
+        texts = {0: first_texts}
+        fields = self.judgment_fields('\n'.join(first_texts))
+
+        stop = min(page_count, self.max_pages)
+        ranges = []
+        if stop > FIRST_BATCH_PAGES:
+            ranges.append((page_count - 1, page_count))
+            ranges.extend((start, min(start + BATCH_PAGES, stop, page_count - 1))
+                          for start in range(FIRST_BATCH_PAGES, min(stop, page_count - 1), BATCH_PAGES))
+
+        if ranges and not fields_complete(fields):
+            ranges = deque(ranges)
+            futures = deque()
+            try:
+                while ranges or futures:
+                    while ranges and len(futures) < BATCHES_IN_FLIGHT:
+                        start, end = ranges.popleft()
+                        futures.append((start, loop.run_in_executor(
+                            self.executor, extract_page_range, path, start, end, self.backend
+                        )))
+                    start, future = futures.popleft()
+                    texts[start] = (await future)[1]
+                    fields = self.judgment_fields('\n'.join(
+                        '\n'.join(texts[key]) for key in sorted(texts)
+                    ))
+                    if fields_complete(fields):
+                        break
+            finally:
+                for _, future in futures:
+                    future.cancel()
+
+        text = '\n'.join('\n'.join(texts[key]) for key in sorted(texts))
+        return fields, text, sum(len(batch) for batch in texts.values()), page_count
+
+    async def ingest(self, fetcher, url):
+        """Download and read one PDF; returns a dict of its fields and a text excerpt, or None"""
+        try:
+            path = await self.download(fetcher, url)
+            if path is None:
+                return None
+            fields, text, pages_read, page_count = await self.extract(path)
+        except Exception as e:
+            print(f"Error ingesting PDF {url}: {e}")
+            return None
+        return dict(fields, url=url, path=path, text=text[:EXCERPT_CHARS],
+                    pages_read=pages_read, page_count=page_count)
+
+    async def ingest_all(self, fetcher, urls):
+        """Ingest PDFs concurrently; results (None where unavailable) keep the input order"""
+        return await asyncio.gather(*(self.ingest(fetcher, url) for url in urls))
+
+
+def judgment_record(judgment, title, source_name):
+    """A scraped-data record for a judgment, in the shape the scrapers use for articles
+
+    related_cases covers the whole text read, not just the capped content.
+    """
+    summary = '. '.join(part for part in (judgment['parties'], judgment['case_number']) if part)
+    content = ' '.join(f"{summary}. {judgment['text']}".split()) if summary else ' '.join(judgment['text'].split())
+    return {
+        'title': title or judgment['parties'] or "Unknown Title",
+        'content': content[:CONTENT_CHARS],
+        'date': judgment['date'] or datetime.now().strftime('%Y-%m-%d'),
+        'date_parsed': judgment['date'] is not None,
+        'url': judgment['url'],
+        'source': source_name,
+        'related_cases': judgment['case_ids']
+    }
+
+
+def ingest_pdfs(urls, workers=None, **fetch_options):
+    """Blocking helper for synchronous callers: download and read every PDF in one event loop"""
+    async def run():
+        async with AsyncFetcher(**fetch_options) as fetcher, PdfIngester(workers) as ingester:
+            return await ingester.ingest_all(fetcher, urls)
+
+    return asyncio.run(run())
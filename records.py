@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Compact Record Types
+Slotted classes for timeline entries, blog posts, sources and scraped
+records, with the repeated label strings interned. They convert to and
+from the existing JSON dict shape without loss.
+"""
+
+import json
+import sys
+
+
+class Missing:
+    """Marks a field that was absent from the source dict, so to_dict can omit it again"""
+    instance = None
+
+    def __new__(cls):
+        if cls.instance is None:
+            cls.instance = super().__new__(cls)
+        return cls.instance
+
+    def __reduce__(self):
+        return (Missing, ())
+
+    def __repr__(self):
+        return 'MISSING'
+
+    def __bool__(self):
+        return False
+
+
+MISSING = Missing()
+
+
+def intern_value(value):
+    """Intern strings (and the strings inside lists) so equal labels share one object"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [sys.intern(item) if isinstance(item, str) else item for item in value]
+    return value
+
+
+def intern_metadata(metadata):
+    """Intern the short string values of a metadata dict"""
+    if not isinstance(metadata, dict):
+        return metadata
+    return {
+        sys.intern(key): sys.intern(value) if isinstance(value, str) and len(value) <= 200 else value
+        for key, value in metadata.items()
+    }
+
+
+class Record:
+    # Field names in JSON order; subclasses fill these in
+    FIELDS = ()
+    # Fields whose string values repeat across records and are worth interning
+    INTERNED = ()
+    # Fields holding lists of nested records: field -> record class
+    NESTED = {}
+    # Fields holding metadata-style dicts
+    METADATA = ()
+
+    __slots__ = ('extra',)
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            setattr(self, name, fields.pop(name, MISSING))
+        self.extra = fields
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from the JSON dict shape"""
+        record = cls.__new__(cls)
+        extra = {}
+        for name in cls.FIELDS:
+            setattr(record, name, MISSING)
+        for key, value in data.items():
+            if key not in cls.FIELDS:
+                extra[key] = value
+                continue
+            if key in cls.NESTED and isinstance(value, list):
+                nested = cls.NESTED[key]
+                value = [nested.from_dict(item) if isinstance(item, dict) else item for item in value]
+            elif key in cls.INTERNED:
+                value = intern_value(value)
+            elif key in cls.METADATA:
+                value = intern_metadata(value)
+            setattr(record, key, value)
+        record.extra = extra
+        return record
+
+    def to_dict(self):
+        """Convert back to the JSON dict shape"""
+        data = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is MISSING:
+                continue
+            if name in self.NESTED and isinstance(value, list):
+                value = [item.to_dict() if isinstance(item, Record) else item for item in value]
+            elif isinstance(value, dict):
+                value = dict(value)
+            elif isinstance(value, list):
+                value = list(value)
+            data[name] = value
+        data.update(self.extra)
+        return data
+
+    def get(self, name, default=None):
+        """dict.get-style access for code that handles records and dicts alike"""
+        value = getattr(self, name, MISSING) if name in self.FIELDS else self.extra.get(name, MISSING)
+        return default if value is MISSING else value
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Source(Record):
+    FIELDS = ('url', 'title', 'publication', 'date', 'type')
+    INTERNED = ('publication', 'type')
+    __slots__ = FIELDS
+
+
+class TimelineEntry(Record):
+    FIELDS = ('date', 'event_type', 'title', 'description', 'significance', 'sources',
+              'related_cases', 'legal_context', 'metadata')
+    INTERNED = ('event_type', 'significance', 'legal_context', 'related_cases')
+    NESTED = {'sources': Source}
+    METADATA = ('metadata',)
+    __slots__ = FIELDS
+
+
+class BlogPost(Record):
+    FIELDS = ('post_id', 'title', 'slug', 'publication_date', 'last_updated', 'author', 'category',
+              'tags', 'excerpt', 'content', 'metadata', 'sources', 'related_posts', 'social_sharing')
+    INTERNED = ('last_updated', 'author', 'category', 'tags', 'related_posts')
+    NESTED = {'sources': Source}
+    METADATA = ('metadata',)
+    __slots__ = FIELDS
+
+
+class ScrapedRecord(Record):
+    FIELDS = ('type', 'title', 'content', 'date', 'url', 'source', 'metadata')
+    INTERNED = ('type', 'source', 'date')
+    METADATA = ('metadata',)
+    __slots__ = FIELDS
+
+
+def load_timeline_records(timeline_path):
+    """Load a chronology file's timeline and blog posts as records"""
+    with open(timeline_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    cases = data.get('kennedy_ogetto_cases', data)
+    timeline = [TimelineEntry.from_dict(entry) for entry in cases.get('timeline', [])]
+    blog_posts = [BlogPost.from_dict(post) for post in cases.get('blog_posts', [])]
+    return timeline, blog_posts
+
+
+def load_blog_records(blog_path):
+    """Load blog.json posts as records"""
+    with open(blog_path, 'r', encoding='utf-8') as f:
+        posts = json.load(f).get('blog', {}).get('posts', [])
+    return [BlogPost.from_dict(post) for post in posts]
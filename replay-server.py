@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Replay Server
+Records the scrapers' HTTP traffic into a cassette, or replays a cassette
+as a local stand-in for the live sites (see http_replay).
+
+Usage:
+    python3 replay-server.py record --cassette data/cassettes/weekly.sqlite3
+    SCRAPE_REPLAY_SERVER=http://127.0.0.1:8765 python3 simple_scraper.py
+
+    python3 replay-server.py replay --cassette data/cassettes/weekly.sqlite3 \\
+        --latency 0.05 --jitter 0.05 --error-rate 0.02 --seed 1
+
+Request counts, cache misses and injected failures are served as JSON at
+/_replay/stats and printed when the server stops.
+"""
+
+import argparse
+import json
+import sys
+
+from aiohttp import web
+
+from http_replay import DEFAULT_CASSETTE_PATH, REPLAY_ENV, REPLAY_MODES, CassetteStore, ReplayServer
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Record or replay scraper HTTP traffic")
+    parser.add_argument('mode', choices=REPLAY_MODES)
+    parser.add_argument('--cassette', default=DEFAULT_CASSETTE_PATH)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="up to this many more seconds at random")
+    parser.add_argument('--timing-scale', type=float, default=0.0,
+                        help="also wait this multiple of the recorded response time")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--drop-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    store = CassetteStore(args.cassette)
+    print(f"{args.mode.capitalize()}ing {args.cassette} ({store.count()} responses recorded)")
+    print(f"Point the scrapers here with {REPLAY_ENV}=http://{args.host}:{args.port}")
+    server = ReplayServer(store, mode=args.mode, latency=args.latency, jitter=args.jitter,
+                          timing_scale=args.timing_scale, error_rate=args.error_rate,
+                          error_status=args.error_status, drop_rate=args.drop_rate, seed=args.seed)
+    web.run_app(server.app(), host=args.host, port=args.port, print=None)
+    print(json.dumps(dict(server.stats, missed=server.missed[:50]), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
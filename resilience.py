@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Fetch Resilience
+Per-host circuit breakers, exponential backoff with jitter and a run-level
+deadline, so a dead or blocking host stops costing a full timeout on
+every request and a run always ends inside its slot with partial results
+"""
+
+import json
+import math
+import os
+import random
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from http_cache import CachedSession
+
+DEFAULT_BREAKER_PATH = 'data/processed/circuit-breakers.json'
+DEADLINE_ENV = 'SCRAPE_DEADLINE_AT'
+# Seconds; the shortest timeout a request is sent with, even at the deadline
+MIN_TIMEOUT = 0.1
+
+# Worth retrying: the host is overloaded or briefly unavailable
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Count against the host but retrying will not help: it is blocking us
+BLOCKED_STATUSES = {403}
+
+
+class CircuitOpenError(requests.RequestException):
+    """The host's circuit breaker is open, so the request was not sent"""
+
+
+class DeadlineExceeded(requests.RequestException):
+    """The run's deadline has passed, so the request was not sent"""
+
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class Deadline:
+    def __init__(self, at=None):
+        """at: epoch seconds by which fetching must stop, or None for no deadline"""
+        self.at = at
+
+    @classmethod
+    def after(cls, seconds):
+        return cls(time.time() + seconds)
+
+    @classmethod
+    def from_env(cls):
+        """The deadline AutomatedScraper hands to each pipeline stage"""
+        value = os.getenv(DEADLINE_ENV)
+        return cls(float(value)) if value else cls()
+
+    def remaining(self):
+        return math.inf if self.at is None else max(0.0, self.at - time.time())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, default):
+        """Cap a per-request timeout so it never runs past the deadline
+
+        Never below MIN_TIMEOUT: aiohttp reads a total of 0 as no timeout at
+        all and requests rejects it, so callers check expired() just before
+        sending and a request that slips past the deadline still times out.
+        """
+        return max(MIN_TIMEOUT, min(default, self.remaining()))
+
+
+class CircuitBreaker:
+    """closed -> open after failure_threshold straight failures -> half_open after reset_timeout"""
+
+    def __init__(self, failure_threshold=3, reset_timeout=300, state='closed', failures=0, opened_at=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = state
+        self.failures = failures
+        self.opened_at = opened_at
+        self.trial_in_flight = False
+
+    def allow(self):
+        """Whether a request may be sent now; half-open lets a single trial through"""
+        if self.state == 'closed':
+            return True
+        if self.state == 'open':
+            if time.time() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = 'half_open'
+            self.trial_in_flight = False
+        if self.trial_in_flight:
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == 'half_open' or self.failures >= self.failure_threshold:
+            self.state = 'open'
+            self.opened_at = time.time()
+
+    def record_response(self, status):
+        """Count a response for or against the host; returns True if it is worth retrying"""
+        if status in RETRY_STATUSES or status in BLOCKED_STATUSES:
+            self.record_failure()
+        else:
+            self.record_success()
+        return status in RETRY_STATUSES
+
+    def to_dict(self):
+        # A trial in flight is not saved; the next process starts from open again
+        state = 'open' if self.state == 'half_open' else self.state
+        return {'state': state, 'failures': self.failures, 'opened_at': self.opened_at}
+
+
+class HostBreakers:
+    """One circuit breaker per host, saved between pipeline stages"""
+
+    def __init__(self, failure_threshold=3, reset_timeout=300, path=DEFAULT_BREAKER_PATH):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.path = path
+        self.breakers = {}
+
+    def for_host(self, host):
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[host]
+
+    def for_url(self, url):
+        return self.for_host(host_of(url))
+
+    def open_hosts(self):
+        return sorted(host for host, breaker in self.breakers.items() if breaker.state != 'closed')
+
+    @classmethod
+    def load(cls, path=DEFAULT_BREAKER_PATH, **options):
+        registry = cls(path=path, **options)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return registry
+        for host, values in saved.items():
+            registry.breakers[host] = CircuitBreaker(registry.failure_threshold, registry.reset_timeout, **values)
+        return registry
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({host: breaker.to_dict() for host, breaker in self.breakers.items()}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+class ResilientSession(CachedSession):
+    """CachedSession whose network requests respect host breakers, retries and the run deadline
+
+    Fresh cache hits are still served when a host's breaker is open or the
+    deadline has passed; only requests that would go to the network are refused.
+    """
+
+    def __init__(self, cache=None, breakers=None, deadline=None, retries=2, default_timeout=15):
+        super().__init__(cache)
+        self.breakers = breakers or HostBreakers.load()
+        self.deadline = deadline or Deadline.from_env()
+        self.retries = retries
+        self.default_timeout = default_timeout
+
+    def network_get(self, url, params=None, **kwargs):
+        breaker = self.breakers.for_url(url)
+        timeout = kwargs.pop('timeout', None) or self.default_timeout
+        for attempt in range(self.retries + 1):
+            if self.deadline.expired():
+                raise DeadlineExceeded(f"Run deadline passed before fetching {url}")
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {host_of(url)}")
+
+            try:
+                response = super().network_get(url, params=params, timeout=self.deadline.timeout(timeout), **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if self.deadline.expired():
+                    # Cut off by the deadline rather than failed by the host
+                    raise
+                breaker.record_failure()
+                if attempt == self.retries:
+                    raise
+            else:
+                if not breaker.record_response(response.status_code) or attempt == self.retries:
+                    return response
+                response.close()
+
+            time.sleep(min(backoff_delay(attempt), self.deadline.remaining()))
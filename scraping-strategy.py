@@ -1,25 +1,43 @@
 #!/usr/bin/env python3
 """
 Kennedy Ogetto Data Scraping Strategy
-Comprehensive approach to gather information from various online sources
+Comprehensive approach to gather information from various online sources.
+The strategy expands into one search task per query x source, which
+search_matrix.SearchMatrixExecutor runs concurrently.
 """
 
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import json
-import time
-from datetime import datetime
-import re
-from urllib.parse import urljoin, urlparse
-import logging
+import os
+from urllib.parse import quote_plus, urlsplit
+
+from fetch_engine import AsyncFetcher
+from http_cache import HttpCache
+from search_matrix import SearchMatrixExecutor
+
+# Legal databases and court records are searched by name only
+NAME_QUERIES = ["Kennedy Ogetto", "Kennedy Ogeto"]
+LEGAL_SEARCH_PATHS = {
+    'http://kenyalaw.org': '/caselaw/search?q=',
+    'https://www.icc-cpi.int': '/search?q='
+}
+ACADEMIC_SEARCH_PATHS = {
+    'https://scholar.google.com': '/scholar?q=',
+    'https://www.jstor.org': '/action/doBasicSearch?Query=',
+    'https://papers.ssrn.com': '/sol3/results.cfm?txtKey_Words=',
+    'https://heinonline.org': '/HOL/LuceneSearch?terms='
+}
+YOUTUBE_SEARCH_URL = 'https://www.youtube.com/results?search_query='
 
 class OgettoDataScraper:
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # Search pages in flight overall and per source; each host also gets one request per 1/rate seconds
+        self.concurrency = int(os.getenv('FETCH_CONCURRENCY', '8'))
+        self.per_source = int(os.getenv('STRATEGY_PER_SOURCE', '2'))
+        self.host_rate = float(os.getenv('FETCH_HOST_RATE', '0.5'))
         
     def search_news_articles(self):
         """Search for news articles about Kennedy Ogetto"""
@@ -45,12 +63,11 @@ class OgettoDataScraper:
     
     def search_legal_databases(self):
         """Search legal databases and court records"""
+        # The UNICTR archives, the Sierra Leone Special Court and ICSID have no
+        # query-string search page, so they are not part of the plan
         legal_sources = [
             'http://kenyalaw.org',  # Kenya Law Reports
-            'https://www.icc-cpi.int',  # ICC documents
-            'https://unictr.irmct.org',  # UNICTR archives
-            'https://www.rscsl.org',  # Sierra Leone Special Court
-            'https://icsid.worldbank.org'  # ICSID cases
+            'https://www.icc-cpi.int'  # ICC documents
         ]
         return legal_sources
     
@@ -74,6 +91,61 @@ class OgettoDataScraper:
             'https://heinonline.org'
         ]
         return academic_sources
+    
+    def crawl_plan(self):
+        """Expand the strategy into search tasks: {'kind', 'source', 'query', 'url', 'base_url'}"""
+        tasks = []
+        
+        search_terms, sources = self.search_news_articles()
+        for term in search_terms:
+            for name, search_url in sources.items():
+                parts = urlsplit(search_url)
+                tasks.append({
+                    'kind': 'news', 'source': name, 'query': term,
+                    'url': f"{search_url}{quote_plus(term)}", 'base_url': f"{parts.scheme}://{parts.netloc}"
+                })
+        
+        for base_url in self.search_legal_databases():
+            for query in NAME_QUERIES:
+                tasks.append({
+                    'kind': 'legal', 'source': urlsplit(base_url).netloc, 'query': query,
+                    'url': f"{base_url}{LEGAL_SEARCH_PATHS[base_url]}{quote_plus(query)}", 'base_url': base_url
+                })
+        
+        for query in self.search_youtube_content():
+            tasks.append({
+                'kind': 'video', 'source': 'YouTube', 'query': query,
+                'url': f"{YOUTUBE_SEARCH_URL}{quote_plus(query)}", 'base_url': 'https://www.youtube.com'
+            })
+        
+        for base_url in self.search_academic_sources():
+            for query in NAME_QUERIES:
+                tasks.append({
+                    'kind': 'academic', 'source': urlsplit(base_url).netloc, 'query': query,
+                    'url': f"{base_url}{ACADEMIC_SEARCH_PATHS[base_url]}{quote_plus(query)}", 'base_url': base_url
+                })
+        return tasks
+    
+    async def run(self):
+        """Run the whole plan, printing results as they arrive; returns (results, failed tasks)"""
+        tasks = self.crawl_plan()
+        print(f"Running {len(tasks)} searches...")
+        async with AsyncFetcher(concurrency=self.concurrency, host_rate=self.host_rate,
+                                headers=self.headers, cache=HttpCache()) as fetcher:
+            executor = SearchMatrixExecutor(fetcher, per_source=self.per_source)
+            async for result in executor.stream(tasks):
+                print(f"[{result['kind']}] {result['source']}: {result['title']}")
+            fetcher.breakers.save()
+        return executor.results, executor.failed
 
-# Example usage
-scraper = OgettoDataScraper()
\ No newline at end of file
+if __name__ == "__main__":
+    scraper = OgettoDataScraper()
+    results, failed = asyncio.run(scraper.run())
+    
+    os.makedirs('data/scraped', exist_ok=True)
+    with open('data/scraped/strategy_results.json', 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    
+    print(f"\n{len(results)} unique results saved to data/scraped/strategy_results.json")
+    if failed:
+        print(f"{len(failed)} searches failed: {', '.join(sorted({task['source'] for task in failed}))}")
\ No newline at end of file
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Search Matrix Executor
+Runs a query x source search plan concurrently, with a cap on requests
+in flight per source, and streams result links out as each search page
+is parsed, one result per URL across the whole matrix
+"""
+
+import asyncio
+import re
+from datetime import datetime
+
+from article_parser import LEGAL_KEYWORDS, NAME_KEYWORDS, find_article_links
+from resilience import host_of
+from search_queries import ResultMerger
+
+NEWS_LINK_SELECTORS = [
+    'a[href*="ogetto"]', 'a[href*="ogeto"]',
+    '.article-title a', '.headline a', '.story-title a',
+    'h2 a', 'h3 a', '.entry-title a'
+]
+RESULT_LINK_SELECTORS = ['.search-result a', '.views-row a', '.case-result a', '.gs_rt a', 'h3 a', 'tr a']
+YOUTUBE_VIDEO_PATTERN = re.compile(r'"title":\{"runs":\[\{"text":"([^"]+)"\}.*?"videoId":"([\w-]{11})"')
+
+# kind: (link selectors, title keywords or None for every link, links per selector, links per page)
+LINK_RULES = {
+    'news': (NEWS_LINK_SELECTORS, NAME_KEYWORDS, 3, None),
+    'legal': (RESULT_LINK_SELECTORS, LEGAL_KEYWORDS, 5, 5),
+    'academic': (RESULT_LINK_SELECTORS, NAME_KEYWORDS, 5, 10)
+}
+# Sources whose search pages list nothing but matching results, so every result link is kept
+UNFILTERED_SOURCES = {'kenyalaw.org'}
+
+
+def parse_video_results(text, limit=5):
+    videos = []
+    for title, video_id in YOUTUBE_VIDEO_PATTERN.findall(text)[:limit]:
+        if any(keyword in title.lower() for keyword in NAME_KEYWORDS):
+            videos.append({'title': title, 'url': f"https://www.youtube.com/watch?v={video_id}"})
+    return videos
+
+
+def parse_search_page(task, response):
+    """Result links on one search page, tagged with the task's kind, source and query"""
+    if task['kind'] == 'video':
+        links = parse_video_results(response['text'])
+    else:
+        selectors, keywords, per_selector, limit = LINK_RULES[task['kind']]
+        if task['source'] in UNFILTERED_SOURCES:
+            keywords = None
+        links = find_article_links(response['content'], task['base_url'], selectors,
+                                   keywords=keywords, per_selector=per_selector, limit=limit)
+    found = datetime.now().strftime('%Y-%m-%d')
+    return [
+        dict(link, source=task['source'], kind=task['kind'], query=task['query'], date=found)
+        for link in links
+    ]
+
+
+class SearchMatrixExecutor:
+    def __init__(self, fetcher, per_source=2):
+        """
+        fetcher: an open fetch_engine.AsyncFetcher (global concurrency, host rate limits, breakers)
+        per_source: search pages in flight at once for any one source host
+        """
+        self.fetcher = fetcher
+        self.per_source = per_source
+        self.source_slots = {}
+        self.merger = ResultMerger()
+        self.failed = []
+
+    @property
+    def results(self):
+        """Every unique result so far, with all the queries that found it"""
+        return list(self.merger.by_url.values())
+
+    def slots_for(self, task):
+        source = host_of(task['url'])
+        if source not in self.source_slots:
+            self.source_slots[source] = asyncio.Semaphore(self.per_source)
+        return self.source_slots[source]
+
+    async def run_task(self, task):
+        """Fetch and parse one search page; a failure is recorded and yields no results"""
+        try:
+            async with self.slots_for(task):
+                response = await self.fetcher.fetch(task['url'])
+            if not response or response['status'] != 200:
+                self.failed.append(task)
+                return []
+            return await asyncio.to_thread(parse_search_page, task, response)
+        except Exception as e:
+            print(f"Error searching {task['source']} for {task['query']}: {e}")
+            self.failed.append(task)
+            return []
+
+    async def stream(self, tasks):
+        """Yield each result whose URL is new as soon as its search page is parsed"""
+        pending = [asyncio.ensure_future(self.run_task(task)) for task in tasks]
+        try:
+            for finished in asyncio.as_completed(pending):
+                for result in await finished:
+                    result = self.merger.add(result)
+                    if result is not None:
+                        yield result
+        finally:
+            # The consumer may stop early; searches it no longer needs are dropped
+            for future in pending:
+                future.cancel()
+
+    async def collect(self, tasks):
+        """Run the whole matrix and return the merged results"""
+        async for _ in self.stream(tasks):
+            pass
+        return self.results
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Search Queries
+The list of search queries a scraper run covers, handed from
+AutomatedScraper to each pipeline stage, and the cross-query merge of
+search results so every article URL is fetched once
+"""
+
+import os
+
+QUERIES_ENV = 'SCRAPE_QUERIES'
+
+
+def configured_queries():
+    """Queries for this run, one per line of SCRAPE_QUERIES, or None for each source's default query"""
+    value = os.getenv(QUERIES_ENV, '')
+    queries = [query.strip() for query in value.splitlines() if query.strip()]
+    return queries or None
+
+
+def queries_env(queries):
+    """Environment entries that hand queries to a pipeline stage"""
+    return {QUERIES_ENV: '\n'.join(queries)} if queries else {}
+
+
+class ResultMerger:
+    """Incremental union of search results by URL, for results that arrive as a stream"""
+
+    def __init__(self, url_key='url'):
+        self.url_key = url_key
+        self.by_url = {}
+
+    def add(self, result):
+        """Return the result if its URL is new, else None after noting the extra query on the kept one
+
+        Each kept result lists every query that found it under 'queries'.
+        """
+        url = result.get(self.url_key)
+        query = result.get('query')
+        if url and url in self.by_url:
+            kept = self.by_url[url]
+            if query and query not in kept['queries']:
+                kept['queries'].append(query)
+            return None
+        result = dict(result, queries=[query] if query else [])
+        if url:
+            self.by_url[url] = result
+        return result
+
+
+def merge_results(results, url_key='url'):
+    """Union search results across queries and sources, keeping the first result per URL
+
+    Results without a URL are never merged.
+    """
+    merger = ResultMerger(url_key)
+    return [merged for merged in map(merger.add, results) if merged is not None]
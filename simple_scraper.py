@@ -4,21 +4,32 @@ Simple Kennedy Ogetto Web Scraper
 Focuses on scraping real data from accessible sources
 """
 
-import requests
-from bs4 import BeautifulSoup
 import json
 import time
 from datetime import datetime
 import re
 from blog_template_generator import BlogPostGenerator
 from timeline_processor import TimelineProcessor
+from http_cache import HttpCache
+from resilience import ResilientSession
+from html_parsing import parse_html
+from content_extractor import default_content_extractor
+from search_queries import configured_queries, merge_results
+from pdf_ingest import ingest_pdfs, is_pdf_url, judgment_record
+from crawl_state import CrawlState, append_pending, configured_revisit_days
+from content_fingerprints import DerivedContentStore
 
 class SimpleOgettoScraper:
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        self.session = requests.Session()
+        self.session = ResilientSession(HttpCache())
+        self.crawl_state = CrawlState('simple_scraper', revisit_days=configured_revisit_days())
+        self.derived_content = DerivedContentStore('simple_scraper')
+        self.content_extractor = default_content_extractor
+        # None searches each source with its own default query
+        self.queries = configured_queries()
         self.session.headers.update(self.headers)
         self.blog_generator = BlogPostGenerator()
         self.timeline_processor = TimelineProcessor()
@@ -31,18 +42,18 @@ class SimpleOgettoScraper:
             
             response = self.session.get(search_url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+                document = parse_html(response.content, selectors=['article'])
                 articles = []
                 
                 # Find article elements (this may need adjustment based on Google's current structure)
-                article_elements = soup.find_all('article')[:num_results]
+                article_elements = document.select('article')[:num_results]
                 
                 for article in article_elements:
                     try:
-                        title_elem = article.find('h3') or article.find('h4')
-                        title = title_elem.get_text().strip() if title_elem else "No title"
+                        title_elem = article.select_one('h3') or article.select_one('h4')
+                        title = title_elem.text().strip() if title_elem else "No title"
                         
-                        link_elem = article.find('a')
+                        link_elem = article.select_one('a')
                         link = link_elem.get('href') if link_elem else ""
                         
                         # Clean up Google News redirect links
@@ -53,7 +64,8 @@ class SimpleOgettoScraper:
                             'title': title,
                             'url': link,
                             'source': 'Google News',
-                            'date': datetime.now().strftime('%Y-%m-%d')
+                            'date': datetime.now().strftime('%Y-%m-%d'),
+                            'query': query
                         })
                     except Exception as e:
                         print(f"Error parsing article: {e}")
@@ -68,30 +80,30 @@ class SimpleOgettoScraper:
             print(f"Error searching Google News: {e}")
             return []
     
-    def scrape_kenya_law(self):
+    def scrape_kenya_law(self, query='Kennedy Ogetto'):
         """Scrape Kenya Law for legal documents mentioning Kennedy Ogetto"""
         try:
             # Kenya Law search URL
             search_url = "http://kenyalaw.org/caselaw/search"
             params = {
-                'q': 'Kennedy Ogetto',
+                'q': query,
                 'type': 'all'
             }
             
             response = self.session.get(search_url, params=params, timeout=10)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+                document = parse_html(response.content, selectors=['div.case-result', 'tr'])
                 cases = []
                 
                 # Look for case results
-                case_elements = soup.find_all('div', class_='case-result') or soup.find_all('tr')
+                case_elements = document.select('div.case-result') or document.select('tr')
                 
                 for case in case_elements[:5]:  # Limit to 5 results
                     try:
-                        title_elem = case.find('a') or case.find('td')
+                        title_elem = case.select_one('a') or case.select_one('td')
                         if title_elem:
-                            title = title_elem.get_text().strip()
-                            link = title_elem.get('href', '') if case.find('a') else ''
+                            title = title_elem.text().strip()
+                            link = title_elem.get('href', '') if case.select_one('a') else ''
                             
                             if 'ogetto' in title.lower() or 'ogeto' in title.lower():
                                 cases.append({
@@ -99,7 +111,8 @@ class SimpleOgettoScraper:
                                     'url': f"http://kenyalaw.org{link}" if link.startswith('/') else link,
                                     'source': 'Kenya Law',
                                     'type': 'Legal Document',
-                                    'date': datetime.now().strftime('%Y-%m-%d')
+                                    'date': datetime.now().strftime('%Y-%m-%d'),
+                                    'query': query
                                 })
                     except Exception as e:
                         continue
@@ -113,12 +126,12 @@ class SimpleOgettoScraper:
             print(f"Error scraping Kenya Law: {e}")
             return []
     
-    def scrape_youtube_search(self):
+    def scrape_youtube_search(self, query='Kennedy Ogetto lawyer Kenya'):
         """Search YouTube for Kennedy Ogetto videos"""
         try:
             # YouTube search URL (this will return HTML, not API results)
             search_url = "https://www.youtube.com/results"
-            params = {'search_query': 'Kennedy Ogetto lawyer Kenya'}
+            params = {'search_query': query}
             
             response = self.session.get(search_url, params=params, timeout=10)
             if response.status_code == 200:
@@ -137,7 +150,8 @@ class SimpleOgettoScraper:
                             'url': f"https://www.youtube.com/watch?v={video_id}",
                             'source': 'YouTube',
                             'type': 'Video',
-                            'date': datetime.now().strftime('%Y-%m-%d')
+                            'date': datetime.now().strftime('%Y-%m-%d'),
+                            'query': query
                         })
                 
                 return videos
@@ -154,24 +168,8 @@ class SimpleOgettoScraper:
         try:
             response = self.session.get(url, timeout=10)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Common content selectors for news sites
-                content_selectors = [
-                    'article', '.article-content', '.post-content', 
-                    '.entry-content', '.content', 'main', '.story-body'
-                ]
-                
-                content = ""
-                for selector in content_selectors:
-                    content_elem = soup.select_one(selector)
-                    if content_elem:
-                        # Extract text and clean it up
-                        content = content_elem.get_text().strip()
-                        # Remove extra whitespace
-                        content = re.sub(r'\s+', ' ', content)
-                        break
-                
+                # Scores the page's blocks, or reuses the selector learned for this site
+                _, content = self.content_extractor.extract(response.content, url)
                 return content[:2000] if content else "Content not available"
             else:
                 return "Content not accessible"
@@ -186,82 +184,134 @@ class SimpleOgettoScraper:
         
         all_results = []
         
-        # Search Google News
-        print("Searching Google News...")
-        news_results = self.search_google_news("Kennedy Ogetto Kenya lawyer")
-        all_results.extend(news_results)
-        time.sleep(2)  # Be respectful with requests
-        
-        # Search Kenya Law
-        print("Searching Kenya Law...")
-        legal_results = self.scrape_kenya_law()
-        all_results.extend(legal_results)
-        time.sleep(2)
+        # Every query on every source; each source keeps its own default query when none are configured
+        for query in self.queries or [None]:
+            query_args = (query,) if query else ()
+            
+            # Search Google News
+            print(f"Searching Google News{f' for {query}' if query else ''}...")
+            news_results = self.search_google_news(query or "Kennedy Ogetto Kenya lawyer")
+            all_results.extend(news_results)
+            time.sleep(min(2, self.session.deadline.remaining()))  # Be respectful with requests
+            
+            # Search Kenya Law
+            print("Searching Kenya Law...")
+            legal_results = self.scrape_kenya_law(*query_args)
+            all_results.extend(legal_results)
+            time.sleep(min(2, self.session.deadline.remaining()))
+            
+            # Search YouTube
+            print("Searching YouTube...")
+            video_results = self.scrape_youtube_search(*query_args)
+            all_results.extend(video_results)
         
-        # Search YouTube
-        print("Searching YouTube...")
-        video_results = self.scrape_youtube_search()
-        all_results.extend(video_results)
+        # One result per URL across queries, then skip results extracted on earlier runs
+        found = len(all_results)
+        all_results = merge_results(all_results)
+        unique = len(all_results)
+        all_results = self.crawl_state.new_items(all_results)
+        print(f"Found {found} total results, {unique} unique, {len(all_results)} not seen before")
         
-        print(f"Found {len(all_results)} total results")
+        # Judgment PDFs are read in one batch: concurrent streamed downloads, pages read across a process pool
+        pdf_urls = [result['url'] for result in all_results if result.get('url') and is_pdf_url(result['url'])]
+        judgments = {}
+        if pdf_urls:
+            print(f"Reading {len(pdf_urls)} judgment PDFs...")
+            judgments = dict(zip(pdf_urls, ingest_pdfs(
+                pdf_urls, headers=self.headers, cache=self.session.cache,
+                breakers=self.session.breakers, deadline=self.session.deadline
+            )))
         
-        # Process results into blog posts and timeline entries
-        blog_posts = []
-        timeline_entries = []
+        # Extract content and collect timeline records
+        timeline_records = []
         
         for result in all_results:
-            if result.get('url') and not result['url'].startswith('https://news.google.com'):
+            related_cases = None
+            if result.get('url') in judgments:
+                judgment = judgments[result['url']]
+                if judgment:
+                    record = judgment_record(judgment, result['title'], result.get('source'))
+                    content = record['content']
+                    related_cases = record['related_cases']
+                    # The judgment's own date, rather than the day it was found
+                    result['date'] = record['date']
+                else:
+                    content = "Content extraction failed"
+            elif result.get('url') and not result['url'].startswith('https://news.google.com'):
                 # Extract content for non-Google News links
                 content = self.extract_article_content(result['url'])
-                time.sleep(1)  # Rate limiting
+                time.sleep(min(1, self.session.deadline.remaining()))  # Rate limiting
             else:
                 content = f"Article about Kennedy Ogetto from {result.get('source', 'Unknown source')}"
             
-            # Generate blog post
-            blog_post = self.blog_generator.generate_blog_post(
-                title=result['title'],
-                content=content,
-                date=result.get('date', datetime.now().strftime('%Y-%m-%d')),
-                sources=[{
-                    'url': result['url'],
-                    'title': result['title'],
-                    'publication': result.get('source', 'Unknown'),
-                    'date': result.get('date', datetime.now().strftime('%Y-%m-%d')),
-                    'type': result.get('type', 'Article')
-                }]
-            )
-            blog_posts.append(blog_post)
+            date = result.get('date', datetime.now().strftime('%Y-%m-%d'))
+            sources = [{
+                'url': result['url'],
+                'title': result['title'],
+                'publication': result.get('source', 'Unknown'),
+                'date': date,
+                'type': result.get('type', 'Article')
+            }]
+            
+            timeline_records.append({
+                'title': result['title'],
+                'content': content,
+                'date': date,
+                'sources': sources,
+                'related_cases': related_cases
+            })
             
-            # Generate timeline entry
-            timeline_entry = self.timeline_processor.create_timeline_entry(
-                title=result['title'],
-                content=content,
-                date=result.get('date', datetime.now().strftime('%Y-%m-%d')),
-                sources=[{
-                    'url': result['url'],
-                    'title': result['title'],
-                    'publication': result.get('source', 'Unknown'),
-                    'date': result.get('date', datetime.now().strftime('%Y-%m-%d')),
-                    'type': result.get('type', 'Article')
-                }]
+            if result.get('url') and content not in ("Content not accessible", "Content extraction failed"):
+                self.crawl_state.mark_seen(result['url'], result.get('source'))
+        
+        self.session.breakers.save()
+        self.content_extractor.save()
+        
+        # Results whose text is unchanged since they were last processed reuse their blog post and entry
+        reused, pending = self.derived_content.partition(
+            timeline_records, lambda record: record['sources'][0]['url'],
+            lambda record: (record['title'], record['content'])
+        )
+        blog_posts = [None] * len(timeline_records)
+        timeline_entries = [None] * len(timeline_records)
+        for index, derived in reused.items():
+            blog_posts[index] = derived['blog_post']
+            timeline_entries[index] = derived['timeline_entry']
+        
+        for index, record, _ in pending:
+            # Generate blog post
+            blog_posts[index] = self.blog_generator.generate_blog_post(
+                title=record['title'],
+                content=record['content'],
+                date=record['date'],
+                sources=record['sources']
             )
-            timeline_entries.append(timeline_entry)
+        
+        # Generate timeline entries in one batch
+        new_entries = self.timeline_processor.create_timeline_entries([record for _, record, _ in pending])
+        for (index, record, fingerprint), entry in zip(pending, new_entries):
+            timeline_entries[index] = entry
+            self.derived_content.put(record['sources'][0]['url'], fingerprint,
+                                     {'blog_post': blog_posts[index], 'timeline_entry': entry})
         
         return blog_posts, timeline_entries, all_results
     
     def save_results(self, blog_posts, timeline_entries, raw_results):
-        """Save results to files"""
+        """Save results to files
+        
+        Each file gains this run's items rather than being overwritten, so
+        results a later stage has not consumed yet survive into the next run.
+        """
         # Save raw results
-        with open('data/scraped/raw_results.json', 'w', encoding='utf-8') as f:
-            json.dump(raw_results, f, indent=2, ensure_ascii=False)
+        append_pending('data/scraped/raw_results.json', raw_results)
         
         # Save processed blog posts
-        with open('data/processed/new_blog_posts.json', 'w', encoding='utf-8') as f:
-            json.dump(blog_posts, f, indent=2, ensure_ascii=False)
+        append_pending('data/processed/new_blog_posts.json', blog_posts)
         
         # Save processed timeline entries
-        with open('data/processed/new_timeline_entries.json', 'w', encoding='utf-8') as f:
-            json.dump(timeline_entries, f, indent=2, ensure_ascii=False)
+        append_pending('data/processed/new_timeline_entries.json', timeline_entries)
+        # Seen URLs are only stored once their entries are on disk, so a failed run extracts them again
+        self.crawl_state.save()
         
         print(f"Saved {len(blog_posts)} blog posts and {len(timeline_entries)} timeline entries")
 
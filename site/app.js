@@ -8,6 +8,18 @@ const state = {
   filters: { category: '', year: '' },
 };
 
+// Search runs in a worker over the prebuilt index in data/search (build_search_index.py)
+const search = {
+  worker: null,
+  latest: { timeline: 0, blog: 0, company: 0 },
+  seq: 0,
+};
+
+// Must match post_doc_id() in build_search_index.py
+function docId(panel, p) {
+  return `${panel}:${p.post_id || p.slug || p.title || ''}`;
+}
+
 function categoryColor(category) {
   const map = {
     'Constitutional Law': 'dot-constitutional',
@@ -62,6 +74,7 @@ function renderTimeline() {
     if (!entryMatchesFilters(p)) return;
     const li = document.createElement('li');
     li.className = 'timeline-item';
+    li.dataset.docId = docId('timeline', p);
     const dot = categoryColor(p.category);
     const date = p.publication_date || '';
     li.innerHTML = `
@@ -101,6 +114,7 @@ function renderBlog() {
     if (!entryMatchesFilters(p)) return;
     const card = document.createElement('article');
     card.className = 'card';
+    card.dataset.docId = docId('blog', p);
     const dot = categoryColor(p.category);
     card.innerHTML = `
       <div class="meta"><span class="dot ${dot}"></span> <span class="badge">${p.category||''}</span> · <span>${p.publication_date||''}</span></div>
@@ -140,7 +154,7 @@ function renderCompany() {
   container.innerHTML = `
     <div style="padding: 16px;">
       <!-- Firm Overview -->
-      <section class="company-section">
+      <section class="company-section" data-doc-id="company:overview">
         <h2 style="color: var(--brand); margin-bottom: 16px;">${company.firm_name}</h2>
         <p style="margin-bottom: 16px; font-size: 16px; line-height: 1.6;">${company.firm_description}</p>
         <div style="background: var(--panel); padding: 12px; border-radius: 8px; margin-bottom: 24px;">
@@ -149,7 +163,7 @@ function renderCompany() {
       </section>
 
       <!-- Vision & Mission -->
-      <section class="company-section">
+      <section class="company-section" data-doc-id="company:vision">
         <h3 style="color: var(--brand); margin-bottom: 12px;">Vision & Mission</h3>
         <div style="display: grid; gap: 16px; margin-bottom: 24px;">
           <div style="background: var(--panel); padding: 12px; border-radius: 8px;">
@@ -162,7 +176,7 @@ function renderCompany() {
       </section>
 
       <!-- Founding Partners -->
-      <section class="company-section">
+      <section class="company-section" data-doc-id="company:partners">
         <h3 style="color: var(--brand); margin-bottom: 16px;">Founding Partners</h3>
         <div style="display: grid; gap: 16px; margin-bottom: 24px;">
           ${company.founding_partners.map(partner => `
@@ -196,7 +210,7 @@ function renderCompany() {
       </section>
 
       <!-- Values -->
-      <section class="company-section">
+      <section class="company-section" data-doc-id="company:values">
         <h3 style="color: var(--brand); margin-bottom: 12px;">Our Values</h3>
         <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 12px; margin-bottom: 24px;">
           ${company.values.map(value => `
@@ -208,7 +222,7 @@ function renderCompany() {
       </section>
 
       <!-- Practice Areas -->
-      <section class="company-section">
+      <section class="company-section" data-doc-id="company:practice">
         <h3 style="color: var(--brand); margin-bottom: 16px;">Areas of Practice</h3>
         <div style="display: grid; gap: 16px;">
           ${company.areas_of_practice.map(area => `
@@ -257,7 +271,7 @@ function renderCompany() {
       </section>
 
       <!-- Pro Bono -->
-      <section class="company-section">
+      <section class="company-section" data-doc-id="company:probono">
         <h3 style="color: var(--brand); margin-bottom: 12px;">Pro Bono Services</h3>
         <div style="background: var(--panel); padding: 16px; border-radius: 8px;">
           <p style="margin-bottom: 12px;">${company.areas_of_practice.find(area => area.name === 'Pro Bono Services')?.description || ''}</p>
@@ -355,27 +369,61 @@ function wireUI() {
   });
 }
 
+const searchTargets = {
+  timeline: () => $$('.timeline-item', $('#timelineList')),
+  blog: () => $$('.card', $('#blogGrid')),
+  company: () => $$('.company-section', $('#companyContent')),
+};
+
+function initSearch() {
+  if (!window.Worker) return;
+  try {
+    search.worker = new Worker('./search-worker.js');
+    search.worker.addEventListener('message', onSearchResults);
+  } catch (err) {
+    console.warn('Search worker unavailable, using in-page search:', err);
+    search.worker = null;
+  }
+}
+
+function showMatches(which, isMatch) {
+  searchTargets[which]().forEach(el => {
+    el.style.display = isMatch(el) ? '' : 'none';
+  });
+}
+
+// Fallback when the worker or index is unavailable: scan the rendered text
+function scanSearch(q, which) {
+  showMatches(which, el => el.textContent.toLowerCase().includes(q));
+}
+
 function doSearch(q, which) {
-  q = (q||'').trim().toLowerCase();
-  if (which === 'timeline') {
-    const list = $('#timelineList');
-    $$('.timeline-item', list).forEach(item => {
-      const txt = item.textContent.toLowerCase();
-      item.style.display = txt.includes(q) ? '' : 'none';
-    });
-  } else if (which === 'blog') {
-    const grid = $('#blogGrid');
-    $$('.card', grid).forEach(card => {
-      const txt = card.textContent.toLowerCase();
-      card.style.display = txt.includes(q) ? '' : 'none';
-    });
-  } else if (which === 'company') {
-    const container = $('#companyContent');
-    $$('.company-section', container).forEach(section => {
-      const txt = section.textContent.toLowerCase();
-      section.style.display = txt.includes(q) ? '' : 'none';
-    });
+  const raw = q || '';
+  q = raw.trim().toLowerCase();
+  if (!q) {
+    search.latest[which] = 0;
+    showMatches(which, () => true);
+    return;
+  }
+  if (!search.worker) {
+    scanSearch(q, which);
+    return;
+  }
+  const id = ++search.seq;
+  search.latest[which] = id;
+  search.worker.postMessage({ id, query: raw.toLowerCase(), panel: which });
+}
+
+function onSearchResults(e) {
+  const { id, panel, docIds } = e.data;
+  // Ignore answers to queries the user has already typed past
+  if (search.latest[panel] !== id) return;
+  if (docIds === null) {
+    scanSearch(($(`#${panel}Search`)?.value || '').trim().toLowerCase(), panel);
+    return;
   }
+  const hits = new Set(docIds);
+  showMatches(panel, el => hits.has(el.dataset.docId));
 }
 
 function refresh() {
@@ -524,6 +572,7 @@ window.printModalContent = printModalContent;
 window.toggleMobileMenu = toggleMobileMenu;
 
 (async function init(){
+  initSearch();
   await loadData();
   buildFilters();
   wireUI();
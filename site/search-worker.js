@@ -0,0 +1,88 @@
+// Search worker: loads the prebuilt index from data/search (see build_search_index.py)
+// one prefix shard at a time and answers queries off the main thread.
+
+const INDEX_DIR = './data/search';
+
+const index = {
+  manifest: null,
+  shards: new Map(),
+};
+
+// Must match tokenize() in build_search_index.py
+function tokenize(text) {
+  return (text || '').toLowerCase().match(/[a-z0-9]+/g) || [];
+}
+
+async function loadManifest() {
+  if (!index.manifest) {
+    index.manifest = fetch(`${INDEX_DIR}/manifest.json`).then(r => r.json());
+  }
+  return index.manifest;
+}
+
+function loadShard(key) {
+  if (!index.shards.has(key)) {
+    index.shards.set(key, fetch(`${INDEX_DIR}/shard-${key}.json`).then(r => r.json()));
+  }
+  return index.shards.get(key);
+}
+
+// Shards that can hold a token (or, for the prefix token being typed, any token starting with it)
+function shardKeysFor(token, manifest) {
+  if (token.length >= 2) {
+    const key = token.slice(0, 2);
+    return manifest.shards.includes(key) ? [key] : [];
+  }
+  return manifest.shards.filter(key => key.startsWith(token));
+}
+
+async function scoreToken(token, isPrefix, manifest) {
+  const scores = new Map();
+  const shards = await Promise.all(shardKeysFor(token, manifest).map(loadShard));
+  shards.forEach(shard => {
+    const tokens = isPrefix ? Object.keys(shard).filter(t => t.startsWith(token)) : (shard[token] ? [token] : []);
+    tokens.forEach(t => {
+      shard[t].forEach(([doc, score]) => scores.set(doc, (scores.get(doc) || 0) + score));
+    });
+  });
+  return scores;
+}
+
+async function search(query, panel) {
+  const tokens = tokenize(query);
+  if (!tokens.length) return null;
+
+  const manifest = await loadManifest();
+  // The last token is still being typed, so it matches as a prefix
+  const prefixLast = !/\s$/.test(query);
+  const perToken = await Promise.all(tokens.map((token, i) =>
+    scoreToken(token, prefixLast && i === tokens.length - 1, manifest)));
+
+  // Every token must match (AND); a document's rank is its summed weighted score
+  perToken.sort((a, b) => a.size - b.size);
+  const totals = new Map(perToken[0]);
+  perToken.slice(1).forEach(scores => {
+    totals.forEach((total, doc) => {
+      if (scores.has(doc)) totals.set(doc, total + scores.get(doc));
+      else totals.delete(doc);
+    });
+  });
+
+  const prefix = panel ? `${panel}:` : '';
+  return Array.from(totals.entries())
+    .map(([doc, score]) => [manifest.docs[doc], score])
+    .filter(([docId]) => docId.startsWith(prefix))
+    .sort((a, b) => b[1] - a[1])
+    .map(([docId]) => docId);
+}
+
+self.onmessage = async (e) => {
+  const { id, query, panel } = e.data;
+  try {
+    const docIds = await search(query, panel);
+    self.postMessage({ id, panel, docIds });
+  } catch (err) {
+    // Let the page fall back to its own text scan
+    self.postMessage({ id, panel, docIds: null, error: String(err) });
+  }
+};
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Sitemap Discovery
+Finds article URLs from a site's robots.txt and XML sitemaps instead of
+its search pages. Sitemaps (plain, gzipped and sitemap indexes) are
+streamed through an incremental parser, so a large one never sits in
+memory, and entries are filtered by <lastmod> against the previous run
+and by URL or title keywords before any article is fetched.
+"""
+
+import os
+import zlib
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from article_parser import NAME_KEYWORDS
+from resilience import host_of
+
+DISCOVERY_ENV = 'SCRAPE_DISCOVERY'
+DISCOVERY_MODES = ('sitemap', 'search')
+DEFAULT_SITEMAP_PATH = '/sitemap.xml'
+GZIP_MAGIC = b'\x1f\x8b'
+CHUNK_SIZE = 64 * 1024
+# The sitemap protocol caps a sitemap at 50,000 URLs and 50 MB uncompressed
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+MAX_SITEMAPS = 50
+MAX_LINKS = 200
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+NEWS_TITLE_TAG = '{http://www.google.com/schemas/sitemap-news/0.9}title'
+
+
+def discovery_mode():
+    """'sitemap' (the default: sitemaps, with search pages for sites that publish none) or 'search'"""
+    mode = os.getenv(DISCOVERY_ENV, 'sitemap').strip().lower()
+    return mode if mode in DISCOVERY_MODES else 'sitemap'
+
+
+def sitemap_tag(tag):
+    """The local name of a sitemap-protocol element, or None for extensions such as <image:loc>"""
+    if tag.startswith(SITEMAP_NS):
+        return tag[len(SITEMAP_NS):]
+    return None if tag.startswith('{') else tag
+
+
+def normalize_lastmod(value):
+    """A W3C datetime as a UTC 'YYYY-MM-DDTHH:MM:SSZ' string that orders as text, or None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def mark_before(lastmod):
+    """The normalized lastmod one second earlier, the newest mark that still walks lastmod again"""
+    parsed = datetime.strptime(lastmod, '%Y-%m-%dT%H:%M:%SZ') - timedelta(seconds=1)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def title_from_url(url):
+    """A readable stand-in title from the URL slug, for sitemaps without news:title"""
+    segments = [segment for segment in urlsplit(url).path.split('/') if segment]
+    slug = segments[-1].rsplit('.', 1)[0] if segments else ''
+    # CMS slugs often end in a numeric article ID
+    words = [word for word in slug.replace('_', '-').split('-') if word and not word.isdigit()]
+    return ' '.join(words).capitalize() or url
+
+
+
+class SitemapStream:
+    """Incremental sitemap parser fed raw, possibly gzipped, chunks
+
+    Each <url> or <sitemap> entry is collected as a {'kind', 'loc',
+    'lastmod', 'title'} dict and cleared from the tree as soon as it ends,
+    so memory stays flat however long the sitemap is.
+    """
+
+    def __init__(self, max_bytes=MAX_SITEMAP_BYTES):
+        self.parser = XMLPullParser(events=('end',))
+        self.decompressor = None
+        self.started = False
+        self.stopped = False
+        self.failed = False
+        self.size = 0
+        self.max_bytes = max_bytes
+        self.entries = []
+        self.fields = {}
+
+    def feed(self, chunk):
+        """Parse one chunk; returns True once the body should be dropped (too large or malformed)"""
+        if not self.started:
+            self.started = True
+            # Content-Encoding: gzip is undone by the client, but .xml.gz files arrive compressed
+            if chunk.startswith(GZIP_MAGIC):
+                self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.decompressor is None:
+            return self.parse(chunk)
+        while chunk and not self.stopped:
+            # Inflate a bounded amount at a time so a gzip bomb hits the size cap early
+            self.parse(self.decompressor.decompress(chunk, CHUNK_SIZE))
+            chunk = self.decompressor.unconsumed_tail
+        return self.stopped
+
+    def parse(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            print(f"Sitemap larger than {self.max_bytes} bytes; reading stopped")
+            self.stopped = True
+            return True
+        try:
+            self.parser.feed(data)
+            self.collect()
+        except ParseError:
+            self.failed = self.stopped = True
+        return self.stopped
+
+    def collect(self):
+        for _, element in self.parser.read_events():
+            name = sitemap_tag(element.tag)
+            if name in ('loc', 'lastmod'):
+                self.fields.setdefault(name, (element.text or '').strip())
+            elif element.tag == NEWS_TITLE_TAG:
+                self.fields.setdefault('title', (element.text or '').strip())
+            elif name in ('url', 'sitemap'):
+                if self.fields.get('loc'):
+                    self.entries.append({
+                        'kind': name,
+                        'loc': self.fields['loc'],
+                        'lastmod': normalize_lastmod(self.fields.get('lastmod')),
+                        'title': self.fields.get('title') or None
+                    })
+                self.fields = {}
+                element.clear()
+
+    def finish(self):
+        """Parse whatever the decompressor still holds once the body has ended"""
+        if self.stopped:
+            return
+        try:
+            if self.decompressor is not None:
+                self.parser.feed(self.decompressor.flush())
+            self.parser.close()
+            self.collect()
+        except (ParseError, zlib.error):
+            self.failed = True
+
+    def drain(self):
+        entries, self.entries = self.entries, []
+        return entries
+
+
+class SitemapDiscovery:
+    def __init__(self, fetcher, crawl_state, keywords=NAME_KEYWORDS, max_sitemaps=MAX_SITEMAPS,
+                 max_links=MAX_LINKS):
+        """
+        fetcher: an open fetch_engine.AsyncFetcher; robots.txt is kept in its HTTP cache
+        crawl_state: crawl_state.CrawlState with the extracted URLs and each site's sitemap high-water mark
+        keywords: lowercase words one of which a URL or news:title must contain
+        max_sitemaps: sitemaps read per site, counting the index
+        max_links: newest matching links returned per site
+        """
+        self.fetcher = fetcher
+        self.crawl_state = crawl_state
+        self.keywords = keywords
+        self.max_sitemaps = max_sitemaps
+        self.max_links = max_links
+        self.marks = {}
+
+    async def robots(self, base_url):
+        """(robots.txt parser or None, the sitemap URLs it lists)"""
+        response = await self.fetcher.fetch(urljoin(base_url, '/robots.txt'))
+        if not response or response['status'] != 200:
+            return None, []
+        robots = RobotFileParser()
+        robots.parse(response['text'].splitlines())
+        return robots, list(robots.site_maps() or [])
+
+    async def read_sitemap(self, url):
+        """Stream one sitemap; returns its entries, or None if it could not be read in full"""
+        stream = SitemapStream()
+        status = await self.fetcher.stream(url, stream.feed, chunk_size=CHUNK_SIZE)
+        if status == 200:
+            stream.finish()
+        if status != 200 or stream.stopped or stream.failed:
+            print(f"Could not read sitemap {url}: {'malformed or oversized' if status == 200 else status}")
+            return None
+        return stream.drain()
+
+    def matches(self, entry):
+        text = f"{entry['loc']} {entry['title'] or ''}".lower()
+        return any(keyword in text for keyword in self.keywords)
+
+    async def discover(self, base_url, source_name):
+        """New matching article links on one site, newest first: [{'title', 'url', 'source', 'date', 'lastmod'}]
+
+        Child sitemaps and URLs whose lastmod is no newer than the last full
+        walk are skipped, as are URLs already extracted and URLs robots.txt
+        disallows. Returns None when no sitemap could be read, so the caller
+        can fall back to the site's search page.
+        """
+        robots, queue = await self.robots(base_url)
+        queue = queue or [urljoin(base_url, DEFAULT_SITEMAP_PATH)]
+        user_agent = self.fetcher.headers.get('User-Agent', '*')
+        mark_source = f"sitemap:{host_of(base_url)}"
+        since = self.crawl_state.high_water(mark_source)
+
+        links = []
+        newest = since
+        visited = set()
+        readable = 0
+        complete = True
+        while queue and len(visited) < self.max_sitemaps:
+            sitemap_url = queue.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            entries = await self.read_sitemap(sitemap_url)
+            if entries is None:
+                complete = False
+                continue
+            readable += 1
+
+            for entry in entries:
+                lastmod = entry['lastmod']
+                if since and lastmod and lastmod <= since:
+                    continue
+                if lastmod and (newest is None or lastmod > newest):
+                    newest = lastmod
+                if entry['kind'] == 'sitemap':
+                    queue.append(entry['loc'])
+                elif (self.matches(entry) and not self.crawl_state.is_seen(entry['loc'])
+                      and (robots is None or robots.can_fetch(user_agent, entry['loc']))):
+                    links.append({
+                        'title': entry['title'] or title_from_url(entry['loc']),
+                        'url': entry['loc'],
+                        'source': source_name,
+                        'date': lastmod[:10] if lastmod else datetime.now().strftime('%Y-%m-%d'),
+                        'lastmod': lastmod
+                    })
+
+        if not readable:
+            return None
+        # A walk cut short by a failed sitemap or the caps is repeated next run, so its mark is not kept
+        if complete and not queue and len(links) <= self.max_links and newest != since:
+            self.marks[source_name] = (mark_source, newest, links)
+        links.sort(key=lambda link: link['lastmod'] or '', reverse=True)
+        return links[:self.max_links]
+
+    def save(self, failed=()):
+        """Advance the mark of every fully walked site past the articles that were extracted
+
+        A link not extracted by now (marked seen in the crawl state) holds the
+        mark just below its lastmod, so it and everything newer is walked again.
+
+        failed: source names whose articles were not all extracted; their walk is repeated next run
+        """
+        for source_name, (mark_source, mark, links) in self.marks.items():
+            if source_name in failed:
+                continue
+            missed = [link['lastmod'] for link in links
+                      if link['lastmod'] and not self.crawl_state.is_seen(link['url'])]
+            if missed:
+                mark = mark_before(min(missed))
+            self.crawl_state.advance(mark_source, mark)
+        self.marks = {}
@@ -0,0 +1,39 @@
+from case_index import CaseIndex, canonicalize_reference, extract_case_ids
+
+
+def test_petition_reference_with_or_without_number_marker():
+    assert canonicalize_reference('Petition No.1 of 2022') == 'petition:1/2022'
+    assert canonicalize_reference('Petition 1 of 2022') == 'petition:1/2022'
+    assert canonicalize_reference('Petition Number 1 of 2022') == 'petition:1/2022'
+    assert canonicalize_reference('Petition No. E005 of 2022') == 'petition:E5/2022'
+
+
+def test_appeals_and_applications_are_canonicalized_by_kind():
+    text = ('Criminal Appeal 45 of 2019, then Civil Application No. 7 of 2020 '
+            'and Misc. Criminal Application Number 12 of 2021')
+    assert extract_case_ids(text) == [
+        'criminal-appeal:45/2019',
+        'civil-application:7/2020',
+        'misc-criminal-application:12/2021',
+    ]
+
+
+def test_other_citation_styles_and_prose():
+    assert extract_case_ids('ICSID Case No. ARB/15/29 and ICC-01/09-01/11-1') == [
+        'icsid:ARB/15/29',
+        'icc:01/09-01/11',
+    ]
+    assert extract_case_ids('Case No. 12 of 2020, cited again as case number 12 of 2020') == ['case:12/2020']
+    assert extract_case_ids('in case 5 witnesses fail to appear, or case no one attends') == []
+
+
+def test_index_lookup_accepts_any_spelling_of_a_reference():
+    index = CaseIndex.build(
+        [{'date': '2022-03-01', 'title': 'Ruling in Petition No. 1 of 2022', 'description': ''}],
+        [{'post_id': 'ogetto-petition-2022', 'title': 'Petition 1 of 2022 explained'}],
+    )
+    assert index.lookup('Petition 1 of 2022') == {
+        'timeline': [['2022-03-01', 'Ruling in Petition No. 1 of 2022']],
+        'blog_posts': ['ogetto-petition-2022'],
+    }
+    assert index.lookup('petition:1/2022') == index.lookup('Petition No.1 of 2022')
@@ -0,0 +1,36 @@
+from date_extractor import DateExtractor
+
+
+def test_parse_supported_formats():
+    extractor = DateExtractor()
+    assert extractor.parse('Published 2023-3-1 at noon') == '2023-03-01'
+    assert extractor.parse('Delivered this 12th day of March, 2023') == '2023-03-12'
+    assert extractor.parse('4 Sept. 2025') == '2025-09-04'
+    assert extractor.parse('September 4th, 2025') == '2025-09-04'
+    assert extractor.parse('no date here') is None
+    assert extractor.parse('') is None
+
+
+def test_numeric_dates_are_day_first_unless_unambiguous():
+    assert DateExtractor().parse('04/09/2025') == '2025-09-04'
+    assert DateExtractor(day_first=False).parse('04/09/2025') == '2025-04-09'
+    assert DateExtractor(day_first=False).parse('25/12/2024') == '2024-12-25'
+    assert DateExtractor().parse('12/25/2024') == '2024-12-25'
+
+
+def test_impossible_dates_are_skipped_for_the_next_real_one():
+    extractor = DateExtractor()
+    assert extractor.parse('31 February 2022, heard on 1 March 2022') == '2022-03-01'
+    assert extractor.parse('Ref 12024-01-01 and 2024-13-01') is None
+
+
+def test_find_all_reports_every_date_in_order():
+    found = DateExtractor().find_all('Filed 3 May 2019; judgment on June 14, 2019.')
+    assert [(match['date'], match['format']) for match in found] == [('2019-05-03', 'dmy'), ('2019-06-14', 'mdy')]
+    assert found[0]['text'] == '3 May 2019'
+
+
+def test_parse_many_keeps_input_order_and_skips_non_strings():
+    assert DateExtractor().parse_many(['2020-01-02', None, 'undated', 'Jan 5, 2021']) == [
+        '2020-01-02', None, None, '2021-01-05'
+    ]
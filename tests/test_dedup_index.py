@@ -0,0 +1,111 @@
+import json
+import os
+
+import pytest
+
+import dedup_index
+from dedup_index import DedupKeyIndex, blog_post_key, load_blog_keys, replace_records
+
+
+def write_blog(path, post_ids):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'blog': {'posts': [{'post_id': post_id} for post_id in post_ids]}}, f)
+
+
+@pytest.fixture
+def index(tmp_path):
+    key_index = DedupKeyIndex(str(tmp_path / 'keys.sqlite3'))
+    yield key_index
+    key_index.close()
+
+
+def test_filter_new_drops_indexed_keys_and_repeats(tmp_path, index):
+    path = str(tmp_path / 'blog.json')
+    write_blog(path, ['a', 'b'])
+    assert index.sync('blog_post_id', path, lambda: load_blog_keys(path))
+
+    posts = [{'post_id': 'b'}, {'post_id': 'c'}, {'post_id': 'c'}, {'post_id': 'd'}]
+    assert index.filter_new('blog_post_id', path, posts, blog_post_key) == [{'post_id': 'c'}, {'post_id': 'd'}]
+
+
+def test_sync_only_parses_the_file_when_it_changed(tmp_path, index):
+    path = str(tmp_path / 'blog.json')
+    write_blog(path, ['a'])
+    loads = []
+
+    def load_keys():
+        loads.append(path)
+        return load_blog_keys(path)
+
+    assert index.sync('blog_post_id', path, load_keys)
+    assert not index.sync('blog_post_id', path, load_keys)
+    write_blog(path, ['a', 'edited-elsewhere'])
+    assert index.sync('blog_post_id', path, load_keys)
+    assert len(loads) == 2
+    assert index.contains('blog_post_id', path, 'edited-elsewhere')
+
+
+def test_record_write_keeps_the_index_in_step_with_the_file(tmp_path, index):
+    path = str(tmp_path / 'blog.json')
+    site_path = str(tmp_path / 'site' / 'blog.json')
+    write_blog(path, ['a'])
+    index.sync('blog_post_id', path, lambda: load_blog_keys(path))
+    data = {'blog': {'posts': [{'post_id': 'a2'}, {'post_id': 'b'}]}}
+
+    index.record_write({'blog_post_id': ['a2', 'b']}, data, path, extra_paths=(site_path,),
+                       removed={'blog_post_id': ['a']})
+
+    assert index.is_synced('blog_post_id', path)
+    assert not index.contains('blog_post_id', path, 'a')
+    assert index.contains('blog_post_id', path, 'a2')
+    with open(site_path, encoding='utf-8') as f:
+        assert json.load(f) == data
+
+
+def test_a_failed_write_rolls_back_the_new_keys(tmp_path, index, monkeypatch):
+    path = str(tmp_path / 'blog.json')
+    write_blog(path, ['a'])
+    index.sync('blog_post_id', path, lambda: load_blog_keys(path))
+
+    def fail(data, json_path):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(dedup_index, 'write_json_atomic', fail)
+    with pytest.raises(OSError):
+        index.record_write({'blog_post_id': ['b']}, {}, path, removed={'blog_post_id': ['a']})
+
+    assert index.contains('blog_post_id', path, 'a')
+    assert not index.contains('blog_post_id', path, 'b')
+    assert not os.path.exists(f'{path}.tmp')
+
+
+def test_split_revisions_and_replace_records(tmp_path, index):
+    path = str(tmp_path / 'blog.json')
+    write_blog(path, ['a', 'b', 'c'])
+    index.sync('blog_post_id', path, lambda: load_blog_keys(path))
+    replacements = {
+        'a': {'post_id': 'a', 'title': 'Same key'},
+        'b': {'post_id': 'b2', 'title': 'New key'},
+        'c': {'post_id': 'a', 'title': 'Key taken by another post'},
+        'never-published': {'post_id': 'x'},
+    }
+
+    revised, unpublished = index.split_revisions('blog_post_id', path, replacements, blog_post_key)
+
+    assert sorted(revised) == ['a', 'b']
+    assert unpublished == [{'post_id': 'x'}]
+    posts = [{'post_id': 'a'}, {'post_id': 'b'}, {'post_id': 'c'}]
+    assert replace_records(posts, revised, blog_post_key) == ['a', 'b']
+    assert [post['post_id'] for post in posts] == ['a', 'b2', 'c']
+
+
+def test_key_set_checks_the_index_and_remembers_additions(tmp_path, index):
+    path = str(tmp_path / 'blog.json')
+    write_blog(path, ['a'])
+    index.sync('blog_post_id', path, lambda: load_blog_keys(path))
+    seen = index.key_set('blog_post_id', path)
+
+    seen.add('b')
+
+    assert 'a' in seen and 'b' in seen and 'c' not in seen
+    assert not index.contains('blog_post_id', path, 'b')
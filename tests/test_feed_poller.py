@@ -0,0 +1,129 @@
+import asyncio
+
+from crawl_state import CrawlState
+from feed_poller import FeedPoller, FeedStream, FeedValidators
+
+FEED_URL = 'https://news.example/rss.xml'
+FEED = {'name': 'Example News', 'url': FEED_URL}
+
+
+def rss(*items):
+    body = ''.join(
+        f'<item><title>{title}</title><link>https://news.example/{slug}</link>'
+        f'<pubDate>{published}</pubDate></item>'
+        for title, slug, published in items
+    )
+    return f'<?xml version="1.0"?><rss><channel><title>News</title>{body}</channel></rss>'.encode('utf-8')
+
+
+BODY = rss(
+    ('Ogeto sworn in', 'ogeto-sworn-in', 'Thu, 04 Sep 2025 10:00:00 +0300'),
+    ('Budget read', 'budget', 'Wed, 03 Sep 2025 09:00:00 +0300'),
+    ('Ogeto at the Supreme Court', 'ogeto-supreme-court', 'Tue, 02 Sep 2025 08:00:00 +0300'),
+    ('Ogeto appointed', 'ogeto-appointed', 'Mon, 01 Sep 2025 07:00:00 +0300'),
+)
+
+
+class StubFetcher:
+    def __init__(self, body, status=200, chunk_size=16):
+        self.body = body
+        self.status = status
+        self.chunk_size = chunk_size
+        self.sent_headers = []
+        self.bytes_fed = 0
+
+    async def stream(self, url, on_chunk, chunk_size=None, headers=None, on_headers=None):
+        self.sent_headers.append(headers)
+        if on_headers:
+            on_headers({'ETag': '"v2"'})
+        if self.status == 200:
+            for start in range(0, len(self.body), self.chunk_size):
+                chunk = self.body[start:start + self.chunk_size]
+                self.bytes_fed += len(chunk)
+                if on_chunk(chunk):
+                    break
+        return self.status
+
+
+def poller(tmp_path, fetcher):
+    crawl_state = CrawlState('feeds', path=str(tmp_path / 'state.sqlite3'))
+    validators = FeedValidators(str(tmp_path / 'validators.json'))
+    return FeedPoller(fetcher, crawl_state, feeds=[FEED], keywords=('ogeto',), validators=validators)
+
+
+def test_feed_stream_stops_when_asked():
+    seen = []
+    stream = FeedStream(lambda item: seen.append(item) or len(seen) == 2)
+    stopped = False
+    for start in range(0, len(BODY), 7):
+        stopped = stream.feed(BODY[start:start + 7])
+        if stopped:
+            break
+
+    assert stopped and not stream.failed
+    assert [item['url'] for item in seen] == ['https://news.example/ogeto-sworn-in', 'https://news.example/budget']
+    assert seen[0]['published'] == '2025-09-04T07:00:00Z'
+
+
+def test_feed_stream_reads_atom_alternate_links_and_flags_bad_xml():
+    atom = (b'<feed xmlns="http://www.w3.org/2005/Atom"><entry><title>Ruling</title>'
+            b'<link rel="edit" href="https://news.example/edit/1"/>'
+            b'<link href="https://news.example/ruling"/><id>tag:1</id>'
+            b'<updated>2025-09-04T10:00:00+03:00</updated></entry></feed>')
+    seen = []
+    FeedStream(seen.append).feed(atom)
+    assert seen == [{'title': 'Ruling', 'url': 'https://news.example/ruling', 'guid': 'tag:1',
+                     'published': '2025-09-04T07:00:00Z'}]
+
+    broken = FeedStream(seen.append)
+    assert broken.feed(b'<rss><channel><item></channel>') and broken.failed
+
+
+def test_poll_stops_at_the_high_water_mark(tmp_path):
+    fetcher = StubFetcher(BODY)
+    feed_poller = poller(tmp_path, fetcher)
+    feed_poller.crawl_state.advance('feed:Example News', '2025-09-02T05:00:00Z')
+
+    items = asyncio.run(feed_poller.poll())
+
+    assert [item['url'] for item in items] == ['https://news.example/ogeto-sworn-in']
+    # The last item was never downloaded
+    assert fetcher.bytes_fed < len(BODY)
+    feed_poller.save()
+    assert feed_poller.crawl_state.high_water('feed:Example News') == '2025-09-04T07:00:00Z'
+    assert feed_poller.validators.conditional_headers(FEED_URL) == {'If-None-Match': '"v2"'}
+
+
+def test_poll_stops_at_the_first_extracted_item(tmp_path):
+    feed_poller = poller(tmp_path, StubFetcher(BODY))
+    feed_poller.crawl_state.mark_seen('https://news.example/budget')
+
+    items = asyncio.run(feed_poller.poll())
+
+    assert [item['url'] for item in items] == ['https://news.example/ogeto-sworn-in']
+
+
+def test_retry_mode_reads_past_extracted_items_without_validators(tmp_path):
+    fetcher = StubFetcher(BODY)
+    feed_poller = poller(tmp_path, fetcher)
+    feed_poller.validators.update(FEED_URL, {'etag': '"v1"'})
+    feed_poller.crawl_state.mark_seen('https://news.example/ogeto-sworn-in')
+    feed_poller.save(failed={'Example News'})
+    assert feed_poller.validators.needs_retry(FEED_URL)
+
+    items = asyncio.run(feed_poller.poll())
+
+    assert fetcher.sent_headers == [{}]
+    assert [item['url'] for item in items] == [
+        'https://news.example/ogeto-supreme-court', 'https://news.example/ogeto-appointed'
+    ]
+    feed_poller.save()
+    assert not feed_poller.validators.needs_retry(FEED_URL)
+
+
+def test_unchanged_feed_yields_nothing(tmp_path):
+    feed_poller = poller(tmp_path, StubFetcher(BODY, status=304))
+    feed_poller.validators.update(FEED_URL, {'etag': '"v2"'})
+
+    assert asyncio.run(feed_poller.poll()) == []
+    assert feed_poller.pending == {}
@@ -0,0 +1,97 @@
+import requests
+
+from http_cache import CachedSession, HttpCache
+
+URL = 'https://kenyalaw.org/caselaw/cases/view/12345'
+
+
+def response(status, body=b'', headers=None):
+    result = requests.Response()
+    result.status_code = status
+    result.headers = requests.structures.CaseInsensitiveDict(headers or {})
+    result._content = body
+    result.url = URL
+    return result
+
+
+class ScriptedSession(CachedSession):
+    """CachedSession answering from a list of canned responses instead of the network"""
+
+    def __init__(self, cache, responses):
+        super().__init__(cache)
+        self.responses = list(responses)
+        self.sent = []
+
+    def network_get(self, url, params=None, **kwargs):
+        self.sent.append(kwargs.get('headers') or {})
+        return self.responses.pop(0)
+
+
+def stale_cache(tmp_path):
+    # No TTL applies, so every entry is stale and revalidated
+    return HttpCache(str(tmp_path / 'cache.sqlite3'), default_ttl=0, ttls={})
+
+
+def test_stale_entry_is_revalidated_and_served_on_304(tmp_path, monkeypatch):
+    monkeypatch.delenv('SCRAPE_REPLAY_SERVER', raising=False)
+    cache = stale_cache(tmp_path)
+    session = ScriptedSession(cache, [
+        response(200, b'<p>Judgment</p>', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Sep 2025 07:00:00 GMT',
+                                          'Content-Type': 'text/html; charset=utf-8'}),
+        response(304, headers={'ETag': '"v2"'}),
+    ])
+
+    first = session.get(URL)
+    second = session.get(URL)
+
+    assert not first.from_cache
+    assert session.sent[1] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Sep 2025 07:00:00 GMT'}
+    assert second.from_cache
+    assert second.status_code == 200
+    assert second.text == '<p>Judgment</p>'
+    # The 304's validators replace the stored ones for the next revalidation
+    assert cache.conditional_headers(cache.lookup(URL))['If-None-Match'] == '"v2"'
+
+
+def test_changed_page_replaces_the_entry(tmp_path, monkeypatch):
+    monkeypatch.delenv('SCRAPE_REPLAY_SERVER', raising=False)
+    cache = stale_cache(tmp_path)
+    session = ScriptedSession(cache, [
+        response(200, b'old', {'ETag': '"v1"'}),
+        response(200, b'new', {'ETag': '"v2"'}),
+    ])
+
+    session.get(URL)
+    updated = session.get(URL)
+
+    assert not updated.from_cache
+    assert cache.lookup(URL)['body'] == b'new'
+
+
+def test_fresh_entry_is_served_without_a_request(tmp_path, monkeypatch):
+    monkeypatch.delenv('SCRAPE_REPLAY_SERVER', raising=False)
+    cache = HttpCache(str(tmp_path / 'cache.sqlite3'))
+    session = ScriptedSession(cache, [response(200, b'body', {'ETag': '"v1"'})])
+
+    session.get(URL)
+    cached = session.get(URL)
+
+    assert cached.from_cache and cached.content == b'body'
+    assert len(session.sent) == 1
+
+
+def test_uncacheable_responses_are_not_stored(tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache.sqlite3'))
+    assert not cache.store(URL, {}, 200, {'Cache-Control': 'no-store'}, b'x')
+    assert not cache.store(URL, {}, 404, {}, b'x')
+    assert not cache.store(URL, {}, 200, {'Vary': '*'}, b'x')
+    assert cache.lookup(URL) is None
+
+
+def test_vary_headers_keep_variants_apart(tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache.sqlite3'))
+    cache.store(URL, {'Accept-Language': 'en'}, 200, {'Vary': 'Accept-Language'}, b'english')
+    cache.store(URL, {'Accept-Language': 'sw'}, 200, {'Vary': 'Accept-Language'}, b'kiswahili')
+
+    assert cache.lookup(URL, {'Accept-Language': 'sw'})['body'] == b'kiswahili'
+    assert cache.lookup(URL, {'Accept-Language': 'en'})['body'] == b'english'
@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+JUDGMENT_URL = 'http://kenyalaw.org/caselaw/judgments/petition-3-2019.pdf'
+SEARCH_PAGE = b"""<html><body><table>
+<tr><td><a href="/caselaw/judgments/petition-3-2019.pdf">Republic v Ogetto</a></td></tr>
+</table></body></html>"""
+
+
+class StubFetcher:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    async def fetch(self, url, params=None, timeout=None, headers=None):
+        self.requested.append(url)
+        if url not in self.pages:
+            return {'url': url, 'status': 404, 'content': b'', 'text': '', 'from_cache': False}
+        content = self.pages[url]
+        return {'url': url, 'status': 200, 'content': content, 'text': content.decode(), 'from_cache': False}
+
+
+class StubPdfIngester:
+    def __init__(self):
+        self.ingested = []
+
+    async def ingest(self, fetcher, url):
+        self.ingested.append(url)
+        return {
+            'url': url,
+            'case_number': 'Petition No. 3 of 2019',
+            'case_ids': ['petition:3/2019'],
+            'parties': 'Republic v Kennedy Ogetto',
+            'date': '2019-06-14',
+            'text': 'Judgment delivered on 14th June 2019.',
+            'pages_read': 2,
+            'page_count': 30
+        }
+
+
+def legal_source():
+    return {
+        'name': 'Kenya Law',
+        'base_url': 'http://kenyalaw.org',
+        'search_url': 'http://kenyalaw.org/caselaw/search?q=Kennedy+Ogetto',
+        'selectors': ['.case-result a', 'tr a'],
+        'keywords': None
+    }
+
+
+def test_scrape_legal_source_reads_linked_judgment_pdf(main_scraper):
+    orchestrator = main_scraper.OgettoDataOrchestrator()
+    source = legal_source()
+    orchestrator.fetcher = StubFetcher({source['search_url']: SEARCH_PAGE})
+    orchestrator.pdf_ingester = StubPdfIngester()
+
+    succeeded = asyncio.run(orchestrator.run_task(source['name'], orchestrator.scrape_legal_source(source)))
+
+    assert succeeded
+    assert orchestrator.failed_sources == []
+    assert orchestrator.pdf_ingester.ingested == [JUDGMENT_URL]
+    assert len(orchestrator.scraped_data) == 1
+    item = orchestrator.scraped_data[0]
+    assert item['type'] == 'legal_document'
+    assert item['url'] == JUDGMENT_URL
+    assert item['date'] == '2019-06-14'
+    assert item['related_cases'] == ['petition:3/2019']
+    assert item['sources'][0]['type'] == 'Legal Document'
+
+
+def test_scrape_legal_source_skips_pdfs_without_a_pdf_backend(main_scraper, monkeypatch):
+    import pdf_ingest
+    monkeypatch.setattr(pdf_ingest, 'pdfplumber', None)
+    monkeypatch.setattr(pdf_ingest, 'PdfReader', None)
+    orchestrator = main_scraper.OgettoDataOrchestrator()
+    source = legal_source()
+    orchestrator.fetcher = StubFetcher({source['search_url']: SEARCH_PAGE})
+
+    succeeded = asyncio.run(orchestrator.run_task(source['name'], orchestrator.scrape_legal_source(source)))
+
+    assert succeeded
+    assert orchestrator.pdf_ingester is None
+    assert orchestrator.scraped_data == []
+    # Left unseen, so the judgment is read on a run that has a PDF backend
+    assert not orchestrator.crawl_state.is_seen(JUDGMENT_URL)
+
+
+def write_site_files(posts, entries):
+    with open('blog.json', 'w', encoding='utf-8') as f:
+        json.dump({'blog': {'metadata': {}, 'posts': posts}}, f)
+    with open('kennedy-ogetto-cases-chronological.json', 'w', encoding='utf-8') as f:
+        json.dump({'kennedy_ogetto_cases': {'metadata': {}, 'timeline': entries}}, f)
+
+
+def test_update_json_files_replaces_records_of_a_changed_page(main_scraper):
+    old_post = {'post_id': 'ogetto-ruling', 'title': 'Ruling', 'excerpt': 'First draft'}
+    old_entry = {'date': '2021-05-01', 'title': 'Ruling', 'description': 'First draft'}
+    other_entry = {'date': '2021-06-01', 'title': 'Appeal filed', 'description': ''}
+    write_site_files([old_post], [old_entry, other_entry])
+    orchestrator = main_scraper.OgettoDataOrchestrator()
+    new_post = dict(old_post, excerpt='Corrected')
+    new_entry = dict(old_entry, date='2021-07-01', description='Corrected')
+    orchestrator.revised = {0: {'blog_post': old_post, 'timeline_entry': old_entry}}
+
+    assert orchestrator.update_json_files([new_post], [new_entry])
+
+    with open('blog.json', encoding='utf-8') as f:
+        assert json.load(f)['blog']['posts'] == [new_post]
+    with open('kennedy-ogetto-cases-chronological.json', encoding='utf-8') as f:
+        assert json.load(f)['kennedy_ogetto_cases']['timeline'] == [other_entry, new_entry]
+    timeline_path = 'kennedy-ogetto-cases-chronological.json'
+    assert orchestrator.key_index.contains('timeline', timeline_path, main_scraper.timeline_key(new_entry))
+    assert not orchestrator.key_index.contains('timeline', timeline_path, main_scraper.timeline_key(old_entry))
@@ -0,0 +1,58 @@
+from near_duplicates import NearDuplicateIndex, choose_bands, shingle_text
+
+WORDS = [f'word{number}' for number in range(300)]
+STORY = ' '.join(WORDS[:200])
+
+
+def jaccard(first, second):
+    first, second = shingle_text(first), shingle_text(second)
+    return len(first & second) / len(first | second)
+
+
+def test_choose_bands_fits_the_permutations_and_tracks_the_threshold():
+    assert choose_bands(128, 0.8) == (16, 8)
+    for threshold in (0.5, 0.8, 0.9):
+        bands, rows = choose_bands(128, threshold)
+        assert bands * rows <= 128
+        # The S-curve's midpoint (1/b)^(1/r) sits at or below the threshold, since misses cost more
+        assert (1 / bands) ** (1 / rows) <= threshold
+    # A stricter threshold needs more rows per band
+    assert choose_bands(128, 0.5)[1] < choose_bands(128, 0.9)[1]
+
+
+def test_copies_above_the_jaccard_threshold_are_duplicates():
+    lightly_edited = STORY.replace('word100', 'changed')
+    assert jaccard(STORY, lightly_edited) >= 0.95
+    index = NearDuplicateIndex()
+    assert index.check_and_add('original', STORY) is None
+
+    duplicate = index.check_and_add('syndicated', lightly_edited)
+
+    assert duplicate['id'] == 'original'
+    assert duplicate['similarity'] >= 0.8
+    assert 'syndicated' not in index.signatures
+
+
+def test_texts_below_the_threshold_are_kept():
+    half_shared = ' '.join(WORDS[100:300])
+    assert jaccard(STORY, half_shared) < 0.5
+    index = NearDuplicateIndex()
+    index.add('original', STORY)
+
+    assert index.check_and_add('follow-up', half_shared) is None
+    assert 'follow-up' in index.signatures
+    # MinHash estimates the Jaccard similarity the threshold is defined on
+    estimate = index.similarity(index.signatures['original'], index.signatures['follow-up'])
+    assert abs(estimate - jaccard(STORY, half_shared)) < 0.15
+
+
+def test_an_item_rechecked_under_its_own_id_does_not_match_itself(tmp_path):
+    index = NearDuplicateIndex()
+    index.add('original', STORY)
+    assert index.check_and_add('original', STORY) is None
+    assert index.check_and_add('', '') is None
+
+    path = str(tmp_path / 'index.json')
+    index.save(path)
+    loaded = NearDuplicateIndex.load(path)
+    assert loaded.find_duplicate(STORY)['id'] == 'original'
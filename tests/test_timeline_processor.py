@@ -0,0 +1,58 @@
+import json
+
+from dedup_index import DedupKeyIndex, load_timeline_keys, timeline_key
+from timeline_processor import TimelineProcessor
+
+
+def entry(date, title):
+    return {'date': date, 'title': title}
+
+
+def test_insert_sorted_entries_matches_a_full_sort():
+    existing = [entry(f'2020-01-{day:02d}', f'Existing {day}') for day in range(1, 29)]
+    new = [entry('2020-01-15', 'New mid'), entry(None, 'Undated'), entry('2019-12-31', 'New first')]
+    expected = TimelineProcessor().sort_timeline_entries(existing + new)
+
+    merged = TimelineProcessor().insert_sorted_entries(list(existing), new)
+
+    assert merged == expected
+    # Equal dates keep existing-before-new order
+    assert merged.index(entry('2020-01-15', 'Existing 15')) < merged.index(entry('2020-01-15', 'New mid'))
+
+
+def test_merge_checks_new_entries_against_the_persistent_key_set(tmp_path):
+    path = str(tmp_path / 'timeline.json')
+    existing = [entry('2020-01-01', 'Appointed'), entry('2020-02-01', 'Sworn in')]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'kennedy_ogetto_cases': {'metadata': {}, 'timeline': existing}}, f)
+    index = DedupKeyIndex(str(tmp_path / 'keys.sqlite3'))
+    index.sync('timeline', path, lambda: load_timeline_keys(path))
+    seen = index.key_set('timeline', path)
+
+    merged = TimelineProcessor().merge_with_existing_timeline(
+        [entry('2020-02-01', 'Sworn in'), entry('2020-03-01', 'Resigned'), entry('2020-03-01', 'Resigned')],
+        path, incremental=True, seen=seen
+    )
+
+    assert merged['kennedy_ogetto_cases']['timeline'] == existing + [entry('2020-03-01', 'Resigned')]
+    assert timeline_key(entry('2020-03-01', 'Resigned')) in seen
+    assert not index.contains('timeline', path, timeline_key(entry('2020-03-01', 'Resigned')))
+
+
+class FixedEventClassifier:
+    def __init__(self, event_type):
+        self.event_type = event_type
+
+    def classify(self, content, title=''):
+        return {'event_type': self.event_type, 'legal_context': '', 'timeline_significance': 'Low'}
+
+
+def test_pool_workers_use_the_processor_instance():
+    processor = TimelineProcessor()
+    processor.classifier = FixedEventClassifier('Custom Event')
+    records = [{'title': f'Record {number}', 'content': 'Hearing', 'date': '2021-01-01'} for number in range(5)]
+
+    entries = list(processor.create_timeline_entries(records, workers=2, chunksize=2))
+
+    assert [entry['title'] for entry in entries] == [record['title'] for record in records]
+    assert {entry['event_type'] for entry in entries} == {'Custom Event'}
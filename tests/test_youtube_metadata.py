@@ -0,0 +1,61 @@
+import json
+
+from youtube_metadata import PlayerResponseScanner, parse_watch_page, video_id
+
+VIDEO_URL = 'https://www.youtube.com/watch?v=LocZPStDmb0'
+PLAYER_RESPONSE = {
+    'videoDetails': {
+        'title': 'Ogeto sworn in – Panel of Experts',
+        # A '};' inside a string must not end the blob early
+        'shortDescription': 'Swearing-in};\nat State House, Nairobi',
+        'viewCount': '1234'
+    },
+    'microformat': {'playerMicroformatRenderer': {'uploadDate': '2025-09-04T08:00:00-07:00'}}
+}
+PAGE = ('<html><head>' + 'x' * 300 + '<script>var ytInitialPlayerResponse = '
+        + json.dumps(PLAYER_RESPONSE, ensure_ascii=False) + ';var meta = {};</script>'
+        + 'y' * 5000 + '</html>').encode('utf-8')
+EXPECTED = {
+    'title': 'Ogeto sworn in – Panel of Experts',
+    'description': 'Swearing-in}; at State House, Nairobi',
+    'upload_date': '2025-09-04',
+    'upload_date_parsed': True,
+    'views': '1234',
+    'url': VIDEO_URL
+}
+
+
+def feed_in_chunks(page, size):
+    scanner = PlayerResponseScanner()
+    for start in range(0, len(page), size):
+        if scanner.feed(page[start:start + size]):
+            break
+    return scanner
+
+
+def test_blob_is_found_whatever_the_chunk_boundaries():
+    # Size 1 splits the start marker, the multi-byte dash and the closing '};' across chunks
+    for size in (1, 2, 3, 7, 64, 1000, len(PAGE)):
+        scanner = feed_in_chunks(PAGE, size)
+        assert scanner.metadata(VIDEO_URL) == EXPECTED, size
+
+
+def test_scanning_stops_at_the_end_of_the_blob():
+    scanner = feed_in_chunks(PAGE, 64)
+    assert scanner.done
+    assert scanner.bytes_read < len(PAGE) - 4000
+    assert scanner.feed(b'more') is True
+
+
+def test_page_without_player_response():
+    scanner = feed_in_chunks(b'<html>' + b'z' * 1000 + b'</html>', 100)
+    assert not scanner.done
+    assert scanner.metadata(VIDEO_URL) is None
+    assert parse_watch_page(PAGE.decode('utf-8'), VIDEO_URL) == EXPECTED
+
+
+def test_video_id_from_url_forms():
+    assert video_id(VIDEO_URL) == 'LocZPStDmb0'
+    assert video_id('https://youtu.be/ED5jntqRoh0?t=3') == 'ED5jntqRoh0'
+    assert video_id('https://www.youtube.com/shorts/ED5jntqRoh0') == 'ED5jntqRoh0'
+    assert video_id('https://example.com/watch') is None
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Timeline Query Engine
+Indexes timeline entries and blog posts by date, event type, category
+and source publication so reports can answer questions without full scans.
+Files loaded from disk are indexed as compact slotted records.
+"""
+
+from bisect import bisect_left, bisect_right
+
+from records import Record, Source, TimelineEntry, load_blog_records, load_timeline_records
+
+DEFAULT_TIMELINE_PATH = 'site/data/kennedy-ogetto-cases-chronological.json'
+DEFAULT_BLOG_PATH = 'site/data/blog.json'
+
+
+def record_fields(kind, record):
+    """item_fields for a records.Record, read through its slots"""
+    metadata = record.metadata if isinstance(record.metadata, dict) else {}
+    if isinstance(record, TimelineEntry):
+        date = record.date
+        event_type = record.event_type
+        category = metadata.get('category')
+    else:
+        date = record.publication_date
+        event_type = record.get('event_type')
+        category = record.category
+    publications = {source.publication for source in record.sources or ()
+                    if isinstance(source, Source) and source.publication}
+    return {
+        'date': date or '',
+        'event_type': event_type or None,
+        'category': category or None,
+        'sources': publications
+    }
+
+
+def item_fields(kind, item):
+    """Pull the indexed fields out of a timeline entry or blog post (dict or record)"""
+    if isinstance(item, Record):
+        return record_fields(kind, item)
+    metadata = item.get('metadata') or {}
+    if kind == 'timeline':
+        date = item.get('date') or ''
+        category = metadata.get('category') if isinstance(metadata, dict) else None
+    else:
+        date = item.get('publication_date') or ''
+        category = item.get('category')
+    sources = item.get('sources') or []
+    publications = {source.get('publication') for source in sources if source.get('publication')}
+    return {
+        'date': date,
+        'event_type': item.get('event_type'),
+        'category': category,
+        'sources': publications
+    }
+
+
+class TimelineIndex:
+    def __init__(self):
+        self.items = []
+        self.kinds = []
+        self.positions = []
+        self.dates = []
+        self.rank = {}
+        self.by_kind = {}
+        self.by_event_type = {}
+        self.by_category = {}
+        self.by_source = {}
+
+    def add(self, kind, item):
+        """Queue an item for indexing; call build() once everything is added"""
+        self.items.append(item)
+        self.kinds.append(kind)
+
+    def build(self):
+        """Build the sorted date array and hash indexes"""
+        fields = [item_fields(kind, item) for kind, item in zip(self.kinds, self.items)]
+
+        # positions holds item ids in date order; dates is the matching sorted key array
+        self.positions = sorted(range(len(self.items)), key=lambda item_id: fields[item_id]['date'])
+        self.dates = [fields[item_id]['date'] for item_id in self.positions]
+        self.rank = {item_id: rank for rank, item_id in enumerate(self.positions)}
+
+        self.by_kind, self.by_event_type, self.by_category, self.by_source = {}, {}, {}, {}
+        for item_id, (kind, values) in enumerate(zip(self.kinds, fields)):
+            self.by_kind.setdefault(kind, set()).add(item_id)
+            if values['event_type']:
+                self.by_event_type.setdefault(values['event_type'], set()).add(item_id)
+            if values['category']:
+                self.by_category.setdefault(values['category'], set()).add(item_id)
+            for publication in values['sources']:
+                self.by_source.setdefault(publication, set()).add(item_id)
+        return self
+
+    @classmethod
+    def from_items(cls, timeline, chronology_posts=(), blog_posts=()):
+        """Build an index from timeline entries and posts (dicts or records)"""
+        index = cls()
+        for entry in timeline:
+            index.add('timeline', entry)
+        # The chronology file's blog_posts are what the site renders as its timeline
+        for post in chronology_posts:
+            index.add('chronology_post', post)
+        for post in blog_posts:
+            index.add('blog_post', post)
+        return index.build()
+
+    @classmethod
+    def from_data(cls, timeline_data, blog_data=None):
+        """Build an index from loaded chronology (and optionally blog.json) data"""
+        cases = timeline_data.get('kennedy_ogetto_cases', timeline_data)
+        blog_posts = blog_data.get('blog', {}).get('posts', []) if blog_data else []
+        return cls.from_items(cases.get('timeline', []), cases.get('blog_posts', []), blog_posts)
+
+    @classmethod
+    def load(cls, timeline_path=DEFAULT_TIMELINE_PATH, blog_path=None):
+        """Load the site data files as records and index them; queries yield records"""
+        timeline, chronology_posts = load_timeline_records(timeline_path)
+        blog_posts = load_blog_records(blog_path) if blog_path else []
+        return cls.from_items(timeline, chronology_posts, blog_posts)
+
+    def query(self):
+        """Start a composable query over every indexed item"""
+        return TimelineQuery(self)
+
+    def count(self, kind=None):
+        """Number of indexed items, optionally of one kind"""
+        return len(self.items) if kind is None else len(self.by_kind.get(kind, ()))
+
+    def facet_counts(self, field):
+        """Item counts per value of 'kind', 'event_type', 'category' or 'source'"""
+        table = getattr(self, f'by_{field}')
+        return {value: len(item_ids) for value, item_ids in sorted(table.items())}
+
+
+class TimelineQuery:
+    def __init__(self, index, start=None, end=None, filters=None, kinds=None):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.filters = filters or ()
+        self.kinds = kinds
+
+    def copy(self, **changes):
+        values = {'start': self.start, 'end': self.end, 'filters': self.filters, 'kinds': self.kinds}
+        values.update(changes)
+        return TimelineQuery(self.index, **values)
+
+    def between(self, start=None, end=None):
+        """Restrict to dates in [start, end]; partial dates like '2022' cover the whole period"""
+        return self.copy(start=start, end=end)
+
+    def kind(self, *kinds):
+        return self.copy(kinds=kinds)
+
+    def event_type(self, *values):
+        return self.copy(filters=self.filters + (('event_type', values),))
+
+    def category(self, *values):
+        return self.copy(filters=self.filters + (('category', values),))
+
+    def source(self, *values):
+        return self.copy(filters=self.filters + (('source', values),))
+
+    def candidates(self):
+        """Intersect the hash-index matches, smallest set first; None means no hash filter"""
+        sets = []
+        if self.kinds:
+            sets.append(set().union(*(self.index.by_kind.get(kind, set()) for kind in self.kinds)))
+        for field, values in self.filters:
+            table = getattr(self.index, f'by_{field}')
+            sets.append(set().union(*(table.get(value, set()) for value in values)))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            result &= other
+            if not result:
+                break
+        return result
+
+    def date_range(self):
+        """Positions [low, high) of the date window in the sorted date array"""
+        dates = self.index.dates
+        low = bisect_left(dates, self.start) if self.start else 0
+        # Undated items sort first as '', so any start bound excludes them.
+        # Appending \uffff makes an end of '2022' or '2022-05' cover the whole period.
+        high = bisect_right(dates, self.end + '\uffff') if self.end else len(dates)
+        return low, high
+
+    def __iter__(self):
+        """Lazily yield matching items in date order"""
+        low, high = self.date_range()
+        candidates = self.candidates()
+        positions = self.index.positions
+        items = self.index.items
+
+        if candidates is None:
+            for rank in range(low, high):
+                yield items[positions[rank]]
+            return
+
+        # Walk whichever is smaller: the candidate set (sorted by rank) or the date window
+        if len(candidates) < high - low:
+            rank = self.index.rank
+            for item_rank in sorted(rank[item_id] for item_id in candidates):
+                if low <= item_rank < high:
+                    yield items[positions[item_rank]]
+        else:
+            for item_rank in range(low, high):
+                if positions[item_rank] in candidates:
+                    yield items[positions[item_rank]]
+
+    def count(self):
+        return sum(1 for _ in self)
+
+    def first(self):
+        return next(iter(self), None)
+
+
+if __name__ == "__main__":
+    index = TimelineIndex.load(DEFAULT_TIMELINE_PATH, DEFAULT_BLOG_PATH)
+    print(f"Indexed {index.count('timeline')} timeline entries, {index.count('chronology_post')} "
+          f"chronology posts and {index.count('blog_post')} blog posts")
+    for field in ('event_type', 'category', 'source'):
+        print(f"\nBy {field}:")
+        for value, count in index.facet_counts(field).items():
+            print(f"- {value}: {count}")
@@ -5,45 +5,26 @@ Processes scraped data and creates chronological timeline entries
 """
 
 import json
+from bisect import bisect_right
+from collections import deque
+import heapq
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-import re
+from itertools import islice
+from keyword_classifier import default_classifier
+from date_extractor import default_date_extractor
+from case_index import extract_case_ids
+from dedup_index import timeline_key
+from records import TimelineEntry
 
 class TimelineProcessor:
     def __init__(self):
-        self.event_types = {
-            'appointment': 'Government Appointment',
-            'case': 'Legal Case',
-            'court': 'Court Appearance',
-            'judgment': 'Legal Judgment',
-            'submission': 'Legal Submission',
-            'statement': 'Public Statement',
-            'award': 'Recognition/Award',
-            'education': 'Educational Milestone'
-        }
+        self.classifier = default_classifier
+        self.date_extractor = default_date_extractor
     
     def parse_date(self, date_string):
         """Parse various date formats"""
-        date_patterns = [
-            r'(\d{4}-\d{2}-\d{2})',  # YYYY-MM-DD
-            r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',  # DD Month YYYY
-            r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})',  # Month DD, YYYY
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, date_string, re.IGNORECASE)
-            if match:
-                if pattern == date_patterns[0]:  # YYYY-MM-DD
-                    return match.group(1)
-                elif pattern == date_patterns[1]:  # DD Month YYYY
-                    day, month, year = match.groups()
-                    month_num = self.month_to_number(month)
-                    return f"{year}-{month_num:02d}-{int(day):02d}"
-                elif pattern == date_patterns[2]:  # Month DD, YYYY
-                    month, day, year = match.groups()
-                    month_num = self.month_to_number(month)
-                    return f"{year}-{month_num:02d}-{int(day):02d}"
-        
-        return None
+        return self.date_extractor.parse(date_string)
     
     def month_to_number(self, month_name):
         """Convert month name to number"""
@@ -56,48 +37,23 @@ class TimelineProcessor:
     
     def determine_event_type(self, title, content):
         """Determine the type of event based on content"""
-        text = (title + ' ' + content).lower()
-        
-        for keyword, event_type in self.event_types.items():
-            if keyword in text:
-                return event_type
-        
-        # More specific checks
-        if any(word in text for word in ['appointed', 'nomination', 'confirmed']):
-            return 'Government Appointment'
-        elif any(word in text for word in ['court', 'hearing', 'trial', 'proceeding']):
-            return 'Court Appearance'
-        elif any(word in text for word in ['judgment', 'ruling', 'decision', 'verdict']):
-            return 'Legal Judgment'
-        elif any(word in text for word in ['submission', 'argument', 'brief']):
-            return 'Legal Submission'
-        
-        return 'Legal Event'
+        return self.classifier.classify(content, title)['event_type']
     
     def extract_legal_context(self, content):
         """Extract legal context and significance"""
-        legal_contexts = {
-            'constitutional': 'Constitutional law matter involving interpretation of Kenya\'s constitution',
-            'election': 'Electoral law case related to Kenya\'s democratic processes',
-            'international': 'International law matter involving cross-border legal issues',
-            'criminal': 'Criminal law case involving serious criminal charges',
-            'investment': 'Investment law dispute involving international arbitration',
-            'administrative': 'Administrative law matter involving government operations'
-        }
-        
-        content_lower = content.lower()
-        for keyword, context in legal_contexts.items():
-            if keyword in content_lower:
-                return context
-        
-        return 'General legal matter'
+        return self.classifier.classify(content)['legal_context']
     
-    def create_timeline_entry(self, title, content, date, sources=None, event_type=None):
-        """Create a timeline entry from scraped data"""
+    def create_timeline_entry(self, title, content, date, sources=None, event_type=None, related_cases=None):
+        """Create a timeline entry from scraped data
+        
+        related_cases: case IDs already extracted from a fuller text than
+        content (e.g. a whole judgment PDF); otherwise they come from content.
+        """
         
         parsed_date = self.parse_date(date) if isinstance(date, str) else date
+        labels = self.classifier.classify(content, title)
         if not event_type:
-            event_type = self.determine_event_type(title, content)
+            event_type = labels['event_type']
         
         # Generate description (first 200 characters of content)
         description = content[:200] + "..." if len(content) > 200 else content
@@ -107,10 +63,10 @@ class TimelineProcessor:
             "event_type": event_type,
             "title": title,
             "description": description,
-            "significance": self.determine_significance(content),
+            "significance": labels['timeline_significance'],
             "sources": sources or [],
-            "related_cases": self.extract_related_cases(content),
-            "legal_context": self.extract_legal_context(content),
+            "related_cases": related_cases if related_cases is not None else self.extract_related_cases(content),
+            "legal_context": labels['legal_context'],
             "metadata": {
                 "word_count": len(content.split()),
                 "extracted_date": parsed_date,
@@ -120,43 +76,109 @@ class TimelineProcessor:
         
         return timeline_entry
     
-    def determine_significance(self, content):
-        """Determine the significance of the event"""
-        high_significance = ['supreme court', 'solicitor general', 'icc', 'constitutional amendment']
-        medium_significance = ['high court', 'court of appeal', 'government appointment']
+    def create_timeline_entries(self, records, workers=None, chunksize=50, as_records=False):
+        """Create timeline entries for many scraped records, in input order
         
-        content_lower = content.lower()
+        Records are dicts with title, content, date and optional sources and
+        event_type. With workers=None entries are built serially; with a worker
+        count the records are chunked across a process pool, and each worker
+        gets a copy of this processor once, when it starts, so subclass
+        overrides and instance state (e.g. a custom classifier) carry over.
+        as_records=True yields compact TimelineEntry objects instead of dicts.
+        """
+        entries = self.build_timeline_entries(records, workers, chunksize)
+        if as_records:
+            return (TimelineEntry.from_dict(entry) for entry in entries)
+        return entries
+    
+    def build_timeline_entries(self, records, workers, chunksize):
+        if not workers:
+            for record in records:
+                yield self.create_timeline_entry(**timeline_entry_args(record))
+            return
         
-        if any(term in content_lower for term in high_significance):
-            return 'High - Landmark legal event with national/international significance'
-        elif any(term in content_lower for term in medium_significance):
-            return 'Medium - Important legal matter with significant implications'
-        else:
-            return 'Standard - Regular legal proceeding or professional activity'
+        records = iter(records)
+        with ProcessPoolExecutor(max_workers=workers, initializer=start_timeline_worker,
+                                 initargs=(self,)) as executor:
+            # Keep a bounded window of chunks in flight and yield them in submission order
+            pending = deque()
+            while True:
+                while len(pending) < workers * 2:
+                    chunk = list(islice(records, chunksize))
+                    if not chunk:
+                        break
+                    pending.append(executor.submit(build_timeline_chunk, chunk))
+                if not pending:
+                    break
+                for entry in pending.popleft().result():
+                    yield entry
+    
+    def determine_significance(self, content):
+        """Determine the significance of the event"""
+        return self.classifier.classify(content)['timeline_significance']
     
     def extract_related_cases(self, content):
-        """Extract references to related cases"""
-        # Look for case references, petition numbers, etc.
-        case_patterns = [
-            r'Petition\s+No\.?\s*(\d+)',
-            r'Case\s+No\.?\s*([A-Z0-9/-]+)',
-            r'ICC-\d+/\d+-\d+/\d+-\d+',
-            r'ICSID\s+Case\s+No\.?\s*([A-Z0-9/-]+)'
-        ]
-        
-        related_cases = []
-        for pattern in case_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            related_cases.extend(matches)
-        
-        return related_cases
+        """Extract references to related cases as canonical case IDs"""
+        return extract_case_ids(content)
     
     def sort_timeline_entries(self, entries):
         """Sort timeline entries chronologically"""
-        return sorted(entries, key=lambda x: x['date'] if x['date'] else '9999-12-31')
+        return sorted(entries, key=timeline_sort_key)
     
-    def merge_with_existing_timeline(self, new_entries, existing_timeline_path):
-        """Merge new entries with existing timeline"""
+    def insert_sorted_entries(self, sorted_entries, new_entries, seen=None):
+        """Merge new entries into an already sorted timeline without re-sorting it
+        
+        Duplicates are checked against seen, a set of dedup_index.timeline_key
+        keys (or a DedupKeyIndex.key_set) that is updated in place; with
+        seen=None the new entries are trusted to be new already (e.g. filtered
+        through DedupKeyIndex.filter_new). A few new entries are bisect-inserted;
+        larger batches are merged in one linear pass. Entries with equal dates
+        keep existing-before-new order.
+        
+        This avoids re-sorting, but each list.insert still shifts the entries
+        after it, so a merge stays O(n): a constant-factor gain over a full sort.
+        """
+        additions = []
+        for entry in new_entries:
+            if seen is None:
+                additions.append(entry)
+                continue
+            key = timeline_key(entry)
+            if key not in seen:
+                additions.append(entry)
+                seen.add(key)
+        
+        if not additions:
+            return sorted_entries
+        
+        additions.sort(key=timeline_sort_key)
+        if len(additions) * 8 < len(sorted_entries):
+            # bisect's key= argument needs Python 3.10, so search a parallel list of sort keys
+            sort_keys = [timeline_sort_key(entry) for entry in sorted_entries]
+            for entry in additions:
+                key = timeline_sort_key(entry)
+                position = bisect_right(sort_keys, key)
+                sort_keys.insert(position, key)
+                sorted_entries.insert(position, entry)
+            return sorted_entries
+        
+        return list(heapq.merge(sorted_entries, additions, key=timeline_sort_key))
+    
+    def merge_with_existing_timeline(self, new_entries, existing_timeline_path, incremental=False,
+                                     deduplicated=False, replaced=(), seen=None):
+        """Merge new entries with existing timeline
+        
+        With incremental=True the existing timeline is trusted to be sorted and
+        de-duplicated already, so only the new entries are sorted and inserted.
+        New entries are checked against seen, the file's key set, when one is
+        passed (e.g. DedupKeyIndex.key_set, kept between runs); otherwise it is
+        rebuilt from the existing entries. deduplicated=True trusts new_entries
+        to hold no key already in the file, as after DedupKeyIndex.filter_new,
+        so no check is made. The whole file is still parsed and rewritten.
+        replaced lists existing entries superseded by new versions in
+        new_entries (revisited pages whose content changed); they are dropped
+        before the merge.
+        """
         try:
             with open(existing_timeline_path, 'r', encoding='utf-8') as f:
                 existing_data = json.load(f)
@@ -172,20 +194,32 @@ class TimelineProcessor:
             else:
                 existing_entries = existing_data.get('timeline', [])
             
-            all_entries = existing_entries + new_entries
-            
-            # Remove duplicates based on date and title
-            unique_entries = []
-            seen = set()
+            if replaced:
+                replaced_keys = {(entry['date'], entry['title']) for entry in replaced}
+                existing_entries = [entry for entry in existing_entries
+                                    if (entry['date'], entry['title']) not in replaced_keys]
             
-            for entry in all_entries:
-                key = (entry['date'], entry['title'])
-                if key not in seen:
-                    unique_entries.append(entry)
-                    seen.add(key)
-            
-            # Sort chronologically
-            sorted_entries = self.sort_timeline_entries(unique_entries)
+            if incremental:
+                if deduplicated:
+                    seen = None
+                elif seen is None:
+                    seen = {timeline_key(entry) for entry in existing_entries}
+                sorted_entries = self.insert_sorted_entries(existing_entries, new_entries, seen)
+            else:
+                all_entries = existing_entries + new_entries
+                
+                # Remove duplicates based on date and title
+                unique_entries = []
+                seen = set()
+                
+                for entry in all_entries:
+                    key = (entry['date'], entry['title'])
+                    if key not in seen:
+                        unique_entries.append(entry)
+                        seen.add(key)
+                
+                # Sort chronologically
+                sorted_entries = self.sort_timeline_entries(unique_entries)
             
             # Update the structure
             if 'kennedy_ogetto_cases' in existing_data:
@@ -216,21 +250,53 @@ class TimelineProcessor:
                 }
             }
 
-# Example usage
-processor = TimelineProcessor()
+def timeline_sort_key(entry):
+    """Chronological sort key; undated entries go last"""
+    return entry['date'] if entry['date'] else '9999-12-31'
 
-# Example timeline entry
-sample_entry = processor.create_timeline_entry(
-    title="Kennedy Ogetto Appointed as Legal Adviser to President Ruto",
-    content="President William Ruto appointed Kennedy Ogetto as his legal adviser, bringing extensive experience from his role as Solicitor General and international legal practice.",
-    date="2023-03-01",
-    sources=[{
-        "url": "https://example.com/appointment-news",
-        "title": "Ruto Appoints Legal Adviser",
-        "publication": "Daily Nation",
-        "date": "2023-03-01",
-        "type": "News Article"
-    }]
-)
+def timeline_entry_args(record):
+    """Map a scraped record onto create_timeline_entry arguments"""
+    return {
+        'title': record.get('title', ''),
+        'content': record.get('content', ''),
+        'date': record.get('date', datetime.now().strftime('%Y-%m-%d')),
+        'sources': record.get('sources', []),
+        'event_type': record.get('event_type'),
+        'related_cases': record.get('related_cases')
+    }
 
-print(json.dumps(sample_entry, indent=2))
\ No newline at end of file
+# The processor each pool worker builds entries with, set by start_timeline_worker
+worker_processor = None
+
+def start_timeline_worker(processor):
+    """Process-pool initializer: keep the pickled processor for every chunk this worker builds
+    
+    Its class must be importable by the worker (a module-level class).
+    """
+    global worker_processor
+    worker_processor = processor
+
+def build_timeline_chunk(chunk):
+    """Process-pool worker: build timeline entries for one chunk of records"""
+    processor = worker_processor or TimelineProcessor()
+    return [processor.create_timeline_entry(**timeline_entry_args(record)) for record in chunk]
+
+if __name__ == "__main__":
+    # Example usage
+    processor = TimelineProcessor()
+    
+    # Example timeline entry
+    sample_entry = processor.create_timeline_entry(
+        title="Kennedy Ogetto Appointed as Legal Adviser to President Ruto",
+        content="President William Ruto appointed Kennedy Ogetto as his legal adviser, bringing extensive experience from his role as Solicitor General and international legal practice.",
+        date="2023-03-01",
+        sources=[{
+            "url": "https://example.com/appointment-news",
+            "title": "Ruto Appoints Legal Adviser",
+            "publication": "Daily Nation",
+            "date": "2023-03-01",
+            "type": "News Article"
+        }]
+    )
+    
+    print(json.dumps(sample_entry, indent=2))
\ No newline at end of file
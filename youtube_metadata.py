@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+YouTube Metadata Extraction
+Streams watch pages only until the ytInitialPlayerResponse JSON blob is
+complete, then closes the connection and decodes the blob properly.
+With a YouTube Data API key, metadata for up to 50 videos comes back in
+one batched videos.list request instead.
+"""
+
+import asyncio
+import codecs
+import json
+import re
+from datetime import datetime
+
+CHUNK_SIZE = 16 * 1024
+API_BATCH_SIZE = 50
+VIDEOS_API_URL = 'https://www.googleapis.com/youtube/v3/videos'
+
+PLAYER_RESPONSE_START = re.compile(r'ytInitialPlayerResponse"?\]?\s*=\s*\{')
+# The blob is a JS object literal followed by ';', so only try to decode at a '};'
+BLOB_END_CANDIDATE = re.compile(r'\}\s*;')
+VIDEO_ID_PATTERN = re.compile(r'(?:[?&]v=|youtu\.be/|/shorts/|/embed/)([\w-]{11})')
+
+
+def video_id(video_url):
+    """The 11-character video ID in a watch, short or embed URL"""
+    match = VIDEO_ID_PATTERN.search(video_url)
+    return match.group(1) if match else None
+
+
+class PlayerResponseScanner:
+    """Incrementally finds and decodes ytInitialPlayerResponse from watch-page chunks"""
+
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.prefix = ''
+        self.parts = None
+        self.player_response = None
+        self.bytes_read = 0
+
+    @property
+    def done(self):
+        return self.player_response is not None
+
+    def feed(self, chunk):
+        """Feed the next chunk of bytes; returns True once the blob is complete"""
+        if self.done:
+            return True
+        self.bytes_read += len(chunk)
+        text = self.decoder.decode(chunk)
+
+        if self.parts is None:
+            # Still looking for the start; keep a short tail in case the marker spans chunks
+            text = self.prefix + text
+            match = PLAYER_RESPONSE_START.search(text)
+            if not match:
+                self.prefix = text[-64:]
+                return False
+            self.parts = []
+            text = text[match.end() - 1:]
+            tail = ''
+        else:
+            tail = self.parts[-1][-16:] if self.parts else ''
+
+        self.parts.append(text)
+        if BLOB_END_CANDIDATE.search(tail + text):
+            self.try_decode()
+        return self.done
+
+    def try_decode(self):
+        try:
+            self.player_response, _ = json.JSONDecoder().raw_decode(''.join(self.parts))
+            self.parts = None
+        except json.JSONDecodeError:
+            pass
+
+    def metadata(self, video_url):
+        """Metadata dict in the shape EnhancedOgettoScraper expects, or None"""
+        if not self.done:
+            return None
+        return player_response_metadata(self.player_response, video_url)
+
+
+def format_metadata(video_url, title, description, upload_date, views):
+    description = (description or '').replace('\r', ' ').replace('\n', ' ')
+    return {
+        'title': title or "Unknown Title",
+        'description': description[:500],
+        'upload_date': (upload_date or datetime.now().strftime('%Y-%m-%d')).split('T')[0],
+        'upload_date_parsed': bool(upload_date),
+        'views': str(views or "0"),
+        'url': video_url
+    }
+
+
+def player_response_metadata(player_response, video_url):
+    details = player_response.get('videoDetails') or {}
+    microformat = (player_response.get('microformat') or {}).get('playerMicroformatRenderer') or {}
+    return format_metadata(
+        video_url,
+        details.get('title'),
+        details.get('shortDescription'),
+        microformat.get('uploadDate') or microformat.get('publishDate'),
+        details.get('viewCount')
+    )
+
+
+def parse_watch_page(text, video_url):
+    """Extract metadata from an already downloaded watch page"""
+    scanner = PlayerResponseScanner()
+    scanner.feed(text.encode('utf-8'))
+    return scanner.metadata(video_url)
+
+
+def stream_watch_page(session, video_url, timeout=10):
+    """Read a watch page with a requests session until the player response is complete"""
+    scanner = PlayerResponseScanner()
+    with session.get(video_url, timeout=timeout, stream=True) as response:
+        if response.status_code != 200:
+            return None
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if scanner.feed(chunk):
+                break
+    return scanner.metadata(video_url)
+
+
+async def stream_watch_page_async(fetcher, video_url):
+    """Stream a watch page through an AsyncFetcher, stopping at the end of the player response"""
+    scanner = PlayerResponseScanner()
+    status = await fetcher.stream(video_url, scanner.feed)
+    return scanner.metadata(video_url) if status == 200 else None
+
+
+async def fetch_api_metadata(fetcher, video_urls, api_key):
+    """Batched videos.list lookups, API_BATCH_SIZE IDs per request"""
+    ids = {url: video_id(url) for url in video_urls}
+    unique_ids = list(dict.fromkeys(value for value in ids.values() if value))
+    batches = [unique_ids[i:i + API_BATCH_SIZE] for i in range(0, len(unique_ids), API_BATCH_SIZE)]
+    responses = await asyncio.gather(*(
+        fetcher.fetch(VIDEOS_API_URL, params={'part': 'snippet,statistics', 'id': ','.join(batch)},
+                      headers={'X-Goog-Api-Key': api_key})
+        for batch in batches
+    ))
+
+    items = {}
+    for response in responses:
+        if response and response['status'] == 200:
+            for item in json.loads(response['text']).get('items', []):
+                items[item['id']] = item
+
+    results = []
+    for url in video_urls:
+        item = items.get(ids[url])
+        if item is None:
+            results.append(None)
+            continue
+        snippet = item.get('snippet') or {}
+        statistics = item.get('statistics') or {}
+        results.append(format_metadata(url, snippet.get('title'), snippet.get('description'),
+                                       snippet.get('publishedAt'), statistics.get('viewCount')))
+    return results
+
+
+async def fetch_video_metadata(fetcher, video_urls, api_key=None):
+    """Metadata for each URL (None where unavailable), in input order"""
+    if api_key:
+        return await fetch_api_metadata(fetcher, video_urls, api_key)
+    return await asyncio.gather(*(stream_watch_page_async(fetcher, url) for url in video_urls))